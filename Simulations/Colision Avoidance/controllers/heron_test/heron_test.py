@@ -3,6 +3,9 @@ import math
 import csv
 import time
 
+from lidar_sectors import SectorReader
+from occupancy_grid import OccupancyGrid
+
 robot = Robot()
 timestep = int(robot.getBasicTimeStep())
 
@@ -125,6 +128,29 @@ EDGE_W_FRAC = 0.10
 EDGE_BOUNCE_TURN = 0.95
 MAX_RECOVER_TURN = 1.6
 
+# Minima sektorów lidaru: układ indeksów liczony raz, redukcja NumPy co krok
+lidar_sectors = SectorReader(lidar, EDGE_W_FRAC) if lidar else None
+
+# Mapa zajętości (occupancy_grid.py): obszar jeziora z lake.wbt (ściany na ±16 m)
+GRID_ORIGIN = (-16.0, -16.0)
+GRID_SIZE = (32.0, 32.0)
+GRID_RES = 0.1
+# Lidar na kadłubie: 0.37 m przed środkiem (translation w lake.wbt)
+LIDAR_X_OFFSET = 0.37
+# Korytarz sprawdzany w mapie wzdłuż kursu: długość i połowa szerokości (kadłub ~1 m + zapas)
+GRID_LOOKAHEAD = 5.0
+GRID_HALF_WIDTH = 0.9
+
+occupancy = None
+LIDAR_FOV = LIDAR_MAX_RANGE = None
+if lidar:
+    try:
+        LIDAR_FOV = lidar.getFov()
+        LIDAR_MAX_RANGE = lidar.getMaxRange()
+        occupancy = OccupancyGrid(GRID_ORIGIN[0], GRID_ORIGIN[1], GRID_SIZE[0], GRID_SIZE[1], GRID_RES)
+    except Exception as e:
+        print(f"[ERR] Occupancy grid disabled: {e}")
+
 # =========================
 # PRINT TIMER
 # =========================
@@ -140,6 +166,7 @@ AVOID_HOLD = 0.0
 ESCAPE_HOLD = 0.0
 RECOVER_HOLD = 0.0
 AVOID_CLEAR_STREAK = 0
+AVOID_ENTRIES = 0            # ile razy weszliśmy w AVOID (miara oscylacji przy przeszkodzie)
 LAST_AVOID_SIDE = None       # "LEFT" / "RIGHT"
 AVOID_SIDE_LOCK = 0.0        # sekundy blokady (opcjonalnie, ale bardzo pomaga)
 SIDE_LOCK_TIME = 3.0         # ile sekund trzymamy stronę po wyborze
@@ -199,7 +226,7 @@ def autopilot_step(
     dt
 ):
     global AP_MODE, AVOID_SIDE, AVOID_HOLD, ESCAPE_HOLD, RECOVER_HOLD, AVOID_CLEAR_STREAK
-    global LAST_AVOID_SIDE, AVOID_SIDE_LOCK
+    global LAST_AVOID_SIDE, AVOID_SIDE_LOCK, AVOID_ENTRIES
 
     if AVOID_SIDE_LOCK > 0.0:
         AVOID_SIDE_LOCK -= dt
@@ -228,10 +255,30 @@ def autopilot_step(
         AVOID_HOLD = 0.0
         ESCAPE_HOLD = 0.0
         save_trajectory_csv("heron_trajectory.csv")
-        print("Trajektoria zapisana do heron_trajectory.csv")
+        print(f"Trajektoria zapisana do heron_trajectory.csv (wejść w AVOID: {AVOID_ENTRIES})")
         return {"status": "ARRIVED", "dist": dist}
 
     desired_yaw = bearing_to_target(pos, target_pos)
+
+    # --- lidar sektory ---
+    # LEFT is near index 0, RIGHT is near index n-1 (patrz lidar_sectors.py);
+    # inf/NaN pomijane, brak poprawnych odczytów w sektorze = inf
+    front_min = left_min = right_min = float("inf")
+    left_edge_min = right_edge_min = float("inf")
+    path_clear = True
+    if lidar_sectors:
+        ranges = lidar_sectors.scan()
+        front_min, left_min, right_min, left_edge_min, right_edge_min = lidar_sectors.read(ranges)
+
+        # --- mapa zajętości: skan z pozycji lidaru, kurs omijający zapamiętane przeszkody ---
+        if occupancy:
+            sx = pos[0] + LIDAR_X_OFFSET * math.cos(yaw)
+            sy = pos[1] + LIDAR_X_OFFSET * math.sin(yaw)
+            occupancy.update(sx, sy, yaw, ranges, LIDAR_FOV, LIDAR_MAX_RANGE)
+            lookahead = min(GRID_LOOKAHEAD, dist)
+            desired_yaw, free_dist = occupancy.free_heading(pos[0], pos[1], desired_yaw, lookahead, GRID_HALF_WIDTH)
+            path_clear = free_dist >= lookahead
+
     yaw_error = normalize_angle(desired_yaw - yaw)
 
     # prędkość bazowa z rampą przy celu
@@ -243,69 +290,6 @@ def autopilot_step(
     # sterowanie kursem (P)
     turn_cmd = TURN_GAIN * yaw_error
 
-    # --- lidar sektory ---
-    front_min = float("inf")
-    left_min = float("inf")
-    right_min = float("inf")
-    if lidar:
-        ranges = lidar.getRangeImage()
-        n = len(ranges)
-        if n > 10:
-            mid = n // 2
-
-            # Helper: treat inf/NaN as invalid so they don't dominate mins
-            def finite_min(seq):
-                vals = [v for v in seq if (v is not None) and (not math.isinf(v)) and (not math.isnan(v))]
-                return min(vals) if vals else float("inf")
-
-            # --- FRONT sector (center of scan) ---
-            front_w = max(5, int(0.10 * n))  # width of front window
-            front_sector = ranges[max(0, mid - front_w): min(n, mid + front_w + 1)]
-            front_min = finite_min(front_sector)
-
-            # --- SIDE sectors ---
-            # Your scan ordering appears reversed vs earlier assumption:
-            # ranges[0] ... ranges[mid] ... ranges[n-1]
-            # LEFT is near index 0, RIGHT is near index n-1
-            left_a = int(0.28 * n)
-            left_b = int(0.46 * n)
-            right_a = int(0.54 * n)
-            right_b = int(0.72 * n)
-
-            left_sector = ranges[left_a:left_b]
-            right_sector = ranges[right_a:right_b]
-
-            left_min = finite_min(left_sector)
-            right_min = finite_min(right_sector)
-
-            # --- EDGE sectors (extremes of scan) ---
-            edge_w = max(3, int(EDGE_W_FRAC * n))
-
-            left_edge_sector = ranges[0:edge_w]
-            right_edge_sector = ranges[n - edge_w:n]
-
-            left_edge_min = finite_min(left_edge_sector)
-            right_edge_min = finite_min(right_edge_sector)
-
-
-            # front_w = max(5, int(0.10 * n))   # slightly wider
-            # right_a = int(0.28 * n)
-            # right_b = int(0.46 * n)
-            # left_a  = int(0.54 * n)
-            # left_b  = int(0.72 * n)
-
-            # front_sector = ranges[mid - front_w: mid + front_w + 1]
-            # left_sector  = ranges[left_a:left_b]
-            # right_sector = ranges[right_a:right_b]
-
-            # front_min = min(front_sector) if front_sector else float("inf")
-            # left_min  = min(left_sector) if left_sector else float("inf")
-            # right_min = min(right_sector) if right_sector else float("inf")
-
-            # edge_w = max(3, int(EDGE_W_FRAC * n))
-            # right_edge_min = min(ranges[0:edge_w]) if edge_w > 0 else float("inf")
-            # left_edge_min = min(ranges[n-edge_w:n]) if edge_w > 0 else float("inf")
-
     # =========================
     # STATE MACHINE
     # =========================
@@ -355,11 +339,14 @@ def autopilot_step(
     # 2) Trigger AVOID when obstacle seen in front
     # Ma wejść do AVOID jeśli:
     # - front_min < OBSTACLE_DIST
-    # - lub jeśli jesteśmy blisko krawędzi (edge_w)
+    # - lub jeśli jesteśmy blisko krawędzi (edge_w), a mapa nie ma wolnego kursu;
+    #   z wolnym korytarzem w mapie mijamy przeszkodę burtą zamiast znowu skręcać
 
-    if front_min < OBSTACLE_DIST or (left_edge_min < OBSTACLE_DIST) or (right_edge_min < OBSTACLE_DIST):
+    edge_close = (left_edge_min < OBSTACLE_DIST) or (right_edge_min < OBSTACLE_DIST)
+    if front_min < OBSTACLE_DIST or (edge_close and not path_clear):
         if AP_MODE != "AVOID":
             AP_MODE = "AVOID"
+            AVOID_ENTRIES += 1
 
             # If we already have a latched side and lock is active, keep it
             if LAST_AVOID_SIDE is not None and AVOID_SIDE_LOCK > 0.0:
@@ -0,0 +1,115 @@
+"""
+lidar_sectors.py — minima sektorów skanu lidaru w jednym przebiegu NumPy.
+
+Granice sektorów (front, left, right, left_edge, right_edge — te same co
+w autopilot_step z heron_test.py) liczone są raz dla danej liczby wiązek.
+Z granic wszystkich sektorów powstaje posortowana lista przedziałów
+elementarnych; jedno np.fmin.reduceat daje minimum każdego przedziału,
+a drugie, na tych kilku wartościach, minimum każdego sektora (sektory mogą
+na siebie zachodzić). np.fmin pomija NaN, a inf (brak odbicia) i tak nie
+wygrywa z żadną odległością — wynik jest taki sam jak finite_min na
+listach. Bufory są alokowane raz i używane ponownie co krok.
+
+Skan czytany jest jako bufor float32 (getRangeImage(data_type="buffer"),
+bez tworzenia listy floatów), a w starszych Webots — jako lista.
+"""
+
+import numpy as np
+
+SECTORS = ("front", "left", "right", "left_edge", "right_edge")
+# Poniżej tylu wiązek sektory nie są liczone (wszystkie minima = inf)
+MIN_BEAMS = 11
+
+
+def sector_bounds(n, edge_w_frac=0.10):
+    """[(początek, koniec)] sektorów SECTORS dla skanu n wiązek (indeksy jak w heron_test.py)."""
+    mid = n // 2
+    front_w = max(5, int(0.10 * n))
+    edge_w = max(3, int(edge_w_frac * n))
+    return [
+        (max(0, mid - front_w), min(n, mid + front_w + 1)),
+        (int(0.28 * n), int(0.46 * n)),
+        (int(0.54 * n), int(0.72 * n)),
+        (0, min(edge_w, n)),
+        (max(n - edge_w, 0), n),
+    ]
+
+
+class SectorLayout:
+    def __init__(self, n, edge_w_frac=0.10):
+        self.n = n
+        self.bounds = sector_bounds(n, edge_w_frac) if n >= MIN_BEAMS else []
+        self.out = np.full(len(SECTORS), np.inf)
+        if not self.bounds:
+            return
+
+        # Przedziały elementarne [cuts[i], cuts[i+1]) pokrywające wszystkie sektory
+        cuts = np.unique([b for a_b in self.bounds for b in a_b])
+        self.start, self.stop = int(cuts[0]), int(cuts[-1])
+        self.cuts = cuts[:-1] - self.start
+        # Minima przedziałów + wartownik inf (koniec ostatniego sektora jako poprawny indeks)
+        self.elem = np.full(len(self.cuts) + 1, np.inf)
+        # Pary (pierwszy, za-ostatnim) przedział każdego sektora
+        pairs = []
+        self.empty = np.zeros(len(SECTORS), dtype=bool)
+        for k, (a, b) in enumerate(self.bounds):
+            lo, hi = np.searchsorted(cuts, a), np.searchsorted(cuts, b)
+            self.empty[k] = hi <= lo
+            pairs.extend((lo, hi) if hi > lo else (0, 1))
+        self.any_empty = bool(self.empty.any())
+        self.pairs = np.asarray(pairs, dtype=np.intp)
+        self.pair_min = np.empty(len(pairs))
+        self.buf = np.empty(n)
+
+    def reduce(self, ranges):
+        """Minima sektorów (tablica w kolejności SECTORS) ze skanu — lista albo tablica n wartości."""
+        if not self.bounds:
+            return self.out
+        if isinstance(ranges, np.ndarray):
+            scan = ranges
+        else:
+            self.buf[:] = ranges
+            scan = self.buf
+        np.fmin.reduceat(scan[self.start:self.stop], self.cuts, out=self.elem[:-1])
+        np.fmin.reduceat(self.elem, self.pairs, out=self.pair_min)
+        out = self.out
+        out[:] = self.pair_min[::2]
+        if self.any_empty:
+            out[self.empty] = np.inf
+        # fmin z samych NaN daje NaN — jak finite_min: brak poprawnych odczytów = inf
+        out[out != out] = np.inf
+        return out
+
+
+class SectorReader:
+    """Odczyt skanu z urządzenia Lidar Webots i minima sektorów; układ budowany raz."""
+
+    def __init__(self, lidar, edge_w_frac=0.10):
+        self.lidar = lidar
+        self.edge_w_frac = edge_w_frac
+        self.layout = None
+        self.use_buffer = True
+        try:
+            # Skan to wszystkie warstwy po kolei: rozdzielczość pozioma × liczba warstw
+            n = lidar.getHorizontalResolution() * lidar.getNumberOfLayers()
+            self.layout = SectorLayout(n, edge_w_frac)
+        except Exception:
+            pass
+
+    def scan(self):
+        if self.use_buffer:
+            try:
+                return np.frombuffer(self.lidar.getRangeImage(data_type="buffer"), dtype=np.float32)
+            except TypeError:
+                # Webots bez data_type — zwykła lista
+                self.use_buffer = False
+        return self.lidar.getRangeImage()
+
+    def read(self, ranges=None):
+        """(front, left, right, left_edge, right_edge) jako floaty; ranges — skan już odczytany przez scan()."""
+        if ranges is None:
+            ranges = self.scan()
+        n = len(ranges)
+        if self.layout is None or self.layout.n != n:
+            self.layout = SectorLayout(n, self.edge_w_frac)
+        return tuple(self.layout.reduce(ranges).tolist())
@@ -0,0 +1,165 @@
+"""
+occupancy_grid.py — mapa zajętości (log-odds) jeziora z lidaru, GPS i kursu z IMU.
+
+Każda wiązka skanu to półprosta z pozycji lidaru (GPS + przesunięcie na
+kadłubie, kurs z IMU): komórki przed odbiciem dostają L_FREE, komórka
+odbicia L_OCC; wiązka bez odbicia (inf / maxRange) czyści całą długość.
+Wartości są przycinane do [L_MIN, L_MAX], więc mapa szybko "zapomina"
+pomyłki, ale przeszkoda widziana kilka razy zostaje na mapie, także gdy
+zniknie już z pola widzenia lidaru.
+
+Koszt kroku jest ograniczony:
+  * przy (prawie) niezmienionej pozie rzutowane są tylko wiązki, których
+    odczyt się zmienił,
+  * w jednym kroku najwyżej max_rays wiązek (co k-ta, z przesuwanym
+    początkiem — pełny skan rozkłada się na kilka kroków),
+  * każda komórka jest aktualizowana raz na krok, choćby przecinało ją
+    wiele wiązek.
+
+free_heading() zwraca kurs najbliższy zadanemu, dla którego korytarz
+o zadanej połowie szerokości jest wolny na zadaną odległość — autopilot
+omija przeszkodę, którą pamięta mapa, zamiast wracać prosto na cel.
+"""
+
+import math
+
+import numpy as np
+
+L_OCC = 0.85
+L_FREE = -0.4
+L_MIN = -2.0
+L_MAX = 3.5
+# Komórka zajęta powyżej tej wartości (jedno odbicie wystarcza)
+OCC_THRESHOLD = 0.6
+# Limit wiązek rzutowanych w jednym kroku
+MAX_RAYS = 128
+# Poza "bez ruchu": poniżej tych zmian rzutowane są tylko zmienione wiązki
+POSE_EPS_M = 0.05
+POSE_EPS_RAD = math.radians(1.0)
+RANGE_EPS_M = 0.05
+# Krok kandydatów kursu w free_heading
+HEADING_STEP = math.radians(10.0)
+
+
+class OccupancyGrid:
+    def __init__(self, x0, y0, size_x, size_y, resolution=0.1, max_rays=MAX_RAYS):
+        self.x0, self.y0 = x0, y0
+        self.res = resolution
+        self.nx = int(math.ceil(size_x / resolution))
+        self.ny = int(math.ceil(size_y / resolution))
+        self.logodds = np.zeros((self.ny, self.nx), dtype=np.float32)
+        self.max_rays = max_rays
+        self.last_pose = None
+        self.last_ranges = None
+        self.cursor = 0
+        self.beams = None      # (n, fov) -> kąty wiązek względem kursu
+        self.angles = None
+        self.side = 1.0        # strona ostatniego omijania (histereza w free_heading)
+
+    def cells(self, x, y):
+        """Indeksy płaskie komórek i maska punktów wewnątrz mapy."""
+        ix = np.floor((x - self.x0) / self.res).astype(np.intp)
+        iy = np.floor((y - self.y0) / self.res).astype(np.intp)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        return iy * self.nx + ix, inside
+
+    def beam_angles(self, n, fov):
+        # Obraz odległości od lewej do prawej: indeks 0 = +fov/2 (lewa burta)
+        if self.beams != (n, fov):
+            self.beams = (n, fov)
+            self.angles = fov / 2.0 - (np.arange(n) + 0.5) * fov / n
+            self.last_ranges = None
+        return self.angles
+
+    def update(self, sx, sy, yaw, ranges, fov, max_range):
+        """Skan z lidaru w punkcie (sx, sy) przy kursie yaw; zwraca liczbę zaktualizowanych komórek."""
+        ranges = np.asarray(ranges, dtype=np.float32)
+        n = len(ranges)
+        if n == 0:
+            return 0
+        angles = self.beam_angles(n, fov)
+
+        moved = (
+            self.last_pose is None or self.last_ranges is None
+            or math.hypot(sx - self.last_pose[0], sy - self.last_pose[1]) > POSE_EPS_M
+            or abs(math.remainder(yaw - self.last_pose[2], 2.0 * math.pi)) > POSE_EPS_RAD
+        )
+        if moved:
+            self.last_pose = (sx, sy, yaw)
+            self.last_ranges = np.full(n, np.nan, dtype=np.float32)
+            pending = np.arange(n)
+        else:
+            same = (np.abs(ranges - self.last_ranges) <= RANGE_EPS_M) | (
+                np.isinf(ranges) & np.isinf(self.last_ranges))
+            pending = np.flatnonzero(~same)
+        if len(pending) > self.max_rays:
+            stride = -(-len(pending) // self.max_rays)
+            pending = pending[self.cursor % stride::stride]
+            self.cursor += 1
+        if len(pending) == 0:
+            return 0
+
+        r = ranges[pending]
+        self.last_ranges[pending] = r
+        usable = ~np.isnan(r)
+        r, beam = r[usable], pending[usable]
+        hit = np.isfinite(r) & (r < max_range)
+        length = np.where(hit, r, max_range)
+        theta = yaw + angles[beam]
+        c, s = np.cos(theta), np.sin(theta)
+
+        # Punkty co pół komórki wzdłuż wiązek, przed komórką odbicia
+        t = np.arange(0.0, max_range, self.res * 0.5, dtype=np.float32)
+        before = t[None, :] < (length - self.res)[:, None]
+        px = sx + c[:, None] * t[None, :]
+        py = sy + s[:, None] * t[None, :]
+        free, inside = self.cells(px[before], py[before])
+        free = np.unique(free[inside])
+
+        occ, inside = self.cells(sx + c[hit] * r[hit], sy + s[hit] * r[hit])
+        occ = np.unique(occ[inside])
+        free = np.setdiff1d(free, occ, assume_unique=True)
+
+        flat = self.logodds.reshape(-1)
+        flat[free] = np.maximum(flat[free] + L_FREE, L_MIN)
+        flat[occ] = np.minimum(flat[occ] + L_OCC, L_MAX)
+        return len(free) + len(occ)
+
+    def clear_distance(self, x, y, headings, max_dist, half_width):
+        """Wolna droga [m] wzdłuż każdego kursu dla korytarza ±half_width (poza mapą = zajęte)."""
+        headings = np.atleast_1d(np.asarray(headings, dtype=float))
+        # Od half_width: boczne promienie zaczynają się obok kadłuba, nie w przeszkodzie, którą mijamy
+        t = np.arange(min(half_width, max_dist), max_dist + 1e-9, self.res * 0.5)
+        if len(t) == 0:
+            return np.full(len(headings), max_dist)
+        lateral = np.array([-half_width, 0.0, half_width])
+        c, s = np.cos(headings), np.sin(headings)
+        # (kursy, boczne przesunięcia, próbki)
+        px = x + c[:, None, None] * t[None, None, :] - s[:, None, None] * lateral[None, :, None]
+        py = y + s[:, None, None] * t[None, None, :] + c[:, None, None] * lateral[None, :, None]
+        idx, inside = self.cells(px, py)
+        blocked = ~inside
+        blocked[inside] = self.logodds.reshape(-1)[idx[inside]] > OCC_THRESHOLD
+        blocked = blocked.any(axis=1)
+        first = np.argmax(blocked, axis=1)
+        return np.where(blocked.any(axis=1), t[first], max_dist)
+
+    def free_heading(self, x, y, desired, max_dist, half_width):
+        """
+        (kurs, wolna_droga): kurs najbliższy `desired` z wolnym korytarzem na max_dist.
+        Przy remisie wygrywa strona ostatniego omijania; gdy żaden kurs nie jest
+        wolny — kurs z najdłuższą wolną drogą.
+        """
+        d0 = float(self.clear_distance(x, y, desired, max_dist, half_width)[0])
+        if d0 >= max_dist:
+            return desired, d0
+        k = np.arange(1, int(math.pi / HEADING_STEP) + 1)
+        offsets = np.empty(2 * len(k))
+        offsets[0::2] = self.side * k * HEADING_STEP
+        offsets[1::2] = -self.side * k * HEADING_STEP
+        dist = self.clear_distance(x, y, desired + offsets, max_dist, half_width)
+        ok = np.flatnonzero(dist >= max_dist)
+        best = int(ok[0]) if len(ok) else int(np.argmax(dist))
+        self.side = 1.0 if offsets[best] > 0 else -1.0
+        heading = math.remainder(desired + offsets[best], 2.0 * math.pi)
+        return heading, float(dist[best])
@@ -4,10 +4,26 @@ eventlet.monkey_patch()
 import os
 import json
 import time
+import hashlib
+import socket
 from datetime import datetime
 from functools import wraps
 from flask import Flask, request, jsonify, render_template, Response
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
+from eventlet import tpool
+
+from persistence import StateJournal
+from state_backend import InProcessBackend, RedisBackend, new_entry, telemetry_position
+from history import TelemetryHistory, FIELDS as HISTORY_FIELDS
+import missions
+import formation
+import track_lod
+import planner
+import route_opt
+from spatial_index import GridIndex
+from proximity import ProximityMonitor, alerts_by_drone
+from progress import ProgressTracker
+import telemetry_codec
 
 app = Flask(__name__)
 app.config['PROPAGATE_EXCEPTIONS'] = True
@@ -16,82 +32,396 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'tajny_klucz_lokalny_123
 ADMIN_USER = os.environ.get('ADMIN_USER', 'admin')
 ADMIN_PASS = os.environ.get('ADMIN_PASS', 'admin')
 DRONE_API_KEY = os.environ.get('DRONE_API_KEY', '12345')
-DB_FILE = "drones_state.json"
+DB_FILE = os.environ.get('DB_FILE', 'drones_state.json')
+WAL_FILE = os.environ.get('WAL_FILE', 'drones_state.wal')
+HISTORY_DB = os.environ.get('HISTORY_DB', 'telemetry_history.db')
+MISSION_DB = os.environ.get('MISSION_DB', 'missions.db')
+# Limit punktów zwracanych przez /api/drones/<id>/track
+TRACK_MAX_POINTS = 5000
+# Limit próbek w jednym /api/telemetry/batch
+TELEMETRY_BATCH_MAX = 5000
+# Limit dronów dzielących jeden obszar w /api/plan/*
+PLAN_MAX_DRONES = 50
+# Minimalna waga drona przy podziale obszaru (bateria w %), żeby rozładowany dron nie dostał pustej części
+PARTITION_MIN_BATTERY = 5.0
+# Maksymalny czas ulepszania kolejności punktów w /api/plan/optimize (s)
+OPTIMIZE_MAX_TIME_S = 5.0
+# Co ile sekund dziennik zmian trafia na dysk (maks. utrata stanu przy awarii)
+JOURNAL_FLUSH_INTERVAL = float(os.environ.get('JOURNAL_FLUSH_INTERVAL', '0.5'))
+# Częstotliwość zbiorczego wysyłania telemetrii do panelu (Hz)
+BROADCAST_HZ = float(os.environ.get('BROADCAST_HZ', '10'))
+# Monitor zbliżeń: alarm, gdy drony zbliżą się poniżej PROXIMITY_DISTANCE_M
+# w ciągu PROXIMITY_HORIZON_S sekund (przy obecnych prędkościach)
+PROXIMITY_DISTANCE_M = float(os.environ.get('PROXIMITY_DISTANCE_M', '10'))
+PROXIMITY_HORIZON_S = float(os.environ.get('PROXIMITY_HORIZON_S', '10'))
+# Namespace Socket.IO dla stałego łącza z dronami
+DRONE_NAMESPACE = '/drone'
+# Backend stanu: "memory" (jeden worker) albo "redis" (wiele workerów gunicorna)
+STATE_BACKEND = os.environ.get('STATE_BACKEND', 'memory')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+# Kolejka Socket.IO między workerami (np. redis://...), wymagana przy >1 workerze
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+# Dzierżawa roli broadcastera (ms) — po awarii rolę przejmuje inny worker
+BROADCASTER_TTL_MS = 2000
 
 socketio = SocketIO(app, 
                     cors_allowed_origins="*", 
                     async_mode='eventlet',
+                    message_queue=SOCKETIO_MESSAGE_QUEUE,
                     ping_timeout=10, 
                     ping_interval=5)
 
-drones_db = {}
+if STATE_BACKEND == 'redis':
+    state = RedisBackend.from_url(REDIS_URL)
+else:
+    state = InProcessBackend()
+journal = StateJournal(DB_FILE, WAL_FILE)
+journal_queue = []
+history = TelemetryHistory(HISTORY_DB)
+history_queue = []
+mission_store = missions.MissionStore(MISSION_DB)
+# Piramidy LOD zakończonych misji: (drone_id, mission_id, metoda) -> TrackPyramid
+lod_cache = track_lod.PyramidCache()
 
 def load_db():
-    global drones_db
-    if os.path.exists(DB_FILE):
-        try:
-            with open(DB_FILE, 'r') as f:
-                drones_db = json.load(f)
-            print(f"[SYSTEM] Załadowano bazę: {len(drones_db)} dronów.")
-        except Exception as e:
-            print(f"[ERROR] Błąd odczytu DB: {e}")
-            drones_db = {}
+    if state.shared:
+        # Stan współdzielony trwa niezależnie od workerów — nie ma czego odtwarzać
+        print(f"[SYSTEM] Backend stanu: {STATE_BACKEND} ({len(state.ids())} dronów).")
+        return
+    try:
+        drones, replayed = journal.load()
+        state.load(drones)
+        print(f"[SYSTEM] Załadowano bazę: {len(drones)} dronów (dziennik: {replayed} wpisów).")
+    except Exception as e:
+        print(f"[ERROR] Błąd odczytu DB: {e}")
+        state.load({})
+
+def migrate_missions():
+    # Wpisy sprzed tabeli misji trzymały całą listę punktów w current_mission
+    for drone_id, entry in state.entries().items():
+        mission = entry.get("current_mission")
+        if mission and "waypoints" in mission:
+            mission_id = str(mission.get("id"))
+            version = mission_store.put(mission_id, mission.get("waypoints") or [], time.time())
+            update_drone(drone_id, {"current_mission": {"id": mission_id, "version": version}})
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def flush_journal():
+    if not journal_queue:
+        return
+    batch = journal_queue[:]
+    del journal_queue[:]
+    # Zapis na dysk w wątku systemowym — hub eventlet dalej obsługuje ingest
+    tpool.execute(journal.write_batch, batch)
+
+def flush_history():
+    if not history_queue:
+        return
+    batch = history_queue[:]
+    del history_queue[:]
+    tpool.execute(history.insert_batch, batch)
 
 def save_db_background():
     while True:
-        socketio.sleep(10)
+        socketio.sleep(JOURNAL_FLUSH_INTERVAL)
         try:
-            with open(DB_FILE, 'w') as f:
-                json.dump(drones_db, f, indent=4)
+            flush_journal()
         except Exception as e:
             print(f"[ERROR] Błąd zapisu tła: {e}")
+        try:
+            flush_history()
+        except Exception as e:
+            print(f"[ERROR] Błąd zapisu historii: {e}")
 
 def get_drone_entry(drone_id):
-    if drone_id not in drones_db:
-        drones_db[drone_id] = {
-            "telemetry": {},
-            "assigned_role": "None", 
-            "current_mission": None,
-            "last_seen": 0,
-            "is_tracked": False 
-        }
-    return drones_db[drone_id]
+    return state.get(drone_id)
+
+def update_drone(drone_id, fields):
+    # Jedyne miejsce mutacji stanu drona: backend + dziennik + broadcast.
+    # Wartości w `fields` podmieniamy, nie modyfikujemy w miejscu.
+    entry, created, was_dirty = state.update(drone_id, fields)
+    if not state.shared:
+        if created:
+            journal_queue.append({"id": drone_id, "set": new_entry()})
+        journal_queue.append({"id": drone_id, "set": fields})
+
+    broadcast_stats["updates_received"] += 1
+    if was_dirty:
+        broadcast_stats["updates_merged"] += 1
+    if "current_mission" in fields or "assigned_role" in fields or "formation" in fields:
+        push_command(drone_id, entry)
+    if "telemetry" in fields:
+        push_formation_targets(drone_id, entry)
+    return entry
+
+def build_drone_view(d_data):
+    telem_copy = d_data["telemetry"].copy()
+
+    # --- ROLA ---
+    role = d_data.get("assigned_role", "None")
+    telem_copy["server_assigned_role"] = "brak" if role == "None" else role
 
-def push_update_to_clients():
+    # --- MISJA / WAYPOINT ---
+    mission = d_data.get("current_mission")
+    target_wp = telem_copy.get("target_wp", 0)
+
+    if mission:
+        # Logika wyświetlania
+        if target_wp == 999:
+            wp_display = "KONIEC"
+        elif target_wp > 0:
+            wp_display = str(target_wp)
+        else:
+            wp_display = "-"
+
+        telem_copy["mission_display"] = f"{mission['id']} / {wp_display}"
+    else:
+        telem_copy["mission_display"] = "brak"
+
+    # --- POSTĘP / ETA (liczone w broadcasterze, patrz build_delta) ---
+    telem_copy.update(mission_progress.get(telem_copy.get("drone_id")))
+
+    telem_copy["online"] = (time.time() - d_data.get("last_seen", 0)) < 15
+    telem_copy["is_tracked"] = d_data.get("is_tracked", False)
+    return telem_copy
+
+def build_snapshot():
     all_drones_snapshot = []
-    current_keys = list(drones_db.keys())
-    
-    for d_id in current_keys:
-        d_data = drones_db[d_id]
+
+    for d_data in state.entries().values():
         if d_data.get("telemetry"):
-            telem_copy = d_data["telemetry"].copy()
-            
-            # --- ROLA ---
-            role = d_data.get("assigned_role", "None")
-            telem_copy["server_assigned_role"] = "brak" if role == "None" else role
-            
-            # --- MISJA / WAYPOINT ---
-            mission = d_data.get("current_mission")
-            target_wp = telem_copy.get("target_wp", 0)
-            
-            if mission:
-                # Logika wyświetlania
-                if target_wp == 999:
-                    wp_display = "KONIEC"
-                elif target_wp > 0:
-                    wp_display = str(target_wp)
-                else:
-                    wp_display = "-"
-                
-                telem_copy["mission_display"] = f"{mission['id']} / {wp_display}"
-            else:
-                telem_copy["mission_display"] = "brak"
-
-            telem_copy["online"] = (time.time() - d_data.get("last_seen", 0)) < 15
-            telem_copy["is_tracked"] = d_data.get("is_tracked", False)
-            all_drones_snapshot.append(telem_copy)
-    
-    socketio.emit('telemetry_update', all_drones_snapshot)
+            all_drones_snapshot.append(build_drone_view(d_data))
+    return all_drones_snapshot
+
+# --- Broadcaster (zbiorcze wysyłanie delt) ---
+# Ingest tylko oznacza drona jako "brudnego", a wysyłka do panelu odbywa się
+# raz na tick BROADCAST_HZ, niezależnie od liczby POST-ów w tym czasie.
+# Panel dostaje pełny stan z /api/init_state, a potem tylko zdarzenia
+# telemetry_delta ze zmienionymi polami i numerem sekwencyjnym klienta.
+# Klient może zasubskrybować viewport (bbox) i/lub listę dronów — wtedy
+# dostaje tylko drony z widoku (indeks siatkowy), a drony, które z niego
+# wyszły, w polu "removed".
+ONLINE_CHECK_INTERVAL = 1.0
+SPATIAL_CELL_DEG = 0.01
+
+# Brudne drony i numery sekwencyjne klientów trzyma backend stanu (wspólne
+# dla workerów); delty liczy i wysyła tylko worker z dzierżawą broadcastera.
+last_views = {}   # d_id -> ostatnio rozesłany widok drona
+spatial = GridIndex(SPATIAL_CELL_DEG)   # pozycje z last_views
+client_views = {}  # sid -> drony, które klient z subskrypcją już zna
+last_online_check = 0.0
+# CPA liczony w każdym ticku broadcastera; zdarzenie proximity_alert idzie
+# przy zmianie zbioru zagrożonych par, a póki trwają — co PROXIMITY_REFRESH s
+PROXIMITY_REFRESH = 1.0
+proximity = ProximityMonitor(PROXIMITY_DISTANCE_M, PROXIMITY_HORIZON_S)
+active_alerts = {}  # (drone_a, drone_b) -> alert
+last_alert_emit = 0.0
+
+def load_mission_waypoints(mission_id, version):
+    found = tpool.execute(mission_store.get, mission_id, version)
+    return found[1] if found else None
+
+# Pozostały dystans, prędkość, ETA i bateria na koniec misji — w widoku drona
+mission_progress = ProgressTracker(load_mission_waypoints)
+broadcast_stats = {
+    "updates_received": 0,  # wszystkie oznaczenia (telemetria, misje, ...)
+    "updates_merged": 0,    # oznaczenia, które nie wygenerowały osobnej wysyłki
+    "flushes": 0,           # wysłane zbiorcze telemetry_delta
+    "drones_flushed": 0,    # suma brudnych dronów we wszystkich wysyłkach
+    "fields_sent": 0,       # suma zmienionych pól we wszystkich deltach
+    "last_flush_ms": 0.0,
+    "proximity_pairs": 0,   # pary sprawdzone w ostatnim ticku (po hashu przestrzennym)
+    "proximity_ms": 0.0
+}
+
+def mark_online_changes():
+    # Status online zmienia się z upływem czasu, bez żadnego POST-a
+    now = time.time()
+    changed = []
+    for d_id, d_data in state.entries(list(last_views.keys())).items():
+        if last_views[d_id].get("online") != ((now - d_data.get("last_seen", 0)) < 15):
+            changed.append(d_id)
+    state.mark_dirty(changed)
+
+def build_delta(drone_ids):
+    changes = {}
+    for d_id, d_data in state.entries(drone_ids).items():
+        if not d_data.get("telemetry"):
+            continue
+        mission_progress.update(d_id, d_data)
+        view = build_drone_view(d_data)
+        prev = last_views.get(d_id)
+        if prev is None:
+            diff = view
+        else:
+            diff = {k: v for k, v in view.items() if prev.get(k) != v}
+        last_views[d_id] = view
+        if view.get("lat") is not None and view.get("lon") is not None:
+            spatial.update(d_id, view["lat"], view["lon"])
+            proximity.observe(d_id, view["lat"], view["lon"], d_data.get("last_seen", 0))
+        if diff:
+            changes[d_id] = diff
+    return changes
+
+def parse_subscription(data):
+    """{"bbox": [south, west, north, east], "ids": [...]} -> subskrypcja albo None (cała flota)."""
+    if not data:
+        return None
+    if not isinstance(data, dict):
+        raise ValueError("Subscription must be an object")
+    sub = {}
+    bbox = data.get("bbox")
+    if bbox is not None:
+        if not isinstance(bbox, (list, tuple)) or len(bbox) != 4:
+            raise ValueError("bbox must be [south, west, north, east]")
+        south, west, north, east = (float(v) for v in bbox)
+        if south > north:
+            raise ValueError("bbox south > north")
+        sub["bbox"] = [south, west, north, east]
+    ids = data.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+        sub["ids"] = [str(i) for i in ids]
+    return sub or None
+
+def subscription_ids(sub):
+    """Drony widoczne dla subskrypcji (spośród rozesłanych widoków)."""
+    visible = set()
+    if sub.get("bbox"):
+        visible = spatial.query_bbox(*sub["bbox"])
+    for d_id in sub.get("ids", ()):
+        if d_id in last_views:
+            visible.add(d_id)
+    return visible
+
+def in_subscription(view, sub):
+    if view["drone_id"] in sub.get("ids", ()):
+        return True
+    bbox = sub.get("bbox")
+    if not bbox or view.get("lat") is None or view.get("lon") is None:
+        return False
+    south, west, north, east = bbox
+    if not south <= view["lat"] <= north:
+        return False
+    if west <= east:
+        return west <= view["lon"] <= east
+    return view["lon"] >= west or view["lon"] <= east
+
+def client_delta(sid, sub, changes):
+    if sub is None:
+        return {"drones": changes} if changes else None
+
+    known = client_views.get(sid, set())
+    visible = subscription_ids(sub)
+    drones = {}
+    for d_id in visible:
+        if d_id not in known:
+            # Dron wszedł w widok — klient nie ma jego stanu, wysyłamy pełny widok
+            drones[d_id] = last_views[d_id]
+        elif d_id in changes:
+            drones[d_id] = changes[d_id]
+    removed = known - visible
+    client_views[sid] = visible
+
+    if not drones and not removed:
+        return None
+    msg = {"drones": drones}
+    if removed:
+        msg["removed"] = sorted(removed)
+    return msg
+
+def flush_updates():
+    global last_online_check
+    if not state.acquire_broadcaster(worker_id(), BROADCASTER_TTL_MS):
+        return 0
+    if time.time() - last_online_check >= ONLINE_CHECK_INTERVAL:
+        last_online_check = time.time()
+        mark_online_changes()
+
+    drone_ids = state.pop_dirty()
+    if drone_ids:
+        send_deltas(drone_ids)
+    check_proximity()
+    return len(drone_ids)
+
+def send_deltas(drone_ids):
+    t0 = time.perf_counter()
+    changes = build_delta(drone_ids)
+    subscriptions = state.client_subscriptions()
+    for sid in list(client_views):
+        if subscriptions.get(sid) is None:
+            del client_views[sid]
+
+    messages = {}
+    for sid, sub in subscriptions.items():
+        msg = client_delta(sid, sub, changes)
+        if msg:
+            messages[sid] = msg
+    for sid, seq in state.next_client_seqs(list(messages)).items():
+        msg = messages[sid]
+        socketio.emit('telemetry_delta', {"seq": seq, **msg}, to=sid)
+        broadcast_stats["fields_sent"] += sum(len(d) for d in msg["drones"].values())
+    broadcast_stats["flushes"] += 1
+    broadcast_stats["drones_flushed"] += len(drone_ids)
+    broadcast_stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+def check_proximity():
+    global active_alerts, last_alert_emit
+    t0 = time.perf_counter()
+    now = time.time()
+    alerts = proximity.check(now)
+    broadcast_stats["proximity_pairs"] = proximity.last_pairs
+    broadcast_stats["proximity_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    current = {tuple(al["drones"]): al for al in alerts}
+    changed = current.keys() != active_alerts.keys()
+    if not changed and not (current and now - last_alert_emit >= PROXIMITY_REFRESH):
+        return
+
+    cleared = [list(pair) for pair in active_alerts if pair not in current]
+    by_drone = alerts_by_drone(alerts)
+    state.set_alerts(by_drone)
+    socketio.emit('proximity_alert', {"alerts": alerts, "cleared": cleared})
+    affected = set(by_drone)
+    for pair in cleared:
+        affected.update(pair)
+    for d_id in affected:
+        socketio.emit('proximity_alert', {"alerts": by_drone.get(d_id, [])},
+                      to=d_id, namespace=DRONE_NAMESPACE)
+    active_alerts = current
+    last_alert_emit = now
+
+def broadcast_background():
+    interval = 1.0 / max(BROADCAST_HZ, 0.1)
+    while True:
+        t0 = time.time()
+        try:
+            flush_updates()
+        except Exception as e:
+            print(f"[ERROR] Błąd broadcastu: {e}")
+        socketio.sleep(max(0.0, interval - (time.time() - t0)))
+
+@socketio.on('connect')
+def on_client_connect():
+    state.add_client(request.sid)
+
+@socketio.on('disconnect')
+def on_client_disconnect(*args):
+    state.remove_client(request.sid)
+    client_views.pop(request.sid, None)
+
+@socketio.on('subscribe')
+def on_client_subscribe(data=None):
+    # Po potwierdzeniu klient pobiera /api/init_state — już przefiltrowany
+    try:
+        sub = parse_subscription(data)
+    except (ValueError, TypeError) as e:
+        return {"status": "ERROR", "error": str(e)}
+    state.set_subscription(request.sid, sub)
+    return {"status": "OK"}
 
 # --- Dekoratory ---
 def check_auth(username, password):
@@ -130,75 +460,351 @@ def index():
 
 # === NOWY ENDPOINT DLA FOLLOWERA (GET) ===
 # Bez tego Follower nie widzi Lidera!
+# --- Publiczny snapshot /api/drones ---
+# Lista telemetrii serializowana najwyżej raz na tick broadcastera (w każdym
+# workerze), niezależnie od liczby odpytujących dronów. Wersja to skrót treści,
+# więc jest taka sama na wszystkich workerach; If-None-Match albo since=<wersja>
+# dają 304 bez serializacji. /api/drones/<id> korzysta z tego samego snapshotu.
+public_snapshot = {"built": 0.0, "version": None, "body": b"[]", "telemetry": {}, "bodies": {}}
+
+def content_version(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def refresh_public_snapshot():
+    now = time.time()
+    if public_snapshot["version"] is not None and now - public_snapshot["built"] < 1.0 / BROADCAST_HZ:
+        return public_snapshot
+    entries = state.entries()
+    # Zwracamy tylko drony, które są "żywe" (mają telemetrię)
+    telemetry = {d_id: entries[d_id]["telemetry"] for d_id in sorted(entries) if entries[d_id].get("telemetry")}
+    body = json.dumps(list(telemetry.values()), sort_keys=True, separators=(",", ":")).encode()
+    version = content_version(body)
+    if version != public_snapshot["version"]:
+        public_snapshot.update(version=version, body=body, telemetry=telemetry, bodies={})
+    public_snapshot["built"] = now
+    return public_snapshot
+
+def cached_json(body, version):
+    if request.args.get("since") == version or version in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(version)
+    resp.headers["X-Snapshot-Version"] = version
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
 @app.route("/api/drones", methods=["GET"])
 def get_all_drones_public():
-    public_list = []
-    for d_id, data in drones_db.items():
-        # Zwracamy tylko drony, które są "żywe" (mają telemetrię)
-        if data.get("telemetry"):
-            public_list.append(data["telemetry"])
-    return jsonify(public_list), 200
+    snap = refresh_public_snapshot()
+    return cached_json(snap["body"], snap["version"])
 # ==========================================
 
+# Sąsiedzi z indeksu przestrzennego — follower/antykolizja nie pobiera całej floty
+NEAR_MAX_K = 1000
+
+@app.route("/api/drones/near", methods=["GET"])
+def get_drones_near():
+    try:
+        lat = float(request.args["lat"])
+        lon = float(request.args["lon"])
+        radius_m = request.args.get("radius_m", type=float)
+        k = request.args.get("k", type=int)
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon are required"}), 400
+    if radius_m is None and k is None:
+        return jsonify({"error": "radius_m or k is required"}), 400
+    if (radius_m is not None and radius_m <= 0) or (k is not None and not 0 < k <= NEAR_MAX_K):
+        return jsonify({"error": f"radius_m must be > 0, k in 1..{NEAR_MAX_K}"}), 400
+
+    hits = state.near(lat, lon, radius_m=radius_m, k=k)
+    entries = state.entries([d_id for d_id, _ in hits])
+    result = []
+    for d_id, dist in hits:
+        data = entries.get(d_id)
+        if data and data.get("telemetry"):
+            result.append(dict(data["telemetry"], distance_m=round(dist, 2)))
+    return jsonify(result), 200
+
+@app.route("/api/drones/<drone_id>", methods=["GET"])
+def get_drone_public(drone_id):
+    snap = refresh_public_snapshot()
+    cached = snap["bodies"].get(drone_id)
+    if cached is None:
+        telemetry = snap["telemetry"].get(drone_id)
+        if telemetry is None:
+            return jsonify({"error": "Not found"}), 404
+        body = json.dumps(telemetry, sort_keys=True, separators=(",", ":")).encode()
+        cached = snap["bodies"][drone_id] = (body, content_version(body))
+    return cached_json(*cached)
+
+@app.route("/api/drones/<drone_id>/track", methods=["GET"])
+@requires_auth
+def get_drone_track(drone_id):
+    # Okno czasowe w sekundach epoki (time.time()), domyślnie cała historia.
+    # mission_id zastępuje from/to oknem misji; method: lttb | rdp.
+    try:
+        t_from = float(request.args.get("from", 0))
+        t_to = float(request.args.get("to", time.time()))
+        max_points = int(request.args.get("max_points", TRACK_MAX_POINTS))
+    except ValueError:
+        return jsonify({"error": "Bad query params"}), 400
+    max_points = max(2, min(max_points, TRACK_MAX_POINTS))
+    method = request.args.get("method", "lttb")
+    if method not in track_lod.METHODS:
+        return jsonify({"error": "Unknown method"}), 400
+
+    mission_id = request.args.get("mission_id")
+    ended = None
+    if mission_id:
+        window = tpool.execute(history.mission_window, drone_id, mission_id)
+        if window is None:
+            return jsonify({"error": "Not found"}), 404
+        t_from, ended = window
+        t_to = ended if ended is not None else time.time()
+
+    if ended is not None:
+        # Zakończona misja się nie zmienia — piramida liczona raz
+        key = (drone_id, mission_id, method)
+        pyramid = lod_cache.get(key)
+        if pyramid is None:
+            rows = tpool.execute(history.query, drone_id, t_from, t_to)
+            pyramid = track_lod.TrackPyramid(rows, method)
+            lod_cache.put(key, pyramid)
+        total = pyramid.total
+        rows = pyramid.level(max_points)
+    else:
+        rows = tpool.execute(history.query, drone_id, t_from, t_to)
+        total = len(rows)
+        rows = track_lod.downsample(rows, max_points, method)
+
+    return jsonify({
+        "drone_id": drone_id,
+        "mission_id": mission_id,
+        "from": t_from,
+        "to": t_to,
+        "total": total,
+        "method": method,
+        "fields": list(HISTORY_FIELDS),
+        "points": rows
+    })
+
+def parse_telemetry(data, now):
+    # Zwraca (drone_id, czas_próbki, telemetria); ValueError przy błędnej próbce.
+    # Opcjonalne "ts" (sekundy epoki) pozwala przekaźnikowi wysłać próbki buforowane.
+    drone_id = data.get("drone_id")
+    if not drone_id:
+        raise ValueError("No drone_id")
+
+    # Bezpieczne parsowanie numeru WP
+    raw_wp = data.get("target_wp", 0)
+    try:
+        safe_wp = int(raw_wp)
+    except:
+        safe_wp = 0
+
+    sample_ts = float(data["ts"]) if data.get("ts") is not None else now
+
+    telemetry = {
+        "drone_id": drone_id,
+        "lat": data.get("lat"),
+        "lon": data.get("lon"),
+        "alt": data.get("alt", 0),
+        "battery": data.get("battery", 0),
+        "roll": data.get("roll", 0),
+        "pitch": data.get("pitch", 0),
+        "yaw": data.get("yaw", 0),
+        "target_wp": safe_wp,
+        "timestamp": datetime.utcfromtimestamp(sample_ts).isoformat() + "Z"
+    }
+    return drone_id, sample_ts, telemetry
+
+def read_telemetry_body(many=False):
+    # Dekodowanie wg Content-Type: JSON, binarny układ struct lub MessagePack
+    # (patrz telemetry_codec.py). ValueError = błędne dane, RuntimeError =
+    # kodowanie niedostępne w tej instalacji.
+    mimetype = request.mimetype
+    if mimetype == telemetry_codec.BINARY_MIMETYPE:
+        raw = request.get_data()
+        if many:
+            return telemetry_codec.decode_binary_many(raw)
+        return telemetry_codec.decode_binary(raw)
+    if mimetype in telemetry_codec.MSGPACK_MIMETYPES:
+        return telemetry_codec.decode_msgpack(request.get_data())
+    return request.get_json(silent=many)
+
+def record_history(drone_id, sample_ts, telemetry):
+    history_queue.append((
+        drone_id, sample_ts, telemetry["lat"], telemetry["lon"], telemetry["alt"],
+        telemetry["battery"], telemetry["roll"], telemetry["pitch"], telemetry["yaw"],
+        telemetry["target_wp"]
+    ))
+
+def drone_response(drone_id, entry):
+    resp = {
+        "role": entry["assigned_role"],
+        "mission": entry["current_mission"]
+    }
+    alerts = state.alerts_for(drone_id)
+    if alerts:
+        resp["alerts"] = alerts
+    form = entry.get("formation")
+    if form and form.get("leader"):
+        # Follower: punkt docelowy z ostatniej telemetrii lidera (None, dopóki lider nie ma pozycji)
+        leader = get_drone_entry(form["leader"])
+        resp["formation"] = formation.follower_target(
+            form["id"], form["leader"], leader["telemetry"], form["offset"]
+        ) if leader else None
+    return resp
+
 @app.route("/api/telemetry", methods=["POST"])
 @requires_drone_token
 def receive_telemetry():
     try:
-        data = request.get_json()
-        drone_id = data.get("drone_id")
-        
-        if not drone_id: 
-            return jsonify({"error": "No drone_id"}), 400
-        
-        entry = get_drone_entry(drone_id)
-        
-        # Bezpieczne parsowanie numeru WP
-        raw_wp = data.get("target_wp", 0)
         try:
-            safe_wp = int(raw_wp)
-        except:
-            safe_wp = 0
-
-        entry["telemetry"] = {
-            "drone_id": drone_id,
-            "lat": data.get("lat"),
-            "lon": data.get("lon"),
-            "alt": data.get("alt", 0),
-            "battery": data.get("battery", 0),
-            "roll": data.get("roll", 0),
-            "pitch": data.get("pitch", 0),
-            "yaw": data.get("yaw", 0),
-            "target_wp": safe_wp,
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
-        entry["last_seen"] = time.time()
-        
-        response_payload = {
-            "role": entry["assigned_role"],
-            "mission": entry["current_mission"]
-        }
+            data = read_telemetry_body()
+            if not isinstance(data, dict):
+                raise ValueError("Bad payload")
+            now = time.time()
+            drone_id, sample_ts, telemetry = parse_telemetry(data, now)
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 415
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        push_update_to_clients()
+        entry = update_drone(drone_id, {"telemetry": telemetry, "last_seen": now})
+        record_history(drone_id, sample_ts, telemetry)
 
-        return jsonify(response_payload), 200
+        return jsonify(drone_response(drone_id, entry)), 200
     except Exception as e:
         print(f"Błąd telemetrii: {e}")
         return jsonify({"error": "Internal Error"}), 500
 
+@app.route("/api/telemetry/batch", methods=["POST"])
+@requires_drone_token
+def receive_telemetry_batch():
+    # Wiele próbek (wiele dronów i/lub bufor jednego drona) w jednym żądaniu.
+    # Do historii trafia każda próbka, stan bieżący i dziennik — tylko
+    # najnowsza próbka każdego drona.
+    try:
+        try:
+            data = read_telemetry_body(many=True)
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 415
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        samples = data.get("samples") if isinstance(data, dict) else data
+        if not isinstance(samples, list):
+            return jsonify({"error": "No samples"}), 400
+        if len(samples) > TELEMETRY_BATCH_MAX:
+            return jsonify({"error": f"Max {TELEMETRY_BATCH_MAX} samples"}), 413
+
+        now = time.time()
+        latest = {}
+        rejected = []
+        for i, sample in enumerate(samples):
+            try:
+                if not isinstance(sample, dict):
+                    raise ValueError("Bad sample")
+                drone_id, sample_ts, telemetry = parse_telemetry(sample, now)
+            except (ValueError, TypeError) as e:
+                rejected.append({"index": i, "error": str(e)})
+                continue
+            record_history(drone_id, sample_ts, telemetry)
+            prev = latest.get(drone_id)
+            if prev is None or sample_ts >= prev[0]:
+                latest[drone_id] = (sample_ts, telemetry)
+
+        responses = {}
+        for drone_id, (_, telemetry) in latest.items():
+            entry = update_drone(drone_id, {"telemetry": telemetry, "last_seen": now})
+            responses[drone_id] = drone_response(drone_id, entry)
+
+        return jsonify({
+            "accepted": len(samples) - len(rejected),
+            "rejected": rejected,
+            "drones": responses
+        }), 200
+    except Exception as e:
+        print(f"Błąd telemetrii (batch): {e}")
+        return jsonify({"error": "Internal Error"}), 500
+
+# --- Łącze Socket.IO dla dronów (namespace /drone) ---
+# Token sprawdzany raz przy połączeniu, potem telemetria płynie zdarzeniami
+# 'telemetry', a zmiany misji/roli są wypychane od razu zdarzeniem 'command'
+# (ten sam format co odpowiedź /api/telemetry). Followerzy formacji dostają
+# zdarzenie 'formation' z nowym punktem docelowym przy każdej telemetrii lidera.
+drone_sessions = {}   # sid -> drone_id
+
+def push_command(drone_id, entry):
+    socketio.emit('command', drone_response(drone_id, entry), to=drone_id, namespace=DRONE_NAMESPACE)
+
+def push_formation_targets(leader_id, entry):
+    form = entry.get("formation")
+    if not form or not form.get("followers"):
+        return
+    for follower_id, offset in form["followers"].items():
+        target = formation.follower_target(form["id"], leader_id, entry["telemetry"], offset)
+        if target is not None:
+            socketio.emit('formation', target, to=follower_id, namespace=DRONE_NAMESPACE)
+
+@socketio.on('connect', namespace=DRONE_NAMESPACE)
+def on_drone_connect(auth=None):
+    auth = auth if isinstance(auth, dict) else {}
+    token = request.headers.get('X-Drone-Token') or auth.get('token')
+    drone_id = auth.get('drone_id') or request.args.get('drone_id')
+    if token != DRONE_API_KEY or not drone_id:
+        return False
+
+    drone_sessions[request.sid] = drone_id
+    join_room(drone_id)
+    entry = get_drone_entry(drone_id)
+    if entry is not None:
+        emit('command', drone_response(drone_id, entry))
+
+@socketio.on('disconnect', namespace=DRONE_NAMESPACE)
+def on_drone_disconnect(*args):
+    drone_sessions.pop(request.sid, None)
+
+@socketio.on('telemetry', namespace=DRONE_NAMESPACE)
+def on_drone_telemetry(data):
+    drone_id = drone_sessions.get(request.sid)
+    if not drone_id or not isinstance(data, dict):
+        return
+    data["drone_id"] = drone_id
+    now = time.time()
+    try:
+        drone_id, sample_ts, telemetry = parse_telemetry(data, now)
+    except (ValueError, TypeError) as e:
+        print(f"Błąd telemetrii ({drone_id}): {e}")
+        return
+    update_drone(drone_id, {"telemetry": telemetry, "last_seen": now})
+    record_history(drone_id, sample_ts, telemetry)
+
 @app.route("/api/init_state", methods=["GET"])
 @requires_auth
 def get_init_state():
-    push_update_to_clients()
-    return jsonify({"status": "ok"})
+    # Pełny stan + numer ostatniej delty wysłanej temu klientowi (sid z Socket.IO).
+    # Klient odrzuca delty z seq <= zwróconego i przy luce prosi o resync.
+    sid = request.args.get("sid")
+    seq = state.client_seq(sid) if sid else 0
+    drones = build_snapshot()
+    sub = state.client_subscriptions().get(sid) if sid else None
+    if sub is not None:
+        drones = [d for d in drones if in_subscription(d, sub)]
+        client_views[sid] = {d["drone_id"] for d in drones}
+    return jsonify({
+        "seq": seq,
+        "drones": drones
+    })
 
 @app.route("/api/drone/add", methods=["POST"])
 @requires_auth
 def add_drone():
     data = request.get_json()
     drone_id = data.get("drone_id")
-    if drone_id in drones_db:
-        drones_db[drone_id]["is_tracked"] = True
-        push_update_to_clients()
+    if get_drone_entry(drone_id) is not None:
+        update_drone(drone_id, {"is_tracked": True})
         return jsonify({"status": "ADDED"})
     return jsonify({"error": "Not found"}), 404
 
@@ -207,11 +813,14 @@ def add_drone():
 def delete_drone():
     data = request.get_json()
     drone_id = data.get("drone_id")
-    if drone_id in drones_db:
-        drones_db[drone_id]["is_tracked"] = False
-        drones_db[drone_id]["current_mission"] = None
-        drones_db[drone_id]["assigned_role"] = "None"
-        push_update_to_clients()
+    if get_drone_entry(drone_id) is not None:
+        update_drone(drone_id, {
+            "is_tracked": False,
+            "current_mission": None,
+            "assigned_role": "None"
+        })
+        leave_formation(drone_id)
+        tpool.execute(history.mission_ended, drone_id, time.time())
         return jsonify({"status": "UNTRACKED"})
     return jsonify({"error": "Not found"}), 404
 
@@ -220,19 +829,53 @@ def delete_drone():
 def upload_mission():
     data = request.get_json()
     drones_payload = data.get("drones", {})
-    
+
     for drone_id, mission_config in drones_payload.items():
-        entry = get_drone_entry(drone_id)
-        entry["is_tracked"] = True 
-        entry["current_mission"] = {
-            "id": mission_config.get("mission_id"),
-            "waypoints": mission_config.get("waypoints")
+        if not isinstance(mission_config.get("waypoints") or [], list):
+            return jsonify({"error": f"Bad waypoints for {drone_id}"}), 400
+
+    versions = {}
+    for drone_id, mission_config in drones_payload.items():
+        waypoints = mission_config.get("waypoints") or []
+        now = time.time()
+        mission_id = str(mission_config.get("mission_id") or f"{drone_id}_{int(now * 1000)}")
+        # Punkty raz w tabeli misji; wpis drona (i odpowiedź na telemetrię) niesie tylko id + wersję
+        version = tpool.execute(mission_store.put, mission_id, waypoints, now)
+        fields = {
+            "is_tracked": True,
+            "current_mission": {"id": mission_id, "version": version}
         }
         if "role" in mission_config: 
-            entry["assigned_role"] = mission_config["role"]
-    
-    push_update_to_clients()
-    return jsonify({"status": "STORED"})
+            fields["assigned_role"] = mission_config["role"]
+        update_drone(drone_id, fields)
+        tpool.execute(history.mission_started, drone_id, mission_id, now)
+        versions[drone_id] = fields["current_mission"]
+
+    return jsonify({"status": "STORED", "missions": versions})
+
+@app.route("/api/mission/<mission_id>", methods=["GET"])
+@requires_drone_token
+def get_mission(mission_id):
+    # Punkty misji w wersji `version` (domyślnie najnowszej). Z since_version=
+    # zwracana jest tylko różnica względem wersji, którą dron już ma.
+    try:
+        version = request.args.get("version", type=int)
+        since = request.args.get("since_version", type=int)
+        found = tpool.execute(mission_store.get, mission_id, version)
+        if found is None:
+            return jsonify({"error": "Mission not found"}), 404
+        version, waypoints = found
+        resp = {"id": mission_id, "version": version}
+        old = tpool.execute(mission_store.get, mission_id, since) if since is not None else None
+        if old is not None:
+            resp["since_version"] = since
+            resp["diff"] = tpool.execute(missions.diff, old[1], waypoints)
+        else:
+            resp["waypoints"] = waypoints
+        return jsonify(resp)
+    except Exception as e:
+        print(f"[ERROR] Błąd odczytu misji {mission_id}: {e}")
+        return jsonify({"error": "Internal Error"}), 500
 
 @app.route("/api/mission/stop", methods=["POST"])
 @requires_auth
@@ -240,22 +883,227 @@ def stop_mission():
     data = request.get_json()
     target_drones = data.get("drones", [])
     
+    known_drones = set(state.ids())
     if not target_drones: 
-        target_drones = list(drones_db.keys())
+        target_drones = list(known_drones)
         
     for drone_id in target_drones:
-        if drone_id in drones_db:
-            entry = drones_db[drone_id]
-            entry["current_mission"] = None
-            entry["assigned_role"] = "None"
+        if drone_id in known_drones:
+            update_drone(drone_id, {"current_mission": None, "assigned_role": "None"})
+            tpool.execute(history.mission_ended, drone_id, time.time())
     
-    push_update_to_clients()
     return jsonify({"status": "STOPPED"})
 
+def leave_formation(drone_id):
+    # Follower wypada z formacji lidera; lider rozwiązuje całą swoją formację
+    entry = get_drone_entry(drone_id)
+    form = entry.get("formation") if entry else None
+    if not form:
+        return
+    if form.get("leader"):
+        leader = get_drone_entry(form["leader"])
+        lead_form = leader.get("formation") if leader else None
+        if lead_form and lead_form.get("id") == form["id"] and drone_id in lead_form.get("followers", {}):
+            followers = {k: v for k, v in lead_form["followers"].items() if k != drone_id}
+            update_drone(form["leader"], {
+                "formation": {"id": lead_form["id"], "followers": followers} if followers else None
+            })
+    else:
+        for follower_id in form.get("followers", {}):
+            follower = get_drone_entry(follower_id)
+            f_form = follower.get("formation") if follower else None
+            if f_form and f_form.get("leader") == drone_id:
+                update_drone(follower_id, {"formation": None})
+    update_drone(drone_id, {"formation": None})
+
+@app.route("/api/formation", methods=["GET"])
+@requires_auth
+def get_formations():
+    formations = []
+    for drone_id, entry in state.entries().items():
+        form = entry.get("formation")
+        if form and "followers" in form:
+            formations.append({"id": form["id"], "leader": drone_id, "followers": form["followers"]})
+    return jsonify({"formations": formations})
+
+@app.route("/api/formation", methods=["POST"])
+@requires_auth
+def set_formation():
+    # {"formation_id"?, "leader": id, "followers": {id: [naprzód_m, w_lewo_m]}} — patrz formation.py
+    try:
+        formation_id, leader_id, followers = formation.parse_formation(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Drony zmieniające formację najpierw opuszczają poprzednią
+    for drone_id in [leader_id, *followers]:
+        leave_formation(drone_id)
+    update_drone(leader_id, {
+        "is_tracked": True,
+        "formation": {"id": formation_id, "followers": followers}
+    })
+    for follower_id, offset in followers.items():
+        update_drone(follower_id, {
+            "is_tracked": True,
+            "formation": {"id": formation_id, "leader": leader_id, "offset": offset}
+        })
+    return jsonify({
+        "status": "FORMED",
+        "formation": {"id": formation_id, "leader": leader_id, "followers": followers}
+    })
+
+@app.route("/api/formation/stop", methods=["POST"])
+@requires_auth
+def stop_formation():
+    # "drones": lista ID (lider rozwiązuje formację, follower z niej wypada); pusta = wszystkie
+    data = request.get_json() or {}
+    target_drones = data.get("drones", [])
+    if not target_drones:
+        target_drones = [d_id for d_id, e in state.entries().items() if e.get("formation")]
+    for drone_id in target_drones:
+        leave_formation(drone_id)
+    return jsonify({"status": "DISSOLVED"})
+
+def parse_plan_drones(data):
+    # "drones": lista ID albo liczba dronów (klucze "1".."n")
+    drones = data.get("drones", 1)
+    if isinstance(drones, int) and not isinstance(drones, bool):
+        drone_ids = [str(k + 1) for k in range(drones)]
+    elif isinstance(drones, list):
+        drone_ids = [str(d) for d in drones]
+    else:
+        raise ValueError("drones must be a list of ids or a count")
+    if not 0 < len(drone_ids) <= PLAN_MAX_DRONES:
+        raise ValueError(f"1..{PLAN_MAX_DRONES} drones")
+    return drone_ids
+
+@app.route("/api/plan/lawnmower", methods=["POST"])
+@requires_auth
+def plan_lawnmower():
+    # Trasa pokrycia obszaru; odpowiedź "drones" ma format jak w /api/mission/upload
+    data = request.get_json(silent=True) or {}
+    try:
+        drone_ids = parse_plan_drones(data)
+        plans, rows = tpool.execute(
+            planner.plan_lawnmower,
+            data.get("polygon") or [],
+            float(data.get("spacing_m", 10)),
+            float(data.get("angle_deg", 0)),
+            data.get("holes") or [],
+            len(drone_ids)
+        )
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "rows": rows,
+        "length_m": round(sum(length for _, length in plans), 1),
+        "drones": {
+            drone_id: {"waypoints": waypoints, "length_m": round(length, 1)}
+            for drone_id, (waypoints, length) in zip(drone_ids, plans)
+        }
+    })
+
+def partition_weights(drone_ids):
+    # Waga = bateria [%] z telemetrii (drony bez telemetrii: pełna bateria, start ze środka obszaru)
+    entries = state.entries(drone_ids)
+    drones = []
+    for drone_id in drone_ids:
+        telemetry = (entries.get(drone_id) or {}).get("telemetry") or {}
+        battery = telemetry.get("battery")
+        weight = max(float(battery), PARTITION_MIN_BATTERY) if battery is not None else 100.0
+        pos = telemetry_position({"telemetry": telemetry})
+        drones.append((drone_id, weight, list(pos) if pos else None))
+    return drones
+
+@app.route("/api/plan/partition", methods=["POST"])
+@requires_auth
+def plan_partition():
+    # Podział obszaru między drony (pola ~ bateria, przydział wg pozycji) + trasa pokrycia każdej części
+    data = request.get_json(silent=True) or {}
+    try:
+        drone_ids = parse_plan_drones(data)
+        drones = partition_weights(drone_ids)
+        plans = tpool.execute(
+            planner.plan_partition,
+            data.get("polygon") or [],
+            drones,
+            float(data.get("spacing_m", 10)),
+            float(data.get("angle_deg", 0)),
+            data.get("holes") or []
+        )
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    weights = {drone_id: weight for drone_id, weight, _ in drones}
+    return jsonify({
+        "length_m": round(sum(p["length_m"] for p in plans.values()), 1),
+        "drones": {
+            drone_id: {
+                "waypoints": p["waypoints"],
+                "length_m": round(p["length_m"], 1),
+                "area_m2": round(p["area_m2"], 1),
+                "weight": weights[drone_id]
+            }
+            for drone_id, p in plans.items()
+        }
+    })
+
+@app.route("/api/plan/optimize", methods=["POST"])
+@requires_auth
+def plan_optimize():
+    # Kolejność punktów misji (NN + 2-opt/Or-opt); z "drone_id" trasa zaczyna się od pozycji drona
+    data = request.get_json(silent=True) or {}
+    start = None
+    drone_id = data.get("drone_id")
+    if drone_id is not None:
+        entry = get_drone_entry(str(drone_id))
+        if entry is None:
+            return jsonify({"error": "Drone not found"}), 404
+        start = telemetry_position(entry)
+        if start is None:
+            return jsonify({"error": "Drone has no position"}), 400
+    try:
+        time_limit = min(max(float(data.get("time_limit_s", 1.0)), 0.0), OPTIMIZE_MAX_TIME_S)
+        waypoints = data.get("waypoints") or []
+        result = tpool.execute(route_opt.optimize_route, waypoints, start, time_limit)
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    saved = result["original_length_m"] - result["length_m"]
+    return jsonify({
+        "waypoints": [waypoints[k] for k in result["order"]],
+        "order": result["order"],
+        "start": list(start) if start else None,
+        "length_m": round(result["length_m"], 1),
+        "original_length_m": round(result["original_length_m"], 1),
+        "saved_m": round(saved, 1),
+        "saved_pct": round(100.0 * saved / result["original_length_m"], 1) if result["original_length_m"] > 0 else 0.0
+    })
+
+@app.route("/api/broadcast/stats", methods=["GET"])
+@requires_auth
+def get_broadcast_stats():
+    stats = dict(broadcast_stats)
+    stats["broadcast_hz"] = BROADCAST_HZ
+    stats["pending"] = state.dirty_count()
+    stats["proximity_alerts"] = len(active_alerts)
+    stats["state_backend"] = STATE_BACKEND
+    stats["worker"] = worker_id()
+    return jsonify(stats)
+
 if __name__ == "__main__":
+    mission_store.init()
     load_db()
+    migrate_missions()
+    history.init()
     socketio.start_background_task(save_db_background)
+    socketio.start_background_task(broadcast_background)
     socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
 else:
+    mission_store.init()
     load_db()
-    socketio.start_background_task(save_db_background)
\ No newline at end of file
+    migrate_missions()
+    history.init()
+    socketio.start_background_task(save_db_background)
+    socketio.start_background_task(broadcast_background)
\ No newline at end of file
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+bench_codec.py — bajty na próbkę oraz czas kodowania/parsowania telemetrii:
+JSON vs układ binarny (struct) vs MessagePack.
+
+  python benchmarks/bench_codec.py --samples 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import telemetry_codec
+
+
+def make_samples(n):
+    return [{
+        "drone_id": f"skimmer{i % 50}",
+        "lat": 52.2297 + random.uniform(-0.01, 0.01),
+        "lon": 21.0122 + random.uniform(-0.01, 0.01),
+        "alt": 10.0,
+        "battery": round(random.uniform(20, 100), 1),
+        "roll": round(random.uniform(-5, 5), 2),
+        "pitch": round(random.uniform(-5, 5), 2),
+        "yaw": round(random.uniform(-180, 180), 2),
+        "target_wp": random.randint(0, 200)
+    } for i in range(n)]
+
+
+def bench(name, encode, decode, samples):
+    t0 = time.perf_counter()
+    blobs = [encode(s) for s in samples]
+    t_enc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for b in blobs:
+        decode(b)
+    t_dec = time.perf_counter() - t0
+    n = len(samples)
+    size = sum(len(b) for b in blobs) / n
+    print(f"{name:<8} {size:7.1f} B/próbkę   kodowanie {t_enc / n * 1e6:6.2f} us   parsowanie {t_dec / n * 1e6:6.2f} us"
+          f"   (57600 bd: {57600 / 10 / size:6.0f} próbek/s)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark kodowań telemetrii")
+    p.add_argument("--samples", type=int, default=100000)
+    args = p.parse_args()
+
+    samples = make_samples(args.samples)
+    bench("json", lambda s: json.dumps(s).encode("utf-8"), json.loads, samples)
+    bench("binary", telemetry_codec.encode_binary, telemetry_codec.decode_binary, samples)
+    if telemetry_codec.msgpack is not None:
+        bench("msgpack", telemetry_codec.msgpack.packb, telemetry_codec.decode_msgpack, samples)
+    else:
+        print("msgpack  (pominięto — brak pakietu 'msgpack')")
+
+
+if __name__ == "__main__":
+    main()
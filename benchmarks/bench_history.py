@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+bench_history.py — przepustowość zapisu i czas zapytań historii telemetrii.
+
+  python benchmarks/bench_history.py --drones 50 --seconds 600 --batch 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from history import TelemetryHistory
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark TelemetryHistory (SQLite WAL)")
+    p.add_argument("--drones", type=int, default=50)
+    p.add_argument("--seconds", type=int, default=600, help="Symulowany czas misji (s), 10 Hz na drona")
+    p.add_argument("--batch", type=int, default=500, help="Próbek na transakcję")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hist = TelemetryHistory(os.path.join(tmp, "bench.db"))
+        hist.init()
+
+        t0_sim = 1_700_000_000.0
+        rows = []
+        for step in range(args.seconds * 10):
+            ts = t0_sim + step * 0.1
+            for d in range(args.drones):
+                rows.append((f"d{d}", ts, 52.0 + random.random() * 1e-3, 21.0 + random.random() * 1e-3,
+                             10.0, 90.0, 0.0, 0.0, random.uniform(0, 360), 1))
+
+        t0 = time.perf_counter()
+        for i in range(0, len(rows), args.batch):
+            hist.insert_batch(rows[i:i + args.batch])
+        dt = time.perf_counter() - t0
+        print(f"Zapis: {len(rows)} próbek w {dt:.2f} s -> {len(rows) / dt:,.0f} próbek/s (partia {args.batch})")
+
+        for window in (10, 60, 600):
+            t_to = t0_sim + args.seconds
+            t0 = time.perf_counter()
+            res = hist.query("d0", t_to - window, t_to)
+            dq = (time.perf_counter() - t0) * 1000.0
+            print(f"Zapytanie okna {window:>4d} s: {len(res):>5d} próbek, {dq:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+bench_lidar_sectors.py — koszt wyznaczenia minimów sektorów lidaru na krok
+sterowania: dotychczasowe listy składane z heron_test.py (finite_min na
+wycinkach listy) vs lidar_sectors.SectorLayout (dwa np.fmin.reduceat na
+buforze), dla skanów 512–4096 wiązek z inf (brak odbicia) i NaN.
+
+Wejście "lista" to wynik getRangeImage(), "float32" — bufor z
+getRangeImage(data_type="buffer"). Przed pomiarem wyniki obu metod są
+porównywane.
+
+  python benchmarks/bench_lidar_sectors.py --beams 512 1024 2048 4096
+"""
+
+import argparse
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                "Simulations", "Colision Avoidance", "controllers", "heron_test"))
+
+from lidar_sectors import SectorLayout
+
+EDGE_W_FRAC = 0.10
+
+
+def sectors_lists(ranges):
+    # Kopia obliczeń z autopilot_step (heron_test.py) przed zmianą
+    n = len(ranges)
+    mid = n // 2
+
+    def finite_min(seq):
+        vals = [v for v in seq if (v is not None) and (not math.isinf(v)) and (not math.isnan(v))]
+        return min(vals) if vals else float("inf")
+
+    front_w = max(5, int(0.10 * n))
+    front_min = finite_min(ranges[max(0, mid - front_w): min(n, mid + front_w + 1)])
+    left_min = finite_min(ranges[int(0.28 * n):int(0.46 * n)])
+    right_min = finite_min(ranges[int(0.54 * n):int(0.72 * n)])
+    edge_w = max(3, int(EDGE_W_FRAC * n))
+    left_edge_min = finite_min(ranges[0:edge_w])
+    right_edge_min = finite_min(ranges[n - edge_w:n])
+    return front_min, left_min, right_min, left_edge_min, right_edge_min
+
+
+def make_scan(rng, n):
+    ranges = rng.uniform(0.5, 30.0, n)
+    ranges[rng.random(n) < 0.3] = np.inf
+    ranges[rng.random(n) < 0.01] = np.nan
+    return ranges.astype(np.float32)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark minimów sektorów lidaru")
+    p.add_argument("--beams", type=int, nargs="+", default=[512, 1024, 2048, 4096])
+    p.add_argument("--number", type=int, default=2000, help="Kroków na pomiar")
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'wiązki':>7} {'listy [µs]':>11} {'NumPy z listy [µs]':>19} {'NumPy float32 [µs]':>19} {'przysp.':>8}")
+    for n in args.beams:
+        scan32 = make_scan(rng, n)
+        scan_list = scan32.tolist()
+        layout = SectorLayout(n, EDGE_W_FRAC)
+
+        expected = sectors_lists(scan_list)
+        for got in (layout.reduce(scan_list), layout.reduce(scan32)):
+            assert np.allclose(got, expected), (n, got, expected)
+
+        t_lists = min(timeit.repeat(lambda: sectors_lists(scan_list), number=args.number, repeat=3))
+        t_np_list = min(timeit.repeat(lambda: layout.reduce(scan_list), number=args.number, repeat=3))
+        t_np_buf = min(timeit.repeat(lambda: layout.reduce(scan32), number=args.number, repeat=3))
+        us = 1e6 / args.number
+        print(f"{n:7d} {t_lists * us:11.1f} {t_np_list * us:19.1f} {t_np_buf * us:19.1f} "
+              f"{t_lists / t_np_buf:7.0f}×")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+bench_partition.py — podział obszaru między drony (planner.partition_area)
+i trasy pokrycia części (planner.plan_partition) dla wielokątów z tysiącami
+wierzchołków.
+
+Wielokąt to "gwiazda" z zaszumionym promieniem (linia brzegowa z zatokami),
+drony dostają losowe baterie i pozycje. Wynik: czas podziału, czas całego
+planu i największy względny błąd pola części względem wag.
+
+  python benchmarks/bench_partition.py --vertices 1000 5000 20000 --drones 12
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import planner
+
+
+def star_polygon(rng, n_vertices, radius_m, lat0, lon0):
+    th = np.linspace(0.0, 2.0 * np.pi, n_vertices, endpoint=False)
+    r = radius_m * (1.0 + 0.3 * np.sin(7 * th) + 0.05 * rng.random(n_vertices))
+    frame = planner.LocalFrame(lat0, lon0)
+    return frame.to_latlon(np.column_stack((r * np.cos(th), r * np.sin(th)))).tolist()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark podziału obszaru między drony")
+    p.add_argument("--vertices", type=int, nargs="+", default=[1000, 5000, 20000])
+    p.add_argument("--drones", type=int, default=12)
+    p.add_argument("--radius-m", type=float, default=3000.0, help="Średni promień obszaru (m)")
+    p.add_argument("--spacing-m", type=float, default=25.0)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat0, lon0 = 54.5, 18.6
+    frame = planner.LocalFrame(lat0, lon0)
+    print(f"Drony: {args.drones}, promień {args.radius_m:.0f} m, odstęp rzędów {args.spacing_m:.0f} m")
+    for n_vertices in args.vertices:
+        polygon = star_polygon(rng, n_vertices, args.radius_m, lat0, lon0)
+        drones = []
+        for k in range(args.drones):
+            pos = frame.to_latlon(rng.uniform(-args.radius_m, args.radius_m, 2))[0].tolist()
+            drones.append((str(k + 1), float(rng.uniform(20, 100)), pos))
+
+        part_ms, plan_ms = [], []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            parts = planner.partition_area(polygon, drones)
+            part_ms.append((time.perf_counter() - t0) * 1000.0)
+            t0 = time.perf_counter()
+            plans = planner.plan_partition(polygon, drones, args.spacing_m)
+            plan_ms.append((time.perf_counter() - t0) * 1000.0)
+
+        areas = np.array([parts[d[0]][2] for d in drones])
+        weights = np.array([d[1] for d in drones])
+        share = weights / weights.sum()
+        err = float(np.max(np.abs(areas / areas.sum() - share) / share))
+        length_km = sum(pl["length_m"] for pl in plans.values()) / 1000.0
+        print(f"{n_vertices:6d} wierzchołków: podział {min(part_ms):7.1f} ms, "
+              f"podział + trasy {min(plan_ms):8.1f} ms, błąd pól {100 * err:.2e}%, "
+              f"pole {areas.sum() / 1e6:.1f} km², trasy {length_km:.0f} km")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
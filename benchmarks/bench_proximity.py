@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+bench_proximity.py — koszt ticku monitora zbliżeń (ProximityMonitor) dla floty.
+
+Drony poruszają się ze stałymi prędkościami po kwadracie --area-m; w każdym
+ticku (--hz) każdy dron zgłasza pozycję, a potem liczony jest CPA dla par
+kandydatów. Wynik: czas ticku vs budżet 1/hz na jednym rdzeniu.
+
+  python benchmarks/bench_proximity.py --drones 500 --hz 10 --seconds 30
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from proximity import ProximityMonitor, M_PER_DEG
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark ProximityMonitor (CPA + hash przestrzenny)")
+    p.add_argument("--drones", type=int, default=500)
+    p.add_argument("--hz", type=float, default=10.0)
+    p.add_argument("--seconds", type=float, default=30.0, help="Symulowany czas")
+    p.add_argument("--area-m", type=float, default=5000.0, help="Bok kwadratu, po którym latają drony (m)")
+    p.add_argument("--max-speed", type=float, default=15.0)
+    args = p.parse_args()
+
+    random.seed(0)
+    lat0, lon0 = 52.23, 21.0
+    cos0 = math.cos(math.radians(lat0))
+    fleet = []
+    for i in range(args.drones):
+        heading = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(0, args.max_speed)
+        fleet.append([random.uniform(0, args.area_m), random.uniform(0, args.area_m),
+                      speed * math.cos(heading), speed * math.sin(heading)])
+
+    monitor = ProximityMonitor(alert_distance_m=10.0, horizon_s=10.0)
+    dt = 1.0 / args.hz
+    ticks = int(args.seconds * args.hz)
+    t_sim = 1_700_000_000.0
+    tick_ms, pairs, alerts = [], [], []
+
+    for _ in range(ticks):
+        t_sim += dt
+        t0 = time.perf_counter()
+        for i, d in enumerate(fleet):
+            d[0] = (d[0] + d[2] * dt) % args.area_m
+            d[1] = (d[1] + d[3] * dt) % args.area_m
+            monitor.observe(i, lat0 + d[1] / M_PER_DEG, lon0 + d[0] / (M_PER_DEG * cos0), t_sim)
+        found = monitor.check(t_sim)
+        tick_ms.append((time.perf_counter() - t0) * 1000.0)
+        pairs.append(monitor.last_pairs)
+        alerts.append(len(found))
+
+    tick_ms.sort()
+    budget = 1000.0 / args.hz
+    mean = sum(tick_ms) / len(tick_ms)
+    all_pairs = args.drones * (args.drones - 1) // 2
+    print(f"Drony: {args.drones}, {args.hz:.0f} Hz, {ticks} ticków, obszar {args.area_m:.0f} m")
+    print(f"Tick (observe + CPA): średnio {mean:.2f} ms, p99 {tick_ms[int(0.99 * (len(tick_ms) - 1))]:.2f} ms, "
+          f"max {tick_ms[-1]:.2f} ms  (budżet {budget:.0f} ms, {100 * mean / budget:.1f}% rdzenia)")
+    print(f"Pary sprawdzane: średnio {sum(pairs) / len(pairs):.0f} z {all_pairs} możliwych "
+          f"({100.0 * sum(pairs) / len(pairs) / all_pairs:.1f}%)")
+    print(f"Alerty na tick: średnio {sum(alerts) / len(alerts):.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+bench_workers.py — skalowanie przyjmowania telemetrii z liczbą workerów gunicorna.
+
+Dla każdej liczby workerów uruchamia gunicorn (eventlet) ze STATE_BACKEND=redis
+i kolejką Socket.IO, a następnie zasypuje /api/telemetry z kilku procesów
+klienckich przez zadany czas. Bez --redis-url używany jest lokalny zastępnik
+Redisa (fakeredis.TcpFakeServer) — liczby są wtedy zaniżone przez sam
+zastępnik, ale proporcje między 1 a N workerami pozostają czytelne.
+
+  python benchmarks/bench_workers.py --workers 1 2 4 --clients 8 --seconds 10
+  python benchmarks/bench_workers.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TOKEN = "bench-token"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_redis():
+    from fakeredis import TcpFakeServer
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://127.0.0.1:{port}/0"
+
+
+def flush_redis(url):
+    import redis
+    redis.Redis.from_url(url).flushdb()
+
+
+def wait_ready(base, timeout=20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(base + "/api/drones", timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def client_worker(args):
+    base, client_idx, drones, seconds = args
+    session = requests.Session()
+    headers = {"X-Drone-Token": TOKEN}
+    rng = random.Random(client_idx)
+    ok = errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        payload = {
+            "drone_id": f"c{client_idx}-d{rng.randrange(drones)}",
+            "lat": 52.0 + rng.random() * 1e-3,
+            "lon": 21.0 + rng.random() * 1e-3,
+            "battery": 90.0,
+            "yaw": rng.uniform(0, 360)
+        }
+        try:
+            r = session.post(base + "/api/telemetry", json=payload, headers=headers, timeout=5)
+            if r.status_code == 200:
+                ok += 1
+            else:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+    return ok, errors
+
+
+def run(workers, redis_url, args):
+    flush_redis(redis_url)
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               STATE_BACKEND="redis",
+               REDIS_URL=redis_url,
+               SOCKETIO_MESSAGE_QUEUE=redis_url,
+               DRONE_API_KEY=TOKEN)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen(
+            ["gunicorn", "--worker-class", args.worker_class, "-w", str(workers),
+             "--bind", f"127.0.0.1:{port}", "--pythonpath", os.path.abspath(REPO),
+             "--log-level", "warning", "app:app"],
+            cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+        )
+        try:
+            if not wait_ready(base):
+                raise RuntimeError(f"Serwer z {workers} workerami nie wystartował")
+            jobs = [(base, i, args.drones, args.seconds) for i in range(args.clients)]
+            t0 = time.perf_counter()
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.map(client_worker, jobs)
+            elapsed = time.perf_counter() - t0
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return ok / elapsed, errors
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark skalowania /api/telemetry z liczbą workerów")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--clients", type=int, default=8, help="Procesy klienckie generujące ruch")
+    p.add_argument("--drones", type=int, default=25, help="Dronów na klienta")
+    p.add_argument("--seconds", type=float, default=10.0)
+    p.add_argument("--redis-url", default=None, help="Prawdziwy Redis (domyślnie lokalny zastępnik)")
+    p.add_argument("--worker-class", default="eventlet", help="Klasa workera gunicorna (jak w Dockerfile)")
+    args = p.parse_args()
+
+    fake = None
+    redis_url = args.redis_url
+    if redis_url is None:
+        fake, redis_url = start_fake_redis()
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+    baseline = None
+    try:
+        for w in args.workers:
+            rate, errors = run(w, redis_url, args)
+            baseline = baseline or rate
+            print(f"{w:>8} {rate:>10.0f} {rate / baseline:>7.2f}x {errors:>7}")
+    finally:
+        if fake is not None:
+            fake.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+controller_sweep.py — przegląd nastaw AdaptiveFuzzyController na siatce parametrów.
+
+Każda kombinacja (K_PSI, K_Z, ETA, num_rules, width) przepływa zestaw tras
+referencyjnych. Przebiegi liczy fleet_sim.Fleet: jedna łódź na parę
+(nastawa, trasa), z nastawami per łódź, więc paczka kilkuset konfiguracji
+to jeden wektorowy przebieg PhysicsModel. Paczki (grupowane po num_rules —
+liczba reguł wyznacza kształt wag) rozdzielane są na procesy
+(ProcessPoolExecutor).
+
+Miary na konfigurację (średnio po trasach):
+  * xte_rms / xte_max — błąd poprzeczny względem bieżącego odcinka trasy [m],
+  * settle_s — czas od początku odcinka (zaliczenia punktu), po którym błąd
+    poprzeczny zostaje już poniżej SETTLE_XTE_M do końca odcinka,
+  * energy_kj — praca napędu ∫(|Fx·u| + |Tz·r|) dt,
+  * time_s — czas przepłynięcia trasy (None, gdy nie wszystkie ukończone).
+
+  python controller_sweep.py --k-psi 1.5 2.5 3.5 --k-z 15 25 35 --eta 2 5 \\
+    --num-rules 7 11 --width 1 2 --workers 4 --csv sweep.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import fleet_sim
+
+# Próg błędu poprzecznego uznawany za "na trasie" [m]
+SETTLE_XTE_M = 1.0
+# Maksymalny czas przebiegu jednej trasy [s]
+MAX_TIME_S = 600.0
+# Trasy referencyjne: punkty w metrach od startu (łódź startuje w (0, 0) z kursem na wschód)
+REFERENCE_MISSIONS = {
+    "square": [[100, 0], [100, 100], [0, 100], [0, 0]],
+    "lawnmower": [[150, 0], [150, 25], [0, 25], [0, 50], [150, 50], [150, 75], [0, 75]],
+    "hairpin": [[80, 0], [80, 10], [-40, 10], [-40, -60]],
+    "zigzag": [[40, 30], [80, -30], [120, 30], [160, -30], [200, 30]],
+}
+COLUMNS = ["k_psi", "k_z", "eta", "num_rules", "width",
+           "xte_rms", "xte_max", "settle_s", "energy_kj", "time_s", "done"]
+
+
+def segment_xte(px, py, ax, ay, bx, by):
+    """Odległość punktu od prostej odcinka a->b (dla zdegenerowanego odcinka — od b)."""
+    dx, dy = bx - ax, by - ay
+    length = np.hypot(dx, dy)
+    cross = np.abs(dx * (py - ay) - dy * (px - ax))
+    return np.where(length > 1e-9, cross / np.maximum(length, 1e-9), np.hypot(px - bx, py - by))
+
+
+def rollout(num_rules, configs, missions, dt=0.1, max_time=MAX_TIME_S):
+    """
+    configs: lista (k_psi, k_z, eta, width); missions: lista tras (punkty xy).
+    Zwraca tablice (konfiguracja × trasa): xte_rms, xte_max, settle_s, energy_kj, time_s.
+    """
+    C, M = len(configs), len(missions)
+    n = C * M
+    cfg = np.repeat(np.asarray(configs, dtype=float), M, axis=0)
+    fleet = fleet_sim.Fleet(n, k_psi=cfg[:, 0], k_z=cfg[:, 1], eta=cfg[:, 2], width=cfg[:, 3],
+                            num_rules=num_rules)
+    for k in range(n):
+        fleet.set_path(k, missions[k % M], resume=False)
+    # Początek pierwszego odcinka = pozycja startowa
+    paths = np.concatenate((np.zeros((n, 1, 2)), fleet.paths), axis=1)
+    rows = np.arange(n)
+
+    sq_sum = np.zeros(n)
+    xte_max = np.zeros(n)
+    samples = np.zeros(n)
+    energy = np.zeros(n)
+    settle_sum = np.zeros(n)
+    leg_start = np.zeros(n)
+    # Ostatnia chwila na bieżącym odcinku z błędem >= SETTLE_XTE_M
+    last_out = np.zeros(n)
+    prev_wp = fleet.wp.copy()
+    done_at = np.full(n, np.nan)
+
+    for i in range(int(round(max_time / dt))):
+        fleet.step(dt)
+        t = (i + 1) * dt
+        physics = fleet.physics
+        energy += (np.abs(fleet.fx * physics.u) + np.abs(fleet.tz * physics.r)) * dt
+
+        # Zaliczony punkt zamyka odcinek
+        switched = fleet.wp != prev_wp
+        if switched.any():
+            settle_sum[switched] += last_out[switched] - leg_start[switched]
+            leg_start[switched] = t
+            last_out[switched] = t
+            prev_wp = fleet.wp.copy()
+
+        active = fleet.status == fleet_sim.ACTIVE
+        just_done = (fleet.status == fleet_sim.DONE) & np.isnan(done_at)
+        done_at[just_done] = t
+        if not active.any():
+            break
+
+        idx = np.minimum(fleet.wp, fleet.n_wp - 1) + 1
+        a, b = paths[rows, idx - 1], paths[rows, idx]
+        xte = segment_xte(fleet.x, fleet.y, a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+        xte = np.where(active, xte, 0.0)
+        sq_sum += xte ** 2
+        np.maximum(xte_max, xte, out=xte_max)
+        samples += active
+
+        out = active & (xte >= SETTLE_XTE_M)
+        last_out[out] = t
+
+    # Odcinek w toku (trasa nieukończona w limicie czasu)
+    open_legs = np.isnan(done_at)
+    settle_sum[open_legs] += last_out[open_legs] - leg_start[open_legs]
+    legs = np.minimum(fleet.wp, fleet.n_wp) + (fleet.status == fleet_sim.ACTIVE)
+
+    shape = (C, M)
+    return {
+        "xte_rms": np.sqrt(sq_sum / np.maximum(samples, 1)).reshape(shape),
+        "xte_max": xte_max.reshape(shape),
+        "settle_s": (settle_sum / np.maximum(legs, 1)).reshape(shape),
+        "energy_kj": (energy / 1000.0).reshape(shape),
+        "time_s": done_at.reshape(shape),
+    }
+
+
+def evaluate(task):
+    """Zadanie dla procesu roboczego: jedna paczka konfiguracji o tej samej liczbie reguł."""
+    num_rules, configs, missions, dt, max_time = task
+    res = rollout(num_rules, configs, missions, dt, max_time)
+    rows = []
+    for c, (k_psi, k_z, eta, width) in enumerate(configs):
+        times = res["time_s"][c]
+        done = int(np.sum(~np.isnan(times)))
+        rows.append({
+            "k_psi": k_psi, "k_z": k_z, "eta": eta, "num_rules": num_rules, "width": width,
+            "xte_rms": float(res["xte_rms"][c].mean()),
+            "xte_max": float(res["xte_max"][c].max()),
+            "settle_s": float(res["settle_s"][c].mean()),
+            "energy_kj": float(res["energy_kj"][c].mean()),
+            "time_s": float(times.mean()) if done == len(times) else None,
+            "done": f"{done}/{len(times)}"
+        })
+    return rows
+
+
+def make_tasks(grid, missions, chunk, dt, max_time):
+    tasks = []
+    for num_rules in grid["num_rules"]:
+        configs = list(itertools.product(grid["k_psi"], grid["k_z"], grid["eta"], grid["width"]))
+        for lo in range(0, len(configs), chunk):
+            tasks.append((num_rules, configs[lo:lo + chunk], missions, dt, max_time))
+    return tasks
+
+
+def format_table(rows):
+    def cell(v):
+        if v is None:
+            return "-"
+        if isinstance(v, float):
+            return f"{v:.2f}"
+        return str(v)
+    widths = {c: max(len(c), *(len(cell(r[c])) for r in rows)) for c in COLUMNS}
+    lines = ["  ".join(c.rjust(widths[c]) for c in COLUMNS)]
+    for r in rows:
+        lines.append("  ".join(cell(r[c]).rjust(widths[c]) for c in COLUMNS))
+    return "\n".join(lines)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Przegląd nastaw regulatora rozmytego na siatce parametrów")
+    p.add_argument("--k-psi", type=float, nargs="+", default=[1.5, 2.5, 3.5])
+    p.add_argument("--k-z", type=float, nargs="+", default=[15.0, 25.0, 35.0])
+    p.add_argument("--eta", type=float, nargs="+", default=[2.0, 5.0])
+    p.add_argument("--num-rules", type=int, nargs="+", default=[7, 11])
+    p.add_argument("--width", type=float, nargs="+", default=[1.0, 2.0])
+    p.add_argument("--missions", help="Plik JSON {nazwa: [[x, y], ...]} zamiast tras referencyjnych")
+    p.add_argument("--dt", type=float, default=0.1)
+    p.add_argument("--max-time", type=float, default=MAX_TIME_S, help="Limit czasu przebiegu trasy (s)")
+    p.add_argument("--chunk", type=int, default=64, help="Konfiguracji na zadanie procesu")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    p.add_argument("--sort", choices=COLUMNS, default="xte_rms")
+    p.add_argument("--top", type=int, default=20, help="Ile najlepszych wierszy wypisać (0 = wszystkie)")
+    p.add_argument("--csv", help="Zapis pełnej tabeli do CSV")
+    args = p.parse_args()
+
+    missions = REFERENCE_MISSIONS
+    if args.missions:
+        with open(args.missions, encoding="utf-8") as f:
+            missions = json.load(f)
+    grid = {"k_psi": args.k_psi, "k_z": args.k_z, "eta": args.eta,
+            "num_rules": args.num_rules, "width": args.width}
+    tasks = make_tasks(grid, list(missions.values()), args.chunk, args.dt, args.max_time)
+    n_configs = sum(len(t[1]) for t in tasks)
+    print(f"Konfiguracji: {n_configs}, trasy: {', '.join(missions)}, zadania: {len(tasks)}, "
+          f"procesy: {args.workers}")
+
+    t0 = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for chunk_rows in pool.map(evaluate, tasks):
+            rows.extend(chunk_rows)
+    wall = time.perf_counter() - t0
+
+    # Nieukończone trasy na koniec przy sortowaniu po czasie
+    rows.sort(key=lambda r: (r[args.sort] is None, r[args.sort] if r[args.sort] is not None else math.inf))
+    shown = rows[:args.top] if args.top else rows
+    print(format_table(shown))
+    print(f"Czas: {wall:.1f} s ({n_configs * len(missions) / wall:.0f} przebiegów tras/s)")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+load_gen.py — generator obciążenia: setki/tysiące wirtualnych dronów w jednym procesie.
+
+W odróżnieniu od probe.py (jeden dron, blokujące requests) każdy dron to
+korutyna asyncio, a wszystkie dzielą pulę połączeń aiohttp. Ruch dronów jak
+w probe.py (trasa z CSV/inline albo random-walk), a po odebraniu misji
+z odpowiedzi serwera dron leci po jej punktach. Opcjonalny "panel"
+(klient Socket.IO) mierzy opóźnienie od wysłania próbki do jej pojawienia
+się w telemetry_delta.
+
+Przykłady:
+  1) 500 dronów w random-walk wokół punktu, 1 Hz, przez 60 s:
+     python load_gen.py --server http://localhost:5000 --drones 500 \
+       --random-walk 52.2300 21.0000 --spread-m 2000 --duration 60 \
+       --auth-header "X-Drone-Token: KluczRoju_XYZ"
+
+  2) 200 dronów na trasie z CSV (każdy startuje w innym miejscu trasy):
+     python load_gen.py --server http://localhost:5000 --drones 200 \
+       --csv telemetry_sample.csv --interval 0.5 --encoding binary
+
+Wymaga pakietu 'aiohttp'; pomiar fan-out dodatkowo 'python-socketio'.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:
+    print("Ten skrypt wymaga pakietu 'aiohttp': pip install aiohttp", file=sys.stderr)
+    raise
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+from probe import haversine_step, load_csv, parse_waypoints_inline, make_payload, encode_body, clamp
+
+R_EARTH = 6371000.0
+WP_DONE = 999  # jak w sim_drone1.py — "koniec misji" dla panelu
+
+
+def distance_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> Tuple[float, float]:
+    """Odległość [m] i kurs [deg] w przybliżeniu równoodległościowym (krótkie odcinki)."""
+    dy = math.radians(lat2 - lat1) * R_EARTH
+    dx = math.radians(lon2 - lon1) * R_EARTH * math.cos(math.radians(lat1))
+    return math.hypot(dx, dy), (math.degrees(math.atan2(dx, dy)) + 360) % 360
+
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return float("nan")
+    idx = min(len(sorted_vals) - 1, int(round(q / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.fanout = []
+
+    def summary(self, elapsed: float) -> str:
+        lat = sorted(self.latencies)
+        fan = sorted(self.fanout)
+        sent = len(lat) + sum(self.errors.values())
+        ok = self.statuses.get(200, 0)
+        failed = sent - ok
+        lines = [
+            f"Wysłane próbki:   {sent} ({sent / elapsed:.0f}/s), OK: {ok}, błędy: {failed} "
+            f"({100.0 * failed / sent if sent else 0:.2f}%)",
+            f"Statusy HTTP:     {dict(self.statuses)}",
+        ]
+        if self.errors:
+            lines.append(f"Błędy połączeń:   {dict(self.errors)}")
+        lines.append("Latencja ingestu: p50 {:.1f} ms, p90 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+            *(1000 * percentile(lat, q) for q in (50, 90, 99, 100))))
+        if fan:
+            lines.append("Fan-out do panelu: p50 {:.1f} ms, p90 {:.1f} ms, p99 {:.1f} ms ({} próbek)".format(
+                *(1000 * percentile(fan, q) for q in (50, 90, 99)), len(fan)))
+        return "\n".join(lines)
+
+
+class VirtualDrone:
+    def __init__(self, drone_id: str, lat: float, lon: float, alt: float, battery: float, yaw: float,
+                 path: Optional[List[Tuple[float, float, Optional[float]]]] = None, path_idx: int = 0):
+        self.drone_id = drone_id
+        self.lat, self.lon, self.alt = lat, lon, alt
+        self.battery = battery
+        self.yaw = yaw
+        self.path = path
+        self.path_idx = path_idx
+        self.mission_id = None
+        self.mission_version = None
+        self.waypoints = []
+        self.wp_index = 0
+        # lat wysłanej próbki -> czas wysłania (do pomiaru fan-out)
+        self.sent_at = {}
+
+    def target_wp(self) -> int:
+        if not self.waypoints:
+            return 0
+        return WP_DONE if self.wp_index >= len(self.waypoints) else self.wp_index + 1
+
+    def apply_response(self, resp: dict) -> Optional[dict]:
+        """Zwraca misję {id, version} do pobrania, gdy serwer ma inną niż dron."""
+        mission = resp.get("mission") if isinstance(resp, dict) else None
+        if not mission:
+            self.mission_id = None
+            self.mission_version = None
+            self.waypoints = []
+            self.wp_index = 0
+            return None
+        if (mission.get("id"), mission.get("version")) != (self.mission_id, self.mission_version):
+            return mission
+        return None
+
+    def set_mission(self, mission: dict, waypoints: list) -> None:
+        if mission.get("id") != self.mission_id:
+            self.wp_index = 0
+        self.mission_id = mission.get("id")
+        self.mission_version = mission.get("version")
+        self.waypoints = waypoints
+
+    def step(self, args, dt: float) -> None:
+        if self.waypoints:
+            # Lot po punktach misji [lat, lon] ze stałą prędkością
+            if self.wp_index < len(self.waypoints):
+                t_lat, t_lon = self.waypoints[self.wp_index][:2]
+                dist, bearing = distance_bearing(self.lat, self.lon, t_lat, t_lon)
+                step = args.speed * dt
+                if dist <= step:
+                    self.lat, self.lon = t_lat, t_lon
+                    self.wp_index += 1
+                else:
+                    self.lat, self.lon = haversine_step(self.lat, self.lon, bearing, step)
+                self.yaw = bearing
+        elif self.path:
+            self.path_idx = (self.path_idx + 1) % len(self.path)
+            lon, lat, alt = self.path[self.path_idx]
+            self.lat, self.lon = lat, lon
+            self.alt = alt if alt is not None else args.alt
+            self.yaw = (self.yaw + args.yaw_per_tick) % 360
+        else:
+            self.yaw = (self.yaw + random.uniform(-10, 10)) % 360
+            self.lat, self.lon = haversine_step(self.lat, self.lon, random.uniform(0, 360), args.step_m)
+
+        if not args.ignore_battery:
+            self.battery = clamp(self.battery - args.battery_drain_per_tick, 0, 100)
+
+
+def make_fleet(args) -> List[VirtualDrone]:
+    path = None
+    if args.csv:
+        path = load_csv(args.csv)
+    elif args.waypoints:
+        path = parse_waypoints_inline(args.waypoints)
+
+    fleet = []
+    for i in range(args.drones):
+        drone_id = f"{args.prefix}{i:04d}"
+        battery = args.battery_start - random.uniform(0, 10)
+        yaw = random.uniform(0, 360)
+        if path:
+            idx = random.randrange(len(path))
+            lon, lat, alt = path[idx]
+            fleet.append(VirtualDrone(drone_id, lat, lon, alt if alt is not None else args.alt,
+                                      battery, yaw, path, idx))
+        else:
+            lat0, lon0 = args.random_walk
+            lat, lon = haversine_step(lat0, lon0, random.uniform(0, 360), random.uniform(0, args.spread_m))
+            fleet.append(VirtualDrone(drone_id, lat, lon, args.alt, battery, yaw))
+    return fleet
+
+
+async def fetch_mission(session: aiohttp.ClientSession, drone: VirtualDrone, mission: dict, args,
+                        headers: dict, stats: Stats) -> None:
+    # Punkty misji z GET /api/mission/<id>; dla nowej wersji tej samej misji tylko różnica
+    params = {"version": mission.get("version")}
+    same = mission.get("id") == drone.mission_id and drone.mission_version is not None
+    if same:
+        params["since_version"] = drone.mission_version
+    url = f"{args.server.rstrip('/')}/api/mission/{mission.get('id')}"
+    try:
+        async with session.get(url, params=params, headers=headers) as r:
+            stats.statuses[r.status] += 1
+            if r.status != 200:
+                return
+            data = json.loads(await r.read())
+    except asyncio.TimeoutError:
+        stats.errors["timeout"] += 1
+        return
+    except aiohttp.ClientError as e:
+        stats.errors[type(e).__name__] += 1
+        return
+    if "diff" in data:
+        waypoints = list(drone.waypoints)
+        # Operacje splice z indeksami starej listy — stosujemy od końca
+        for op in reversed(data["diff"]):
+            waypoints[op["start"]:op["start"] + op["delete"]] = op["insert"]
+    else:
+        waypoints = data.get("waypoints") or []
+    drone.set_mission(mission, waypoints)
+
+
+async def drone_loop(session: aiohttp.ClientSession, drone: VirtualDrone, args, headers: dict,
+                     stats: Stats, stop_at: float) -> None:
+    url = f"{args.server.rstrip('/')}/api/telemetry"
+    # Rozłożenie startów, żeby drony nie wysyłały w jednej chwili
+    await asyncio.sleep(random.uniform(0, args.interval))
+    next_t = time.monotonic()
+    while time.monotonic() < stop_at:
+        if drone.battery <= 0 and not args.ignore_battery:
+            return
+        payload = make_payload(drone.drone_id, drone.lat, drone.lon, drone.alt, drone.battery,
+                               args.noise_m, 0.0, 0.0, drone.yaw)
+        payload["target_wp"] = drone.target_wp()
+        body, content_type = encode_body(args.encoding, payload)
+
+        drone.sent_at[round(payload["lat"], 7)] = time.time()
+        if len(drone.sent_at) > 16:
+            drone.sent_at.pop(next(iter(drone.sent_at)))
+
+        t0 = time.perf_counter()
+        mission = None
+        try:
+            async with session.post(url, data=body, headers={**headers, "Content-Type": content_type}) as r:
+                text = await r.read()
+                stats.latencies.append(time.perf_counter() - t0)
+                stats.statuses[r.status] += 1
+                if r.status == 200:
+                    mission = drone.apply_response(json.loads(text))
+        except asyncio.TimeoutError:
+            stats.errors["timeout"] += 1
+        except aiohttp.ClientError as e:
+            stats.errors[type(e).__name__] += 1
+        if mission is not None:
+            await fetch_mission(session, drone, mission, args, headers, stats)
+
+        drone.step(args, args.interval)
+        next_t += args.interval
+        await asyncio.sleep(max(0.0, next_t - time.monotonic()))
+
+
+async def start_observer(args, fleet: List[VirtualDrone], stats: Stats):
+    """Klient "panelu": mierzy czas od wysłania próbki do jej nadejścia w telemetry_delta."""
+    if socketio is None:
+        print("Brak pakietu 'python-socketio' — pomijam pomiar fan-out.", file=sys.stderr)
+        return None
+    by_id = {d.drone_id: d for d in fleet}
+    sio = socketio.AsyncClient(reconnection=False)
+
+    @sio.on('telemetry_delta')
+    async def on_delta(data):
+        now = time.time()
+        for d_id, fields in (data.get("drones") or {}).items():
+            drone = by_id.get(d_id)
+            if drone is None or "lat" not in fields:
+                continue
+            sent = drone.sent_at.pop(round(fields["lat"], 7), None)
+            if sent is not None:
+                stats.fanout.append(now - sent)
+
+    try:
+        await sio.connect(args.server)
+    except Exception as e:
+        print(f"Panel Socket.IO: nie udało się połączyć ({e}) — pomijam pomiar fan-out.", file=sys.stderr)
+        return None
+    return sio
+
+
+async def run(args) -> None:
+    headers = {}
+    if args.auth_header:
+        k, v = args.auth_header.split(":", 1)
+        headers[k.strip()] = v.strip()
+
+    fleet = make_fleet(args)
+    stats = Stats()
+    observer = None if args.no_observer else await start_observer(args, fleet, stats)
+
+    connector = aiohttp.TCPConnector(limit=args.connections, ssl=False if args.insecure else None)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    print(f"Start: {len(fleet)} dronów, {1.0 / args.interval:.1f} Hz każdy, "
+          f"{args.connections} połączeń, {args.duration:.0f} s")
+    t0 = time.monotonic()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        stop_at = t0 + args.duration
+        await asyncio.gather(*(drone_loop(session, d, args, headers, stats, stop_at) for d in fleet))
+    elapsed = time.monotonic() - t0
+
+    if observer is not None:
+        # Ostatnia zbiorcza delta przychodzi po czasie flush serwera
+        await asyncio.sleep(0.5)
+        await observer.disconnect()
+    print(stats.summary(elapsed))
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Generator obciążenia: wiele wirtualnych dronów → POST /api/telemetry")
+    p.add_argument("--server", default="http://127.0.0.1:5000", help="URL serwera Flask")
+    p.add_argument("--drones", type=int, default=100, help="Liczba wirtualnych dronów")
+    p.add_argument("--prefix", default="load-", help="Prefiks identyfikatorów dronów")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--csv", help="Plik CSV z kolumnami lon,lat,alt")
+    src.add_argument("--waypoints", help="Punkty inline 'lon,lat;lon,lat[;...]'")
+    src.add_argument("--random-walk", nargs=2, type=float, metavar=("LAT", "LON"), help="Losowy spacer wokół LAT LON")
+    p.add_argument("--spread-m", type=float, default=1000.0, help="Promień rozrzutu startów dla random-walk (m)")
+    p.add_argument("--duration", type=float, default=30.0, help="Czas trwania testu (s)")
+    p.add_argument("--interval", type=float, default=1.0, help="Odstęp między próbkami jednego drona (s)")
+    p.add_argument("--connections", type=int, default=100, help="Rozmiar puli połączeń HTTP")
+    p.add_argument("--alt", type=float, default=120.0, help="Domyślna wysokość, gdy brak w danych (m)")
+    p.add_argument("--speed", type=float, default=10.0, help="Prędkość lotu po punktach misji (m/s)")
+    p.add_argument("--noise-m", type=float, default=0.0, help="Szum pozycji (metry)")
+    p.add_argument("--battery-start", type=float, default=95.0, help="Początkowy poziom baterii (%%)")
+    p.add_argument("--battery-drain-per-tick", type=float, default=0.05, help="Spadek baterii na próbkę (%%)")
+    p.add_argument("--ignore-battery", action="store_true", help="Ignoruj rozładowanie baterii")
+    p.add_argument("--yaw-per-tick", type=float, default=3.0, help="Zmiana kursu na punkt trasy (deg)")
+    p.add_argument("--step-m", type=float, default=10.0, help="Długość kroku dla random-walk (m)")
+    p.add_argument("--timeout", type=float, default=5.0, help="Timeout żądania (s)")
+    p.add_argument("--auth-header", help='Nagłówek auth, np. "X-Drone-Token: KluczRoju_XYZ"')
+    p.add_argument("--insecure", action="store_true", help="Nie weryfikuj SSL (np. testowe https)")
+    p.add_argument("--encoding", choices=("json", "binary", "msgpack"), default="json",
+                   help="Kodowanie telemetrii (jak w probe.py)")
+    p.add_argument("--no-observer", action="store_true", help="Bez klienta Socket.IO (bez pomiaru fan-out)")
+    args = p.parse_args()
+    asyncio.run(run(args))
@@ -16,6 +16,15 @@ Przykłady:
      python drone_sim.py --server http://localhost:5000 --drone-id gamma \
        --random-walk 52.2300 21.0000 --step-m 15 --interval 0.8
 
+  4) Tryb przekaźnika: próbki buforowane i wysyłane po 10 na
+     POST /api/telemetry/batch (każda z własnym "ts"):
+     python drone_sim.py --server http://localhost:5000 --drone-id delta \
+       --csv telemetry_sample.csv --interval 0.1 --batch 10
+
+  5) Kompaktowe kodowanie dla wolnych łączy radiowych (np. 57600 bd):
+     python drone_sim.py --server http://localhost:5000 --drone-id eps \
+       --csv telemetry_sample.csv --encoding binary
+
 Zakłada endpoint POST /api/telemetry przyjmujący JSON:
 { "drone_id", "lat", "lon", "alt", "battery", "roll", "pitch", "yaw" }
 """
@@ -25,6 +34,7 @@ import csv
 import json
 import math
 import random
+import struct
 import sys
 import time
 from typing import List, Tuple, Optional
@@ -35,6 +45,44 @@ except Exception as e:
     print("Ten skrypt wymaga pakietu 'requests': pip install requests", file=sys.stderr)
     raise
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# --- Kodowanie telemetrii ---
+# Układ binarny zgodny z telemetry_codec.py po stronie serwera:
+# B wersja, B len(drone_id), drone_id, i lat*1e7, i lon*1e7, f alt,
+# H battery*10, h roll*100, h pitch*100, H (yaw%360)*100, H target_wp
+BINARY_MIMETYPE = "application/x-drone-telemetry"
+_BIN_HEADER = struct.Struct("<BB")
+_BIN_BODY = struct.Struct("<iifHhhHH")
+
+def encode_binary(sample: dict) -> bytes:
+    drone_id = str(sample["drone_id"]).encode("utf-8")
+    alt = sample.get("alt")
+    return _BIN_HEADER.pack(1, len(drone_id)) + drone_id + _BIN_BODY.pack(
+        int(round(sample["lat"] * 1e7)),
+        int(round(sample["lon"] * 1e7)),
+        float("nan") if alt is None else float(alt),
+        max(0, min(65535, int(round(sample.get("battery", 0) * 10)))),
+        int(round(sample.get("roll", 0) * 100)),
+        int(round(sample.get("pitch", 0) * 100)),
+        int(round((sample.get("yaw", 0) % 360.0) * 100)) % 36000,
+        int(sample.get("target_wp", 0)) & 0xFFFF
+    )
+
+def encode_body(encoding: str, body):
+    """Zwraca (bajty, Content-Type). body: próbka (dict) lub lista próbek (batch)."""
+    if encoding == "binary":
+        samples = body if isinstance(body, list) else [body]
+        return b"".join(encode_binary(s) for s in samples), BINARY_MIMETYPE
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise SystemExit("Kodowanie msgpack wymaga pakietu 'msgpack': pip install msgpack")
+        return msgpack.packb(body), "application/msgpack"
+    return json.dumps(body).encode("utf-8"), "application/json"
+
 # --- Pomocnicze ---
 
 def haversine_step(lat: float, lon: float, bearing_deg: float, step_m: float) -> Tuple[float, float]:
@@ -84,9 +132,8 @@ def clamp(v, lo, hi):
 
 # --- Główna pętla ---
 
-def send_point(session: requests.Session, server: str, drone_id: str, lat: float, lon: float,
-               alt: Optional[float], battery: float, noise_m: float, roll: float, pitch: float, yaw: float,
-               headers: dict, timeout: float, verify_ssl: bool) -> bool:
+def make_payload(drone_id: str, lat: float, lon: float, alt: Optional[float], battery: float,
+                 noise_m: float, roll: float, pitch: float, yaw: float) -> dict:
     # dodaj szum (prostą aproksymacją 1e-5 ~ 1.1 m w PL)
     if noise_m > 0:
         # Przybliżenie 1e-5 stopnia szer/dł ~ 1.1 m w PL
@@ -105,18 +152,37 @@ def send_point(session: requests.Session, server: str, drone_id: str, lat: float
         "yaw": round(yaw % 360, 1)
     }
     # usuń None (jeśli serwer nie toleruje)
-    payload = {k: v for k, v in payload.items() if v is not None}
+    return {k: v for k, v in payload.items() if v is not None}
 
+def send_point(session: requests.Session, server: str, drone_id: str, lat: float, lon: float,
+               alt: Optional[float], battery: float, noise_m: float, roll: float, pitch: float, yaw: float,
+               headers: dict, timeout: float, verify_ssl: bool, encoding: str = "json") -> bool:
+    payload = make_payload(drone_id, lat, lon, alt, battery, noise_m, roll, pitch, yaw)
+    body, content_type = encode_body(encoding, payload)
     try:
-        r = session.post(f"{server.rstrip('/')}/api/telemetry", json=payload,
-                         timeout=timeout, headers=headers, verify=verify_ssl)
+        r = session.post(f"{server.rstrip('/')}/api/telemetry", data=body,
+                         timeout=timeout, headers={**headers, "Content-Type": content_type}, verify=verify_ssl)
         ok = 200 <= r.status_code < 300
-        print(f"[{time.strftime('%H:%M:%S')}] POST {r.status_code} {r.text.strip()[:200]}  ->  {payload}")
+        print(f"[{time.strftime('%H:%M:%S')}] POST {r.status_code} ({len(body)} B) {r.text.strip()[:200]}  ->  {payload}")
         return ok
     except Exception as e:
         print(f"POST błąd: {e}", file=sys.stderr)
         return False
 
+def send_batch(session: requests.Session, server: str, samples: List[dict],
+               headers: dict, timeout: float, verify_ssl: bool, encoding: str = "json") -> bool:
+    # Format binarny nie przenosi "ts" — serwer przypisze czas odbioru
+    body, content_type = encode_body(encoding, samples)
+    try:
+        r = session.post(f"{server.rstrip('/')}/api/telemetry/batch", data=body,
+                         timeout=timeout, headers={**headers, "Content-Type": content_type}, verify=verify_ssl)
+        ok = 200 <= r.status_code < 300
+        print(f"[{time.strftime('%H:%M:%S')}] POST batch({len(samples)}, {len(body)} B) {r.status_code} {r.text.strip()[:200]}")
+        return ok
+    except Exception as e:
+        print(f"POST batch błąd: {e}", file=sys.stderr)
+        return False
+
 def iter_path_points(pts: List[Tuple[float, float, Optional[float]]], repeat: bool):
     while True:
         for (lon, lat, alt) in pts:
@@ -144,6 +210,22 @@ def run(args):
     else:
         raise SystemExit("Podaj --csv, --waypoints lub --random-walk LAT LON")
 
+    buffer: List[dict] = []
+
+    def emit(lat, lon, alt, battery, roll, pitch, yaw):
+        if args.batch <= 0:
+            return send_point(session, args.server, args.drone_id, lat, lon, alt,
+                              battery, args.noise_m, roll, pitch, yaw,
+                              headers, args.timeout, not args.insecure, args.encoding)
+        sample = make_payload(args.drone_id, lat, lon, alt, battery, args.noise_m, roll, pitch, yaw)
+        sample["ts"] = time.time()
+        buffer.append(sample)
+        if len(buffer) < args.batch:
+            return True
+        ok = send_batch(session, args.server, buffer, headers, args.timeout, not args.insecure, args.encoding)
+        buffer.clear()
+        return ok
+
     battery = float(args.battery_start)
     yaw = float(args.yaw)
     roll = float(args.roll)
@@ -154,9 +236,7 @@ def run(args):
         lat, lon = points[0][1], points[0][0]
         alt = args.alt
         while True:
-            ok = send_point(session, args.server, args.drone_id, lat, lon, alt,
-                            battery, args.noise_m, roll, pitch, yaw,
-                            headers, args.timeout, not args.insecure)
+            ok = emit(lat, lon, alt, battery, roll, pitch, yaw)
             time.sleep(args.interval)
             # zmiany orientacji i baterii
             yaw = (yaw + random.uniform(-10, 10)) % 360
@@ -170,9 +250,7 @@ def run(args):
     else:
         # tryb ścieżki
         for (lon, lat, alt) in iter_path_points(points, args.repeat):
-            ok = send_point(session, args.server, args.drone_id, lat, lon, alt,
-                            battery, args.noise_m, roll, pitch, yaw,
-                            headers, args.timeout, not args.insecure)
+            ok = emit(lat, lon, alt, battery, roll, pitch, yaw)
             time.sleep(args.interval)
             yaw = (yaw + args.yaw_per_tick) % 360
             battery = clamp(battery - args.battery_drain_per_tick, 0, 100)
@@ -203,5 +281,8 @@ if __name__ == "__main__":
     p.add_argument("--auth-header", help='Niestandardowy nagłówek auth, np. "Authorization: Bearer XYZ"')
     p.add_argument("--insecure", action="store_true", help="Nie weryfikuj SSL (np. testowe https)")
     p.add_argument("--step-m", type=float, default=10.0, help="Długość kroku dla random-walk (m)")
+    p.add_argument("--encoding", choices=("json", "binary", "msgpack"), default="json",
+                   help="Kodowanie telemetrii (binary/msgpack dla wolnych łączy)")
+    p.add_argument("--batch", type=int, default=0, help="Wysyłaj po N próbek na /api/telemetry/batch (0 = wyłączone)")
     args = p.parse_args()
     run(args)
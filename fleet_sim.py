@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+fleet_sim.py — symulator floty N łodzi w jednym procesie (NumPy).
+
+Stan wszystkich jednostek (prędkości u, r, pozycja x, y i kurs w lokalnym
+układzie metrycznym) trzymany jest w tablicach, a krok fizyki
+(PhysicsModel), adaptacyjny regulator rozmyty (AdaptiveFuzzyController —
+funkcje bazowe liczone naraz dla całej floty jako macierz N × liczba reguł)
+i przeliczenie na GPS (LocalFrame) są wsadowe. Dynamika, regulator i logika
+punktów są te same co w sim_drone1.py, więc każda łódź floty płynie tak jak
+pojedynczy symulator.
+
+Bez --server skrypt mierzy tylko tempo symulacji (łodzie dostają losowe
+trasy). Z --server łodzie wysyłają telemetrię partiami do
+/api/telemetry/batch, a misje z odpowiedzi pobierają z /api/mission/<id>.
+
+  python fleet_sim.py --vessels 1000 --duration 600
+  python fleet_sim.py --vessels 1000 --duration 600 --server http://localhost:5000 \\
+    --api-key 12345 --realtime
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+R_EARTH = 6371000.0
+START_LAT = 52.2297
+START_LON = 21.0122
+WP_TOLERANCE = 3.0  # m, jak w sim_drone1.py
+# Kod target_wp "koniec misji" dla panelu
+WP_DONE = 999
+# Stan misji łodzi
+IDLE, ACTIVE, DONE = 0, 1, 2
+
+
+class FleetFrame:
+    """LocalFrame z sim_drone1.py dla tablic współrzędnych."""
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.kx = np.pi / 180 * R_EARTH * np.cos(lat0 * np.pi / 180)
+        self.ky = np.pi / 180 * R_EARTH
+
+    def gps_to_xy(self, lat, lon):
+        return (np.asarray(lon) - self.lon0) * self.kx, (np.asarray(lat) - self.lat0) * self.ky
+
+    def xy_to_gps(self, x, y):
+        return self.lat0 + np.asarray(y) / self.ky, self.lon0 + np.asarray(x) / self.kx
+
+
+def per_vessel(value, n):
+    return np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+
+class FleetPhysics:
+    """PhysicsModel dla N łodzi: prędkość wzdłużna u i kątowa r."""
+
+    def __init__(self, n, m=20.0, I=5.0, drag_u=0.5, drag_r=2.0):
+        self.u = np.zeros(n)
+        self.r = np.zeros(n)
+        self.m, self.I = m, I
+        self.drag_u = drag_u
+        self.drag_r = drag_r
+
+    def step(self, fx, tz, dt):
+        acc_u = (fx - self.drag_u * self.u) / self.m
+        acc_r = (tz - self.drag_r * self.r) / self.I
+        self.u += acc_u * dt
+        self.r += acc_r * dt
+        return self.u, self.r
+
+
+class FleetFuzzyController:
+    """
+    AdaptiveFuzzyController z sim_drone1.py dla N łodzi. Wzmocnienia
+    (k_psi, k_z, eta, width) mogą być skalarami albo tablicami (N,) — wtedy
+    każda łódź ma własne nastawy; liczba reguł jest wspólna.
+    """
+
+    def __init__(self, n, k_psi=2.5, k_z=25.0, eta=5.0, num_rules=11, width=2.0,
+                 theta_max=50.0, torque_max=100.0):
+        self.k_psi = per_vessel(k_psi, n)
+        self.k_z = per_vessel(k_z, n)
+        self.eta = per_vessel(eta, n)
+        self.width = per_vessel(width, n)
+        self.num_rules = num_rules
+        self.centers = np.linspace(-2.0, 2.0, num_rules)
+        self.theta = np.zeros((n, num_rules))
+        self.theta_max = theta_max
+        self.torque_max = torque_max
+
+    def fuzzy_basis(self, z):
+        basis = np.exp(-(z[:, None] - self.centers) ** 2 / (self.width[:, None] ** 2))
+        norm = basis.sum(axis=1, keepdims=True)
+        return np.divide(basis, norm, out=basis, where=norm > 0)
+
+    def compute(self, x, y, psi, u, r, tx, ty, dt, active):
+        """(siła, moment) dla całej floty; wagi adaptują się tylko dla łodzi z `active`."""
+        e_psi = np.arctan2(ty - y, tx - x) - psi
+        e_psi = np.arctan2(np.sin(e_psi), np.cos(e_psi))
+
+        z_r = np.where(active, r - self.k_psi * e_psi, 0.0)
+        xi = self.fuzzy_basis(z_r)
+        self.theta += (self.eta * z_r * dt)[:, None] * xi
+        # Limit wag (norma wiersza)
+        norm = np.linalg.norm(self.theta, axis=1)
+        over = norm > self.theta_max
+        if over.any():
+            self.theta[over] *= (self.theta_max / norm[over])[:, None]
+
+        fuzzy_comp = np.einsum("ij,ij->i", self.theta, xi)
+        torque_z = np.clip(-self.k_z * z_r - fuzzy_comp, -self.torque_max, self.torque_max)
+
+        # Prędkość zadana: zwalnia na zakrętach i przy dolocie
+        dist = np.hypot(tx - x, ty - y)
+        target_speed = np.where(np.abs(e_psi) > 0.5, 4.0, 12.0)
+        target_speed = np.where(dist < 15.0, 3.0, target_speed)
+        force_x = np.clip(250.0 * (target_speed - u), 0.0, 300.0)
+        return force_x, torque_z
+
+
+class Fleet:
+    """N łodzi płynących po własnych trasach (punkty w układzie lokalnym)."""
+
+    def __init__(self, n, lat0=START_LAT, lon0=START_LON, spread_m=0.0, seed=0, ids=None, **controller_kw):
+        rng = np.random.default_rng(seed)
+        self.n = n
+        self.ids = list(ids) if ids is not None else [f"fleet{k + 1}" for k in range(n)]
+        self.index = {d_id: k for k, d_id in enumerate(self.ids)}
+        self.frame = FleetFrame(lat0, lon0)
+        self.x = rng.uniform(-spread_m, spread_m, n)
+        self.y = rng.uniform(-spread_m, spread_m, n)
+        self.yaw = np.zeros(n)
+        self.physics = FleetPhysics(n)
+        self.controller = FleetFuzzyController(n, **controller_kw)
+        self.battery = np.full(n, 100.0)
+        # Trasy wyrównane do najdłuższej: paths[k, :n_wp[k]]
+        self.paths = np.zeros((n, 1, 2))
+        self.n_wp = np.zeros(n, dtype=np.int64)
+        self.wp = np.zeros(n, dtype=np.int64)
+        self.status = np.full(n, IDLE, dtype=np.int8)
+        self.missions = [None] * n   # (mission_id, version) albo None
+        # Siła i moment z ostatniego kroku (np. energia w controller_sweep.py)
+        self.fx = np.zeros(n)
+        self.tz = np.zeros(n)
+        self.t = 0.0
+
+    def set_path(self, k, path_xy, resume=True):
+        """Nowa trasa łodzi k; z resume start od najbliższego punktu (jak sim_drone1.py)."""
+        path_xy = np.asarray(path_xy, dtype=float).reshape(-1, 2)
+        if len(path_xy) > self.paths.shape[1]:
+            grown = np.zeros((self.n, len(path_xy), 2))
+            grown[:, :self.paths.shape[1]] = self.paths
+            self.paths = grown
+        self.paths[k, :len(path_xy)] = path_xy
+        self.n_wp[k] = len(path_xy)
+        self.wp[k] = 0
+        if resume and len(path_xy):
+            self.wp[k] = int(np.argmin(np.hypot(path_xy[:, 0] - self.x[k], path_xy[:, 1] - self.y[k])))
+        self.status[k] = ACTIVE
+
+    def set_mission(self, k, mission, waypoints):
+        lat = np.array([wp[0] for wp in waypoints], dtype=float)
+        lon = np.array([wp[1] for wp in waypoints], dtype=float)
+        self.set_path(k, np.column_stack(self.frame.gps_to_xy(lat, lon)))
+        self.missions[k] = mission
+
+    def stop_mission(self, k):
+        self.status[k] = IDLE
+        self.n_wp[k] = 0
+        self.wp[k] = 0
+        self.missions[k] = None
+
+    def step(self, dt):
+        active = self.status == ACTIVE
+        # Koniec trasy -> DONE (jak w sim_drone1.py: na początku kolejnego kroku)
+        finished = active & (self.wp >= self.n_wp)
+        self.status[finished] = DONE
+        active &= ~finished
+
+        rows = np.arange(self.n)
+        idx = np.minimum(self.wp, self.paths.shape[1] - 1)
+        tx, ty = self.paths[rows, idx, 0], self.paths[rows, idx, 1]
+        physics = self.physics
+        fx, tz = self.controller.compute(self.x, self.y, self.yaw, physics.u, physics.r, tx, ty, dt, active)
+
+        reached = active & (np.hypot(tx - self.x, ty - self.y) < WP_TOLERANCE)
+        self.wp[reached] += 1
+
+        done = self.status == DONE
+        # Bez celu: DONE hamuje aktywnie (HOVER), IDLE dryfuje bez napędu
+        fx = np.where(active, fx, np.where(done, -20.0 * physics.u, 0.0))
+        tz = np.where(active, tz, np.where(done, -10.0 * physics.r, 0.0))
+
+        physics.step(fx, tz, dt)
+        self.fx, self.tz = fx, tz
+        self.x += physics.u * np.cos(self.yaw) * dt
+        self.y += physics.u * np.sin(self.yaw) * dt
+        self.yaw += physics.r * dt
+        self.yaw = np.arctan2(np.sin(self.yaw), np.cos(self.yaw))
+        np.maximum(self.battery - 0.01, 0.0, out=self.battery)
+        self.t += dt
+
+    def target_wp(self):
+        return np.where(self.status == ACTIVE, self.wp + 1, np.where(self.status == DONE, WP_DONE, 0))
+
+    def telemetry(self, ts=None):
+        """Próbki w formacie /api/telemetry/batch."""
+        lat, lon = self.frame.xy_to_gps(self.x, self.y)
+        yaw = np.round(np.degrees(self.yaw), 2)
+        battery = np.round(self.battery, 1)
+        target_wp = self.target_wp()
+        samples = []
+        for k, d_id in enumerate(self.ids):
+            sample = {
+                "drone_id": d_id,
+                "lat": float(lat[k]), "lon": float(lon[k]), "alt": 10,
+                "battery": float(battery[k]),
+                "roll": 0, "pitch": 0, "yaw": float(yaw[k]),
+                "target_wp": int(target_wp[k])
+            }
+            if ts is not None:
+                sample["ts"] = ts
+            samples.append(sample)
+        return samples
+
+
+def random_paths(fleet, rng, n_points, radius_m):
+    for k in range(fleet.n):
+        offsets = rng.uniform(-radius_m, radius_m, (n_points, 2))
+        fleet.set_path(k, offsets + [fleet.x[k], fleet.y[k]], resume=False)
+
+
+class ServerLink:
+    """Telemetria partiami do /api/telemetry/batch i pobieranie misji z odpowiedzi."""
+
+    def __init__(self, fleet, server, api_key, timeout=10.0):
+        import requests
+        self.fleet = fleet
+        self.server = server.rstrip("/")
+        self.http = requests.Session()
+        self.http.headers["X-Drone-Token"] = api_key
+        self.timeout = timeout
+
+    def send(self, ts=None):
+        resp = self.http.post(f"{self.server}/api/telemetry/batch",
+                              json={"samples": self.fleet.telemetry(ts)}, timeout=self.timeout)
+        resp.raise_for_status()
+        for d_id, answer in resp.json().get("drones", {}).items():
+            k = self.fleet.index.get(d_id)
+            if k is not None:
+                self.apply(k, answer.get("mission"))
+
+    def apply(self, k, mission):
+        fleet = self.fleet
+        if not mission:
+            if fleet.missions[k] is not None:
+                fleet.stop_mission(k)
+            return
+        key = (mission.get("id"), mission.get("version"))
+        if key == fleet.missions[k]:
+            return
+        resp = self.http.get(f"{self.server}/api/mission/{key[0]}", params={"version": key[1]},
+                             timeout=self.timeout)
+        resp.raise_for_status()
+        waypoints = resp.json().get("waypoints", [])
+        if waypoints:
+            fleet.set_mission(k, key, waypoints)
+        else:
+            fleet.missions[k] = key
+
+
+def main():
+    p = argparse.ArgumentParser(description="Symulator floty N łodzi (NumPy)")
+    p.add_argument("--vessels", type=int, default=1000)
+    p.add_argument("--duration", type=float, default=600.0, help="Czas symulacji (s)")
+    p.add_argument("--dt", type=float, default=0.1, help="Krok fizyki (s)")
+    p.add_argument("--lat", type=float, default=START_LAT)
+    p.add_argument("--lon", type=float, default=START_LON)
+    p.add_argument("--spread-m", type=float, default=2000.0, help="Rozrzut pozycji startowych (m)")
+    p.add_argument("--random-points", type=int, default=10, help="Punkty losowej trasy bez serwera")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--server", help="np. http://localhost:5000; bez tego tylko pomiar tempa")
+    p.add_argument("--api-key", default="12345", help="Wartość nagłówka X-Drone-Token")
+    p.add_argument("--interval", type=float, default=1.0, help="Co ile sekund symulacji wysyłać telemetrię")
+    p.add_argument("--realtime", action="store_true", help="Tempo czasu rzeczywistego zamiast maksymalnego")
+    args = p.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    fleet = Fleet(args.vessels, args.lat, args.lon, spread_m=args.spread_m, seed=args.seed)
+    link = None
+    if args.server:
+        link = ServerLink(fleet, args.server, args.api_key)
+    else:
+        random_paths(fleet, rng, args.random_points, 300.0)
+
+    steps = int(round(args.duration / args.dt))
+    send_every = max(1, int(round(args.interval / args.dt)))
+    t0 = time.perf_counter()
+    sent = errors = 0
+    for i in range(steps):
+        fleet.step(args.dt)
+        if link is not None and (i + 1) % send_every == 0:
+            try:
+                link.send(time.time() if args.realtime else None)
+                sent += 1
+            except Exception as e:
+                errors += 1
+                print(f"[ERROR] Telemetria floty: {e}", file=sys.stderr)
+        if args.realtime:
+            lag = t0 + (i + 1) * args.dt - time.perf_counter()
+            if lag > 0:
+                time.sleep(lag)
+
+    wall = time.perf_counter() - t0
+    active = int((fleet.status == ACTIVE).sum())
+    done = int((fleet.status == DONE).sum())
+    print(f"{args.vessels} łodzi, {steps} kroków po {args.dt} s: {wall:.2f} s "
+          f"({args.duration / wall:.1f}× czas rzeczywisty, {steps * args.vessels / wall / 1e6:.2f} M łodzio-kroków/s)")
+    print(f"Misje: {active} w trakcie, {done} zakończonych; paczki telemetrii: {sent} (błędy: {errors})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
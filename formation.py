@@ -0,0 +1,91 @@
+"""
+formation.py — szyk lider/follower liczony po stronie serwera.
+
+Formacja to lider i przesunięcia followerów w układzie kadłuba lidera:
+[naprzód_m, w_lewo_m] (np. [-8, 0] = 8 m za liderem, [-5, 5] = 5 m z tyłu
+i 5 m na lewo). Kurs lidera to "yaw" z telemetrii w stopniach, jak
+w symulatorach: 0° = wschód, rośnie przeciwnie do ruchu wskazówek zegara.
+
+Formacja zapisana jest we wpisach dronów (pole "formation"):
+  * lider:    {"id", "followers": {follower_id: [naprzód, w_lewo]}}
+  * follower: {"id", "leader", "offset": [naprzód, w_lewo]}
+więc trafia do dziennika / Redisa jak reszta stanu. Przy każdej telemetrii
+lidera serwer liczy punkty docelowe followerów i wypycha je łączem
+Socket.IO; follower na HTTP dostaje swój punkt w odpowiedzi na własną
+telemetrię — bez osobnego odpytywania lidera.
+"""
+
+import math
+
+from spatial_index import M_PER_DEG
+
+# Limit followerów jednego lidera
+MAX_FOLLOWERS = 50
+# Maksymalne przesunięcie followera od lidera [m]
+MAX_OFFSET_M = 1000.0
+
+
+def parse_offset(raw):
+    """[naprzód, w_lewo] albo {"forward", "left"} -> [float, float]; ValueError przy błędzie."""
+    if isinstance(raw, dict):
+        raw = [raw.get("forward", 0), raw.get("left", 0)]
+    if not isinstance(raw, (list, tuple)) or len(raw) != 2:
+        raise ValueError("Offset must be [forward_m, left_m]")
+    forward, left = float(raw[0]), float(raw[1])
+    if not (math.isfinite(forward) and math.isfinite(left)):
+        raise ValueError("Offset must be finite")
+    if math.hypot(forward, left) > MAX_OFFSET_M:
+        raise ValueError(f"Offset too large (max {MAX_OFFSET_M:.0f} m)")
+    return [forward, left]
+
+
+def parse_formation(data: dict):
+    """Treść POST /api/formation -> (formation_id, leader_id, {follower_id: offset})."""
+    leader = data.get("leader")
+    if not isinstance(leader, str) or not leader:
+        raise ValueError("No leader")
+    raw = data.get("followers")
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("No followers")
+    if len(raw) > MAX_FOLLOWERS:
+        raise ValueError(f"Max {MAX_FOLLOWERS} followers")
+    followers = {}
+    for follower_id, offset in raw.items():
+        if follower_id == leader:
+            raise ValueError("Leader cannot follow itself")
+        try:
+            followers[follower_id] = parse_offset(offset)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{follower_id}: {e}")
+    formation_id = str(data.get("formation_id") or f"formation_{leader}")
+    return formation_id, leader, followers
+
+
+def target_point(lat: float, lon: float, yaw_deg: float, offset):
+    """Pozycja lidera + przesunięcie w układzie jego kadłuba -> (lat, lon)."""
+    forward, left = offset
+    psi = math.radians(yaw_deg)
+    east = forward * math.cos(psi) - left * math.sin(psi)
+    north = forward * math.sin(psi) + left * math.cos(psi)
+    kx = M_PER_DEG * math.cos(math.radians(lat))
+    return lat + north / M_PER_DEG, lon + east / kx
+
+
+def follower_target(formation_id: str, leader_id: str, telemetry: dict, offset):
+    """Punkt docelowy followera z ostatniej telemetrii lidera; None, gdy lider nie ma pozycji."""
+    lat, lon = telemetry.get("lat"), telemetry.get("lon")
+    if lat is None or lon is None:
+        return None
+    yaw = float(telemetry.get("yaw") or 0.0)
+    t_lat, t_lon = target_point(float(lat), float(lon), yaw, offset)
+    return {
+        "id": formation_id,
+        "leader": leader_id,
+        "lat": t_lat,
+        "lon": t_lon,
+        "yaw": yaw,
+        "offset": offset,
+        "leader_lat": float(lat),
+        "leader_lon": float(lon),
+        "leader_timestamp": telemetry.get("timestamp")
+    }
@@ -0,0 +1,115 @@
+"""
+history.py — historia telemetrii w SQLite (tryb WAL).
+
+Próbki trzymane są w tabeli WITHOUT ROWID z kluczem (drone_id, ts), więc dane
+jednego drona leżą w B-drzewie posortowane po czasie, a zapytanie o okno
+czasowe to przejście zakresu indeksu, bez skanowania całej historii.
+
+Zapis odbywa się partiami (jedna transakcja na partię). Metody są blokujące —
+w app.py wołane przez eventlet.tpool. Każde wywołanie otwiera własne
+połączenie, więc nie trzeba synchronizować dostępu między wątkami puli.
+"""
+
+import sqlite3
+
+FIELDS = ("ts", "lat", "lon", "alt", "battery", "roll", "pitch", "yaw", "target_wp")
+
+
+class TelemetryHistory:
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS samples (
+                    drone_id TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    lat REAL, lon REAL, alt REAL, battery REAL,
+                    roll REAL, pitch REAL, yaw REAL, target_wp INTEGER,
+                    PRIMARY KEY (drone_id, ts)
+                ) WITHOUT ROWID
+            """)
+            # Okna czasowe misji — do odtwarzania trasy całej misji
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS missions (
+                    drone_id TEXT NOT NULL,
+                    mission_id TEXT NOT NULL,
+                    started REAL NOT NULL,
+                    ended REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS missions_idx ON missions (drone_id, mission_id)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def insert_batch(self, rows: list) -> None:
+        """rows: krotki (drone_id, ts, lat, lon, alt, battery, roll, pitch, yaw, target_wp)."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO samples VALUES (?,?,?,?,?,?,?,?,?,?)", rows
+                )
+        finally:
+            conn.close()
+
+    def query(self, drone_id: str, t_from: float, t_to: float) -> list:
+        """Próbki drona z okna [t_from, t_to], rosnąco po czasie (krotki w kolejności FIELDS)."""
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM samples "
+                "WHERE drone_id = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (drone_id, t_from, t_to)
+            )
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    def mission_started(self, drone_id: str, mission_id: str, ts: float) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                open_row = conn.execute(
+                    "SELECT mission_id FROM missions WHERE drone_id = ? AND ended IS NULL",
+                    (drone_id,)
+                ).fetchone()
+                if open_row and open_row[0] == mission_id:
+                    # Aktualizacja w locie tej samej misji — okno trwa dalej
+                    return
+                conn.execute("UPDATE missions SET ended = ? WHERE drone_id = ? AND ended IS NULL", (ts, drone_id))
+                conn.execute("INSERT INTO missions VALUES (?, ?, ?, NULL)", (drone_id, mission_id, ts))
+        finally:
+            conn.close()
+
+    def mission_ended(self, drone_id: str, ts: float) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("UPDATE missions SET ended = ? WHERE drone_id = ? AND ended IS NULL", (ts, drone_id))
+        finally:
+            conn.close()
+
+    def mission_window(self, drone_id: str, mission_id: str):
+        """(started, ended) misji; ended = None gdy misja trwa. None gdy brak misji."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT MIN(started), MAX(ended), SUM(ended IS NULL) FROM missions "
+                "WHERE drone_id = ? AND mission_id = ?",
+                (drone_id, mission_id)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row[0] is None:
+            return None
+        return row[0], (None if row[2] else row[1])
@@ -0,0 +1,160 @@
+"""
+missions.py — wersjonowane misje (listy punktów) w SQLite.
+
+Misja zapisywana jest raz, pod kluczem (mission_id, version); wpis drona
+trzyma tylko {"id", "version"}, więc odpowiedź na telemetrię nie niesie już
+całej listy punktów. Ponowne wgranie misji o tym samym ID z innymi punktami
+tworzy kolejną wersję, a dron pobiera punkty (GET /api/mission/<id>) tylko
+wtedy, gdy zmieni się wersja.
+
+Zamiast pełnej listy można pobrać różnicę względem wersji, którą dron już ma:
+listę operacji splice {"start", "delete", "insert"} (difflib na punktach po
+odcięciu wspólnego początku i końca), więc przesunięcie jednego punktu albo
+dopisanie kilku na końcu to kilka punktów zamiast całej misji.
+
+Wersje są niezmienne, więc ostatnio czytane trzymane są w pamięci (LRU).
+Metody są blokujące — w app.py wołane przez eventlet.tpool, każde wywołanie
+otwiera własne połączenie (jak w history.py).
+"""
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+# Powyżej (długość starego fragmentu × nowego) różnica to jedna operacja
+DIFF_MAX_CELLS = 25_000_000
+
+
+class MissionStore:
+    def __init__(self, path: str, cache_size: int = 256):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # (mission_id, version) -> punkty
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mission_versions (
+                    mission_id TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    waypoints TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (mission_id, version)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _remember(self, mission_id: str, version: int, waypoints: list) -> None:
+        with self._lock:
+            self._cache[(mission_id, version)] = waypoints
+            self._cache.move_to_end((mission_id, version))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, mission_id: str, waypoints: list, ts: float) -> int:
+        """Zapisz punkty misji; zwraca numer wersji (ta sama, jeśli punkty się nie zmieniły)."""
+        raw = json.dumps(waypoints, separators=(",", ":"))
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT version, waypoints FROM mission_versions WHERE mission_id = ? "
+                    "ORDER BY version DESC LIMIT 1",
+                    (mission_id,)
+                ).fetchone()
+                if row and row[1] == raw:
+                    version = row[0]
+                else:
+                    version = row[0] + 1 if row else 1
+                    conn.execute(
+                        "INSERT INTO mission_versions VALUES (?, ?, ?, ?)",
+                        (mission_id, version, raw, ts)
+                    )
+        finally:
+            conn.close()
+        self._remember(mission_id, version, waypoints)
+        return version
+
+    def latest_version(self, mission_id: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT MAX(version) FROM mission_versions WHERE mission_id = ?", (mission_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0]
+
+    def get(self, mission_id: str, version: int = None):
+        """(wersja, punkty) — domyślnie najnowsza wersja. None, gdy brak misji/wersji."""
+        if version is None:
+            version = self.latest_version(mission_id)
+            if version is None:
+                return None
+        with self._lock:
+            waypoints = self._cache.get((mission_id, version))
+            if waypoints is not None:
+                self._cache.move_to_end((mission_id, version))
+                return version, waypoints
+
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT waypoints FROM mission_versions WHERE mission_id = ? AND version = ?",
+                (mission_id, version)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        waypoints = json.loads(row[0])
+        self._remember(mission_id, version, waypoints)
+        return version, waypoints
+
+
+def diff(old: list, new: list) -> list:
+    """
+    Operacje splice {"start", "delete", "insert"} zamieniające `old` w `new`;
+    indeksy odnoszą się do `old`, operacje są rosnąco i nie zachodzą na siebie.
+    """
+    n = min(len(old), len(new))
+    head = 0
+    while head < n and old[head] == new[head]:
+        head += 1
+    tail = 0
+    while tail < n - head and old[len(old) - 1 - tail] == new[len(new) - 1 - tail]:
+        tail += 1
+    a = old[head:len(old) - tail]
+    b = new[head:len(new) - tail]
+    if not a and not b:
+        return []
+    if len(a) * len(b) > DIFF_MAX_CELLS:
+        # Zmiana na dużym fragmencie — jedna operacja zamiast kosztownego dopasowania
+        return [{"start": head, "delete": len(a), "insert": b}]
+
+    matcher = SequenceMatcher(None, [tuple(p) for p in a], [tuple(p) for p in b], autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            ops.append({"start": head + i1, "delete": i2 - i1, "insert": b[j1:j2]})
+    return ops
+
+
+def apply_diff(old: list, ops: list) -> list:
+    out = list(old)
+    # Od końca — wcześniejsze indeksy zostają ważne
+    for op in reversed(ops):
+        out[op["start"]:op["start"] + op["delete"]] = op["insert"]
+    return out
@@ -0,0 +1,89 @@
+"""
+persistence.py — trwały zapis stanu dronów: snapshot JSON + dziennik zmian (WAL).
+
+Każda mutacja stanu to wpis {"id": drone_id, "set": {pole: wartość}} dopisywany
+do pliku dziennika (jedna linia JSON na wpis). Co `compact_every` wpisów stan
+jest zrzucany do snapshotu (zapis do pliku tymczasowego + atomowy os.replace),
+a dziennik jest czyszczony. Przy starcie: snapshot + odtworzenie dziennika.
+
+Wpisy "set" są idempotentne, więc awaria między podmianą snapshotu a
+wyczyszczeniem dziennika nie psuje stanu (wpisy zostaną nałożone drugi raz).
+
+Metody write_batch/compact są blokujące (dysk) — w app.py wołane przez
+eventlet.tpool, poza pętlą huba.
+"""
+
+import json
+import os
+
+
+def apply_record(state: dict, record: dict) -> None:
+    entry = state.setdefault(record["id"], {})
+    entry.update(record.get("set", {}))
+
+
+class StateJournal:
+    def __init__(self, snapshot_path: str, log_path: str, compact_every: int = 10000, fsync: bool = True):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        # Własna kopia stanu, używana tylko przez wątek zapisu (do kompakcji)
+        self.state = {}
+        self.log_records = 0
+
+    def load(self):
+        """Wczytaj snapshot i odtwórz dziennik. Zwraca (stan, liczba_odtworzonych_wpisów)."""
+        state = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                state = json.load(f)
+
+        replayed = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Urwany ostatni wpis po awarii — reszty nie ma
+                        break
+                    apply_record(state, record)
+                    replayed += 1
+
+        self.state = state
+        self.log_records = replayed
+        # Aplikacja dostaje osobną kopię — self.state należy do wątku zapisu
+        return json.loads(json.dumps(state)), replayed
+
+    def write_batch(self, records: list) -> None:
+        lines = [json.dumps(r, separators=(',', ':')) for r in records]
+        with open(self.log_path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        # Nakładamy kopie (z JSON), żeby nie współdzielić obiektów z hubem
+        for line in lines:
+            apply_record(self.state, json.loads(line))
+        self.log_records += len(records)
+
+        if self.log_records >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, separators=(',', ':'))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # Snapshot zawiera już wszystko z dziennika
+        open(self.log_path, 'w').close()
+        self.log_records = 0
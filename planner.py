@@ -0,0 +1,353 @@
+"""
+planner.py — planowanie tras pokrycia obszaru (lawnmower / boustrophedon).
+
+Wielokąt (z dziurami — wyspy, pomosty) rzutowany jest do lokalnego układu
+metrycznego i obracany o -angle_deg, tak żeby linie przejazdu były poziome.
+Przecięcia każdej linii (co `spacing_m`) z krawędziami wielokąta liczone są
+macierzowo: rzędy × krawędzie, bez próbkowania punktów. Posortowane
+przecięcia dają odcinki "w wodzie" (reguła parzystości — dziury wychodzą
+same).
+
+Odcinki sąsiednich rzędów, które na siebie zachodzą, łączone są w komórki
+(dekompozycja boustrophedon), a każda komórka przejeżdżana jest zygzakiem
+osobno — trasa nie przecina wysp w poprzek rzędu. Przy kilku dronach rzędy
+dzielone są na pasy o zbliżonej długości przejazdu.
+
+partition_area() dzieli obszar między drony rekurencyjną bisekcją pola:
+grupa dronów rozdzielana jest na dwie (wg pozycji wzdłuż dłuższego boku
+obszaru), a linia cięcia wyznaczana tak, by pola części miały się jak sumy
+wag (np. stan baterii). Pole części po jednej stronie linii x = c to suma
+całek ∮ y dx po przyciętych krawędziach (odcinek na samej linii cięcia ma
+dx = 0, więc nie trzeba go dodawać) — liczona wektorowo dla wszystkich
+krawędzi. Części obszarów wypukłych są spójne; przy mocno wklęsłych
+kształtach pojedyncza część może się rozpaść na kilka kawałków.
+"""
+
+import math
+
+import numpy as np
+
+R_EARTH = 6371000.0
+M_PER_DEG = math.pi * R_EARTH / 180.0
+MAX_ROWS = 20000
+
+
+class LocalFrame:
+    """Równoodległościowy układ (x na wschód, y na północ) wokół (lat0, lon0), obrócony o angle_deg."""
+
+    def __init__(self, lat0: float, lon0: float, angle_deg: float = 0.0):
+        self.lat0, self.lon0 = lat0, lon0
+        self.cos0 = math.cos(math.radians(lat0))
+        a = math.radians(angle_deg)
+        self.ca, self.sa = math.cos(a), math.sin(a)
+
+    def to_xy(self, pts):
+        pts = np.asarray(pts, dtype=float)
+        e = (pts[:, 1] - self.lon0) * M_PER_DEG * self.cos0
+        n = (pts[:, 0] - self.lat0) * M_PER_DEG
+        # Obrót o -angle: kierunek przejazdu staje się osią x
+        return np.column_stack((e * self.ca + n * self.sa, -e * self.sa + n * self.ca))
+
+    def to_latlon(self, xy):
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        e = xy[:, 0] * self.ca - xy[:, 1] * self.sa
+        n = xy[:, 0] * self.sa + xy[:, 1] * self.ca
+        return np.column_stack((self.lat0 + n / M_PER_DEG, self.lon0 + e / (M_PER_DEG * self.cos0)))
+
+
+def ring_edges(ring_xy):
+    a = np.asarray(ring_xy)
+    b = np.roll(a, -1, axis=0)
+    return np.hstack((a, b))   # x1, y1, x2, y2
+
+
+def row_intervals(edges, ys):
+    """Dla każdego rzędu y lista odcinków (x_start, x_end) wewnątrz wielokąta."""
+    x1, y1, x2, y2 = edges.T
+    Y = ys[:, None]
+    # Przedział półotwarty — wierzchołek na linii liczony raz
+    crosses = ((y1 <= Y) & (Y < y2)) | ((y2 <= Y) & (Y < y1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X = x1 + (Y - y1) * (x2 - x1) / (y2 - y1)
+    X = np.where(crosses, X, np.inf)
+    X.sort(axis=1)
+    counts = crosses.sum(axis=1)
+
+    rows = []
+    for r in range(len(ys)):
+        xs = X[r, :counts[r] - counts[r] % 2]
+        rows.append([(xs[k], xs[k + 1]) for k in range(0, len(xs), 2) if xs[k + 1] > xs[k]])
+    return rows
+
+
+def decompose(rows, ys):
+    """Grupuje odcinki rzędów w komórki: listy (y, x_start, x_end) kolejnych rzędów."""
+    cells = []
+    open_cells = []   # (indeks komórki, ostatni odcinek)
+    for y, intervals in zip(ys, rows):
+        next_open = []
+        used = set()
+        for seg in intervals:
+            # Kontynuacja komórki, gdy dokładnie jedna otwarta komórka zachodzi na odcinek
+            # i odcinek jest jedynym, który na nią zachodzi
+            matches = [k for k, (_, last) in enumerate(open_cells)
+                       if last[0] < seg[1] and seg[0] < last[1]]
+            if len(matches) == 1 and matches[0] not in used:
+                last = open_cells[matches[0]][1]
+                overlapping = [s for s in intervals if last[0] < s[1] and s[0] < last[1]]
+                if len(overlapping) == 1:
+                    idx = open_cells[matches[0]][0]
+                    used.add(matches[0])
+                    cells[idx].append((y, seg[0], seg[1]))
+                    next_open.append((idx, seg))
+                    continue
+            cells.append([(y, seg[0], seg[1])])
+            next_open.append((len(cells) - 1, seg))
+        open_cells = next_open
+    return cells
+
+
+def sweep_cell(cell, start_left=True):
+    pts = []
+    left = start_left
+    for y, xa, xb in cell:
+        if left:
+            pts.extend(((xa, y), (xb, y)))
+        else:
+            pts.extend(((xb, y), (xa, y)))
+        left = not left
+    return pts
+
+
+def order_cells(cells, start=None):
+    """Zachłannie: następna komórka to ta, której najbliższy narożnik startowy jest najbliżej."""
+    if not cells:
+        return []
+    # Narożniki startowe każdej komórki: (od przodu | od tyłu) x (z lewej | z prawej)
+    first = np.array([cell[0] for cell in cells])
+    last = np.array([cell[-1] for cell in cells])
+    corners = np.stack((
+        first[:, [1, 0]], first[:, [2, 0]], last[:, [1, 0]], last[:, [2, 0]]
+    ), axis=1)   # (komórki, 4, [x, y])
+    remaining = np.ones(len(cells), dtype=bool)
+
+    route = []
+    pos = start
+    for _ in range(len(cells)):
+        if pos is None:
+            d = np.zeros(corners.shape[:2])
+        else:
+            d = np.hypot(corners[..., 0] - pos[0], corners[..., 1] - pos[1])
+        d[~remaining] = np.inf
+        idx, variant = divmod(int(np.argmin(d)), 4)
+        reverse, start_left = variant >= 2, variant % 2 == 0
+        remaining[idx] = False
+        rows = cells[idx][::-1] if reverse else cells[idx]
+        pts = sweep_cell(rows, start_left)
+        route.extend(pts)
+        pos = pts[-1]
+    return route
+
+
+def split_rows(rows, n_parts):
+    """Granice pasów rzędów o zbliżonej łącznej długości odcinków."""
+    lengths = np.array([sum(b - a for a, b in r) for r in rows])
+    total = lengths.sum()
+    if n_parts <= 1 or total <= 0:
+        return [(0, len(rows))]
+    cum = np.cumsum(lengths)
+    cuts = [0]
+    for k in range(1, n_parts):
+        cuts.append(int(np.searchsorted(cum, total * k / n_parts)) + 1)
+    cuts.append(len(rows))
+    cuts = np.maximum.accumulate(np.minimum(cuts, len(rows)))
+    return [(int(cuts[k]), int(cuts[k + 1])) for k in range(n_parts)]
+
+
+def path_length(xy):
+    if len(xy) < 2:
+        return 0.0
+    d = np.diff(np.asarray(xy), axis=0)
+    return float(np.hypot(d[:, 0], d[:, 1]).sum())
+
+
+def plan_lawnmower(polygon, spacing_m: float, angle_deg: float = 0.0, holes=(), n_drones: int = 1,
+                   start=None):
+    """
+    polygon/holes: listy [lat, lon]. Zwraca (trasy, liczba_rzędów), gdzie trasy to
+    n_drones par (punkty [lat, lon] gotowe do /api/mission/upload, długość_m).
+    start: [lat, lon] — trasa zaczyna się w narożniku najbliższym temu punktowi.
+    """
+    if len(polygon) < 3:
+        raise ValueError("Polygon needs at least 3 points")
+    if spacing_m <= 0:
+        raise ValueError("spacing_m must be > 0")
+    if n_drones < 1:
+        raise ValueError("At least one drone")
+
+    poly = np.asarray(polygon, dtype=float)
+    frame = LocalFrame(float(poly[:, 0].mean()), float(poly[:, 1].mean()), angle_deg)
+    outer = frame.to_xy(poly)
+    edges = [ring_edges(outer)]
+    for hole in holes or ():
+        if len(hole) >= 3:
+            edges.append(ring_edges(frame.to_xy(hole)))
+    edges = np.vstack(edges)
+
+    y_min, y_max = outer[:, 1].min(), outer[:, 1].max()
+    n_rows = max(1, int(math.ceil((y_max - y_min) / spacing_m)))
+    if n_rows > MAX_ROWS:
+        raise ValueError(f"Too many rows (max {MAX_ROWS}), increase spacing_m")
+    # Linie w środkach n_rows równych pasów (odstęp <= spacing_m) — bez
+    # niepokrytego paska przy krawędzi
+    step = (y_max - y_min) / n_rows
+    ys = y_min + (np.arange(n_rows) + 0.5) * step
+
+    rows = row_intervals(edges, ys)
+    start_xy = tuple(frame.to_xy([start])[0]) if start is not None else None
+    routes = []
+    for lo, hi in split_rows(rows, n_drones):
+        cells = decompose(rows[lo:hi], ys[lo:hi])
+        xy = order_cells(cells, start_xy)
+        routes.append(xy)
+
+    out = []
+    for xy in routes:
+        latlon = frame.to_latlon(xy).tolist() if xy else []
+        out.append((latlon, path_length(xy)))
+    return out, len(ys)
+
+
+# --- Podział obszaru między drony ---
+
+def signed_area(ring_xy) -> float:
+    x, y = ring_xy[:, 0], ring_xy[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def oriented(ring_xy, ccw: bool):
+    """Obwiednia przeciwnie do wskazówek zegara (ccw) albo zgodnie — dla dziur."""
+    return ring_xy if (signed_area(ring_xy) > 0) == ccw else ring_xy[::-1]
+
+
+def area_below(edges, c: float) -> float:
+    """Pole części obszaru z x <= c. edges: x1, y1, x2, y2 (obwiednia ccw, dziury cw)."""
+    x1, y1, x2, y2 = edges.T
+    in1, in2 = x1 <= c, x2 <= c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yq = y1 + (c - x1) * (y2 - y1) / (x2 - x1)
+    full = (x2 - x1) * (y1 + y2)
+    first = (c - x1) * (y1 + yq)     # od P1 (wewnątrz) do przecięcia
+    second = (x2 - c) * (yq + y2)    # od przecięcia do P2 (wewnątrz)
+    part = np.where(in1 & in2, full, np.where(in1 & ~in2, first, np.where(~in1 & in2, second, 0.0)))
+    # Dla obwiedni ccw ∮ y dx = -pole
+    return -0.5 * float(part.sum())
+
+
+def cut_for_fraction(edges, lo: float, hi: float, fraction: float, iterations: int = 60) -> float:
+    """Położenie linii x = c, po której lewej stronie leży `fraction` pola (bisekcja)."""
+    target = fraction * area_below(edges, hi)
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        if area_below(edges, mid) < target:
+            lo = mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+
+def clip_ring(ring_xy, c: float, keep_below: bool):
+    """Sutherland–Hodgman dla półpłaszczyzny x <= c (albo x >= c), wektorowo."""
+    a = ring_xy
+    b = np.roll(a, -1, axis=0)
+    ina = (a[:, 0] <= c) if keep_below else (a[:, 0] >= c)
+    inb = np.roll(ina, -1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (c - a[:, 0]) / (b[:, 0] - a[:, 0])
+    cross = np.column_stack((np.full(len(a), c), a[:, 1] + t * (b[:, 1] - a[:, 1])))
+    # Dla każdej krawędzi: [wierzchołek początkowy, jeśli wewnątrz][punkt przecięcia, jeśli krawędź przecina]
+    pts = np.stack((a, cross), axis=1).reshape(-1, 2)
+    keep = np.column_stack((ina, ina != inb)).reshape(-1)
+    return pts[keep]
+
+
+def _partition(outer, holes, drones):
+    """drones: lista (id, waga, (x, y)). Zwraca {id: (obwiednia, dziury)} w układzie lokalnym."""
+    if len(drones) == 1:
+        return {drones[0][0]: (outer, holes)}
+
+    # Cięcie prostopadle do dłuższego boku; osie zamieniamy, żeby zawsze ciąć po x
+    span = outer.max(axis=0) - outer.min(axis=0)
+    axis = 0 if span[0] >= span[1] else 1
+    swap = (lambda r: r[:, ::-1]) if axis == 1 else (lambda r: r)
+    o, hs = swap(outer), [swap(h) for h in holes]
+    # Zamiana osi odwraca orientację — przywracamy ccw/cw
+    o = oriented(o, True)
+    hs = [oriented(h, False) for h in hs]
+    edges = np.vstack([ring_edges(r) for r in [o] + hs])
+
+    drones = sorted(drones, key=lambda d: d[2][axis])
+    k = len(drones) // 2
+    fraction = sum(d[1] for d in drones[:k]) / sum(d[1] for d in drones)
+    c = cut_for_fraction(edges, float(o[:, 0].min()), float(o[:, 0].max()), fraction)
+
+    out = {}
+    for group, keep_below in ((drones[:k], True), (drones[k:], False)):
+        part = clip_ring(o, c, keep_below)
+        part_holes = [h for h in (clip_ring(h, c, keep_below) for h in hs) if len(h) >= 3]
+        out.update(_partition(swap(part), [swap(h) for h in part_holes], group))
+    return out
+
+
+def polygon_area(outer, holes) -> float:
+    return abs(signed_area(outer)) - sum(abs(signed_area(h)) for h in holes)
+
+
+def partition_area(polygon, drones, holes=()):
+    """
+    Podział wielokąta [lat, lon] na części o polach proporcjonalnych do wag.
+    drones: lista (id, waga, [lat, lon] albo None). Zwraca {id: (obwiednia, dziury, pole_m2)},
+    obwiednie jako listy [lat, lon].
+    """
+    if len(polygon) < 3:
+        raise ValueError("Polygon needs at least 3 points")
+    if not drones:
+        raise ValueError("At least one drone")
+    poly = np.asarray(polygon, dtype=float)
+    frame = LocalFrame(float(poly[:, 0].mean()), float(poly[:, 1].mean()))
+    outer = oriented(frame.to_xy(poly), True)
+    hole_xy = [oriented(frame.to_xy(h), False) for h in holes or () if len(h) >= 3]
+
+    center = tuple(outer.mean(axis=0))
+    local = []
+    for drone_id, weight, pos in drones:
+        if weight <= 0:
+            raise ValueError("Drone weights must be > 0")
+        xy = tuple(frame.to_xy([pos])[0]) if pos is not None else center
+        local.append((drone_id, float(weight), xy))
+
+    out = {}
+    for drone_id, (o, hs) in _partition(outer, hole_xy, local).items():
+        out[drone_id] = (
+            frame.to_latlon(o).tolist() if len(o) else [],
+            [frame.to_latlon(h).tolist() for h in hs],
+            polygon_area(o, hs) if len(o) >= 3 else 0.0
+        )
+    return out
+
+
+def plan_partition(polygon, drones, spacing_m: float, angle_deg: float = 0.0, holes=()):
+    """
+    Podział obszaru między drony + trasa pokrycia każdej części, zaczynająca się
+    najbliżej drona. Zwraca {id: {"waypoints", "length_m", "area_m2"}}.
+    """
+    positions = {d[0]: d[2] for d in drones}
+    plans = {}
+    for drone_id, (outer, part_holes, area) in partition_area(polygon, drones, holes).items():
+        if len(outer) < 3 or area <= 0:
+            plans[drone_id] = {"waypoints": [], "length_m": 0.0, "area_m2": 0.0}
+            continue
+        routes, _ = plan_lawnmower(outer, spacing_m, angle_deg, part_holes, 1, positions[drone_id])
+        waypoints, length = routes[0]
+        plans[drone_id] = {"waypoints": waypoints, "length_m": length, "area_m2": area}
+    return plans
@@ -0,0 +1,134 @@
+"""
+progress.py — postęp misji, ETA i prognoza baterii na koniec misji.
+
+Dla każdej wersji misji raz liczone są długości skumulowane wzdłuż łamanej
+punktów (cum[i] = droga od pierwszego punktu do i-tego), więc pozostały
+dystans przy celu target_wp to jedno odejmowanie plus odcinek od bieżącej
+pozycji do celu — O(1) na aktualizację. Geometrie ostatnich misji trzymane są
+w LRU, punkty dostarcza funkcja `load_waypoints(mission_id, version)`.
+
+Prędkość nad dnem i tempo zużycia baterii to EMA z kolejnych próbek
+(stała czasowa zależna od odstępu próbek, więc wynik nie zależy od częstości
+telemetrii). ETA = pozostały dystans / prędkość; przy postoju (prędkość
+poniżej MIN_SPEED) ETA i prognoza baterii są None.
+"""
+
+import math
+from collections import OrderedDict
+
+from spatial_index import M_PER_DEG
+
+# Kod target_wp oznaczający koniec misji (jak w symulatorach i panelu)
+WP_DONE = 999
+MIN_SPEED = 0.3      # m/s
+SPEED_TAU_S = 10.0
+BATTERY_TAU_S = 60.0
+EMPTY = {"remaining_m": None, "progress_pct": None, "speed_mps": None, "eta_s": None, "battery_at_end": None}
+
+
+class MissionPath:
+    """Łamana misji w lokalnym układzie metrycznym z długościami skumulowanymi."""
+
+    def __init__(self, waypoints):
+        pts = [(float(wp[0]), float(wp[1])) for wp in waypoints]
+        self.lat0 = sum(p[0] for p in pts) / len(pts) if pts else 0.0
+        self.lon0 = sum(p[1] for p in pts) / len(pts) if pts else 0.0
+        self.kx = M_PER_DEG * math.cos(math.radians(self.lat0))
+        self.xy = [self.to_xy(lat, lon) for lat, lon in pts]
+        self.cum = [0.0]
+        for (x1, y1), (x2, y2) in zip(self.xy, self.xy[1:]):
+            self.cum.append(self.cum[-1] + math.hypot(x2 - x1, y2 - y1))
+        self.total = self.cum[-1]
+
+    def to_xy(self, lat: float, lon: float):
+        return (lon - self.lon0) * self.kx, (lat - self.lat0) * M_PER_DEG
+
+    def remaining(self, lat: float, lon: float, target_idx: int) -> float:
+        """Droga: bieżąca pozycja -> punkt target_idx (0..n-1) -> dalej po łamanej do końca."""
+        if target_idx >= len(self.xy):
+            return 0.0
+        x, y = self.to_xy(lat, lon)
+        tx, ty = self.xy[target_idx]
+        return math.hypot(tx - x, ty - y) + (self.total - self.cum[target_idx])
+
+
+class ProgressTracker:
+    def __init__(self, load_waypoints, cache_size: int = 256):
+        self.load_waypoints = load_waypoints
+        self.cache_size = cache_size
+        self.paths = OrderedDict()   # (mission_id, version) -> MissionPath
+        # drone_id -> [lat, lon, t, prędkość_ema, bateria, tempo_baterii_ema (%/s), liczba_próbek]
+        self.motion = {}
+        self.latest = {}             # drone_id -> ostatnio policzone pola
+
+    def path(self, mission: dict):
+        key = (mission.get("id"), mission.get("version"))
+        path = self.paths.get(key)
+        if path is None:
+            waypoints = self.load_waypoints(*key)
+            if not waypoints:
+                return None
+            path = self.paths[key] = MissionPath(waypoints)
+            while len(self.paths) > self.cache_size:
+                self.paths.popitem(last=False)
+        else:
+            self.paths.move_to_end(key)
+        return path
+
+    def observe(self, drone_id, lat: float, lon: float, battery, t: float) -> None:
+        m = self.motion.get(drone_id)
+        if m is None:
+            self.motion[drone_id] = [lat, lon, t, 0.0, battery, 0.0, 1]
+            return
+        dt = t - m[2]
+        if dt <= 1e-3:
+            return
+        dist = math.hypot((lon - m[1]) * M_PER_DEG * math.cos(math.radians(lat)), (lat - m[0]) * M_PER_DEG)
+        # Pierwszy odcinek inicjuje średnie (bez ściągania do zera)
+        first = m[6] == 1
+        a = 1.0 if first else 1.0 - math.exp(-dt / SPEED_TAU_S)
+        m[3] += a * (dist / dt - m[3])
+        if battery is not None and m[4] is not None:
+            b = 1.0 if first else 1.0 - math.exp(-dt / BATTERY_TAU_S)
+            m[5] += b * ((m[4] - battery) / dt - m[5])
+        m[0], m[1], m[2], m[4] = lat, lon, t, battery
+        m[6] += 1
+
+    def update(self, drone_id, d_data: dict) -> dict:
+        """Nowa próbka drona (wpis ze stanu) -> pola postępu do widoku."""
+        telemetry = d_data.get("telemetry") or {}
+        lat, lon = telemetry.get("lat"), telemetry.get("lon")
+        if lat is None or lon is None:
+            return self.latest.get(drone_id, EMPTY)
+        battery = telemetry.get("battery")
+        self.observe(drone_id, lat, lon, battery, d_data.get("last_seen", 0))
+
+        mission = d_data.get("current_mission")
+        path = self.path(mission) if mission else None
+        if path is None:
+            out = EMPTY
+        else:
+            speed = self.motion[drone_id][3]
+            drain = self.motion[drone_id][5]
+            target_wp = telemetry.get("target_wp") or 0
+            if target_wp == WP_DONE or target_wp > len(path.xy):
+                remaining = 0.0
+            else:
+                remaining = path.remaining(lat, lon, max(target_wp - 1, 0))
+            eta = remaining / speed if speed >= MIN_SPEED else (0.0 if remaining == 0 else None)
+            battery_end = None
+            if eta is not None and battery is not None:
+                battery_end = round(battery - max(drain, 0.0) * eta, 1)
+            done = 100.0 * (1.0 - remaining / path.total) if path.total > 0 else (100.0 if remaining == 0 else 0.0)
+            out = {
+                "remaining_m": round(remaining),
+                "progress_pct": round(min(max(done, 0.0), 100.0), 1),
+                "speed_mps": round(speed, 1),
+                "eta_s": round(eta) if eta is not None else None,
+                "battery_at_end": battery_end
+            }
+        self.latest[drone_id] = out
+        return out
+
+    def get(self, drone_id) -> dict:
+        return self.latest.get(drone_id, EMPTY)
@@ -0,0 +1,159 @@
+"""
+proximity.py — monitor ryzyka kolizji całej floty (po stronie serwera).
+
+Prędkość każdego drona szacowana jest z kolejnych próbek pozycji (różnica
+w lokalnym układzie metrycznym, wygładzona EMA). W każdym ticku dla par
+dronów, które mogą się zbliżyć w horyzoncie `horizon_s`, liczony jest punkt
+największego zbliżenia (CPA) przy stałych prędkościach:
+
+    t_cpa = clip(-(dp · dv) / |dv|², 0, horizon_s)
+    d_cpa = |dp + dv * t_cpa|
+
+Kandydatów wybiera hash przestrzenny: komórki o boku R = d_alert +
+2 * v_max * horizon_s, więc parę trzeba sprawdzić tylko, gdy drony leżą
+w tej samej lub sąsiedniej komórce. Przy rozproszonej flocie to ~O(N)
+zamiast O(N²); sam CPA liczony jest wektorowo (numpy) dla wszystkich par.
+"""
+
+import math
+
+import numpy as np
+
+R_EARTH = 6371000.0
+M_PER_DEG = math.pi * R_EARTH / 180.0
+
+# Sąsiednie komórki "do przodu" — każda para komórek odwiedzana raz
+_FORWARD = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class ProximityMonitor:
+    def __init__(self, alert_distance_m: float = 10.0, horizon_s: float = 10.0,
+                 max_speed: float = 30.0, stale_s: float = 5.0, smoothing: float = 0.5):
+        self.alert_distance_m = alert_distance_m
+        self.horizon_s = horizon_s
+        self.max_speed = max_speed
+        self.stale_s = stale_s
+        self.smoothing = smoothing
+        # drone_id -> [lat, lon, t, vx, vy]  (vx na wschód, vy na północ, m/s)
+        self.tracks = {}
+        self.last_pairs = 0
+
+    def observe(self, drone_id, lat: float, lon: float, t: float) -> None:
+        track = self.tracks.get(drone_id)
+        if track is None:
+            self.tracks[drone_id] = [lat, lon, t, 0.0, 0.0]
+            return
+        dt = t - track[2]
+        if dt <= 1e-3:
+            # Ta sama próbka (np. zmiana misji bez nowej telemetrii)
+            return
+        if dt > self.stale_s:
+            vx = vy = 0.0
+        else:
+            vx = (lon - track[1]) * M_PER_DEG * math.cos(math.radians(lat)) / dt
+            vy = (lat - track[0]) * M_PER_DEG / dt
+            speed = math.hypot(vx, vy)
+            if speed > self.max_speed:
+                # Skok GPS — nie pozwalamy mu rozdmuchać promienia wyszukiwania
+                vx *= self.max_speed / speed
+                vy *= self.max_speed / speed
+            a = self.smoothing
+            vx = a * vx + (1 - a) * track[3]
+            vy = a * vy + (1 - a) * track[4]
+        self.tracks[drone_id] = [lat, lon, t, vx, vy]
+
+    def candidate_pairs(self, x, y, cell_m):
+        """Indeksy (i, j) par w tej samej lub sąsiedniej komórce — w pełni wektorowo."""
+        cx = np.floor(x / cell_m).astype(np.int64)
+        cy = np.floor(y / cell_m).astype(np.int64)
+        cy -= cy.min() - 1
+        stride = int(cy.max()) + 2
+        keys = cx * stride + cy
+
+        order = np.argsort(keys, kind="stable")
+        cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+        left, right = [], []
+        for di, dj in ((0, 0),) + _FORWARD:
+            target = cells + di * stride + dj
+            pos = np.searchsorted(cells, target)
+            pos_ok = pos < len(cells)
+            hit = np.zeros(len(cells), dtype=bool)
+            hit[pos_ok] = cells[pos[pos_ok]] == target[pos_ok]
+            a = np.nonzero(hit)[0]
+            b = pos[hit]
+            if not len(a):
+                continue
+            ca, cb = counts[a], counts[b]
+            sizes = ca * cb
+            pair = np.repeat(np.arange(len(a)), sizes)
+            k = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            li = k // cb[pair]
+            lj = k % cb[pair]
+            if di == 0 and dj == 0:
+                keep = li < lj
+                pair, li, lj = pair[keep], li[keep], lj[keep]
+            left.append(order[starts[a][pair] + li])
+            right.append(order[starts[b][pair] + lj])
+        if not left:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(left), np.concatenate(right)
+
+    def check(self, now: float) -> list:
+        """Lista alertów {"drones", "distance_m", "tcpa_s", "dcpa_m"} dla par zagrożonych w horyzoncie."""
+        for d_id in [d for d, tr in self.tracks.items() if now - tr[2] > self.stale_s]:
+            del self.tracks[d_id]
+        if len(self.tracks) < 2:
+            self.last_pairs = 0
+            return []
+
+        ids = list(self.tracks.keys())
+        data = np.array(list(self.tracks.values()), dtype=float)
+        lat, lon, t, vx, vy = data.T
+
+        # Lokalny układ metryczny wokół środka floty; pozycje ekstrapolowane na "teraz"
+        cos0 = math.cos(math.radians(float(lat.mean())))
+        age = now - t
+        x = (lon - lon.mean()) * M_PER_DEG * cos0 + vx * age
+        y = (lat - lat.mean()) * M_PER_DEG + vy * age
+
+        v_max = float(np.hypot(vx, vy).max())
+        cell_m = max(self.alert_distance_m + 2.0 * v_max * self.horizon_s, 1.0)
+        i, j = self.candidate_pairs(x, y, cell_m)
+        self.last_pairs = len(i)
+        if not len(i):
+            return []
+
+        dpx, dpy = x[j] - x[i], y[j] - y[i]
+        dvx, dvy = vx[j] - vx[i], vy[j] - vy[i]
+        dv2 = dvx * dvx + dvy * dvy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tcpa = np.where(dv2 > 1e-9, -(dpx * dvx + dpy * dvy) / dv2, 0.0)
+        tcpa = np.clip(tcpa, 0.0, self.horizon_s)
+        dcpa = np.hypot(dpx + dvx * tcpa, dpy + dvy * tcpa)
+
+        risky = np.nonzero(dcpa < self.alert_distance_m)[0]
+        dist = np.hypot(dpx[risky], dpy[risky])
+        alerts = []
+        for k, p in enumerate(risky.tolist()):
+            a, b = sorted((ids[i[p]], ids[j[p]]))
+            alerts.append({
+                "drones": [a, b],
+                "distance_m": round(float(dist[k]), 2),
+                "tcpa_s": round(float(tcpa[p]), 2),
+                "dcpa_m": round(float(dcpa[p]), 2)
+            })
+        alerts.sort(key=lambda al: (al["tcpa_s"], al["dcpa_m"]))
+        return alerts
+
+
+def alerts_by_drone(alerts: list) -> dict:
+    """{drone_id: [{"other", "distance_m", "tcpa_s", "dcpa_m"}, ...]} do odpowiedzi dla dronów."""
+    out = {}
+    for al in alerts:
+        a, b = al["drones"]
+        info = {k: al[k] for k in ("distance_m", "tcpa_s", "dcpa_m")}
+        out.setdefault(a, []).append(dict(info, other=b))
+        out.setdefault(b, []).append(dict(info, other=a))
+    return out
@@ -0,0 +1,226 @@
+"""
+route_opt.py — kolejność punktów misji (otwarta trasa komiwojażera).
+
+Punkty rzutowane są do lokalnego układu metrycznego (LocalFrame z planner.py).
+Listy NEIGHBOURS najbliższych sąsiadów każdego punktu liczone są z macierzy
+odległości blokami numpy. Trasa startowa to najbliższy sąsiad (z list, pełne
+przeszukanie wektorowe tylko, gdy cała lista jest już odwiedzona), potem
+lokalne ulepszenia 2-opt i Or-opt (przeniesienie odcinka 1-3 punktów, także
+odwróconego).
+
+Ruchy sprawdzane są tylko dla sąsiadów z list, z kolejką "do sprawdzenia"
+(don't-look bits), więc jeden przebieg kosztuje ~O(N·K), a nie O(N²).
+Ulepszanie kończy się po time_limit_s.
+
+Trasa jest otwarta: na obu końcach stoi wirtualny punkt V o zerowej
+odległości do wszystkich, więc ruchy mogą zmieniać punkty końcowe. Przy
+stałym starcie (pozycja drona) pierwszy punkt trasy nie bierze udziału
+w ruchach.
+"""
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from planner import LocalFrame
+
+NEIGHBOURS = 10
+MAX_POINTS = 5000
+# Wiersze macierzy odległości liczone naraz przy budowie list sąsiadów
+_BLOCK = 256
+_EPS = 1e-9
+
+
+def neighbour_lists(xy, k: int):
+    """k najbliższych sąsiadów każdego punktu, rosnąco po odległości."""
+    n = len(xy)
+    k = min(k, n - 1)
+    pts = xy.astype(np.float32)
+    out = np.empty((n, k), dtype=np.int64)
+    for lo in range(0, n, _BLOCK):
+        hi = min(lo + _BLOCK, n)
+        # Kwadraty odległości wystarczą do porównań
+        d = (pts[lo:hi, None, 0] - pts[None, :, 0]) ** 2 + (pts[lo:hi, None, 1] - pts[None, :, 1]) ** 2
+        d[np.arange(hi - lo), np.arange(lo, hi)] = np.inf
+        part = np.argpartition(d, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(d, part, axis=1), axis=1)
+        out[lo:hi] = np.take_along_axis(part, order, axis=1)
+    return out
+
+
+def nearest_neighbour(xy, neigh, first: int = 0):
+    """Najbliższy nieodwiedzony z listy sąsiadów; pełne przeszukanie tylko, gdy wszyscy odwiedzeni."""
+    n = len(xy)
+    remaining = np.ones(n, dtype=bool)
+    visited = [False] * n
+    neigh = neigh.tolist()
+    route = [first]
+    remaining[first] = False
+    visited[first] = True
+    cur = first
+    for _ in range(n - 1):
+        nxt = next((c for c in neigh[cur] if not visited[c]), None)
+        if nxt is None:
+            d = np.hypot(xy[:, 0] - xy[cur, 0], xy[:, 1] - xy[cur, 1])
+            d[~remaining] = np.inf
+            nxt = int(np.argmin(d))
+        cur = nxt
+        remaining[cur] = False
+        visited[cur] = True
+        route.append(cur)
+    return route
+
+
+def path_length(xy, route) -> float:
+    if len(route) < 2:
+        return 0.0
+    d = np.diff(xy[route], axis=0)
+    return float(np.hypot(d[:, 0], d[:, 1]).sum())
+
+
+def improve(xy, route, neigh, fixed_start: bool, deadline: float):
+    """2-opt + Or-opt na otwartej trasie (lista indeksów). Zwraca (trasa, liczba_ruchów)."""
+    xs, ys = xy[:, 0].tolist(), xy[:, 1].tolist()
+    neigh = neigh.tolist()
+    V = len(xs)
+
+    def d(a, b):
+        if a == V or b == V:
+            return 0.0
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    q = [V] + list(route) + [V]
+    pos = [0] * (V + 1)
+    for k in range(1, len(q) - 1):
+        pos[q[k]] = k
+    lo_min = 2 if fixed_start else 1
+    hi_max = len(q) - 2
+
+    def renumber(lo, hi):
+        for k in range(lo, hi + 1):
+            pos[q[k]] = k
+
+    def two_opt(a):
+        i = pos[a]
+        for step in (1, -1):
+            b = q[i + step]
+            dab = d(a, b)
+            for c in neigh[a]:
+                dac = d(a, c)
+                if dac >= dab:
+                    break
+                j = pos[c]
+                e = q[j + step]
+                if e == a:
+                    continue
+                if dab + d(c, e) - dac - d(b, e) <= _EPS:
+                    continue
+                if step == 1:
+                    lo, hi = (i + 1, j) if j > i else (j + 1, i)
+                else:
+                    lo, hi = (i, j - 1) if j > i else (j, i - 1)
+                if lo < lo_min or hi > hi_max or lo >= hi:
+                    continue
+                q[lo:hi + 1] = q[lo:hi + 1][::-1]
+                renumber(lo, hi)
+                return (a, b, c, e)
+        return None
+
+    def or_opt(a):
+        i = pos[a]
+        for length in (1, 2, 3):
+            if i < lo_min or i + length - 1 > hi_max:
+                break
+            s1, s2 = q[i], q[i + length - 1]
+            p, nx = q[i - 1], q[i + length]
+            removed = d(p, s1) + d(s2, nx) - d(p, nx)
+            if removed <= _EPS:
+                continue
+            edges = set()
+            for c in neigh[s1] + neigh[s2]:
+                k = pos[c]
+                edges.add(k)
+                edges.add(k - 1)
+            for k in sorted(edges):
+                # Krawędź (q[k], q[k+1]) poza przenoszonym odcinkiem i jego sąsiedztwem
+                if i - 1 <= k <= i + length - 1 or k < lo_min - 1 or k > hi_max:
+                    continue
+                u, w = q[k], q[k + 1]
+                duw = d(u, w)
+                forward = d(u, s1) + d(s2, w) - duw
+                backward = d(u, s2) + d(s1, w) - duw
+                added = min(forward, backward)
+                if removed - added <= _EPS:
+                    continue
+                seg = q[i:i + length]
+                if backward < forward:
+                    seg.reverse()
+                del q[i:i + length]
+                at = k + 1 if k < i else k - length + 1
+                q[at:at] = seg
+                renumber(min(i, at), max(i + length, at + length) - 1)
+                return (p, nx, u, w, s1, s2)
+        return None
+
+    queue = deque(route)
+    queued = [True] * V
+    moves = 0
+    while queue and time.perf_counter() < deadline:
+        a = queue.popleft()
+        queued[a] = False
+        touched = two_opt(a) or or_opt(a)
+        if touched is None:
+            continue
+        moves += 1
+        for node in touched:
+            if node != V and not queued[node]:
+                queued[node] = True
+                queue.append(node)
+    return q[1:-1], moves
+
+
+def optimize_route(waypoints, start=None, time_limit_s: float = 1.0):
+    """
+    waypoints: lista [lat, lon]; start: [lat, lon] drona albo None (dowolny początek).
+    Zwraca słownik: "order" (indeksy punktów wejściowych w nowej kolejności),
+    "length_m", "original_length_m" (kolejność wejściowa; obie z odcinkiem od startu), "moves".
+    """
+    n = len(waypoints)
+    if n < 1:
+        raise ValueError("At least one waypoint")
+    if n > MAX_POINTS:
+        raise ValueError(f"Too many waypoints (max {MAX_POINTS})")
+    deadline = time.perf_counter() + time_limit_s
+
+    pts = np.asarray(waypoints, dtype=float)
+    if pts.ndim != 2 or pts.shape[1] < 2:
+        raise ValueError("Waypoints must be [lat, lon] pairs")
+    pts = pts[:, :2]
+    fixed_start = start is not None
+    if fixed_start:
+        pts = np.vstack(([float(start[0]), float(start[1])], pts))
+    frame = LocalFrame(float(pts[:, 0].mean()), float(pts[:, 1].mean()))
+    xy = frame.to_xy(pts)
+
+    original = list(range(len(xy)))
+    route, moves = original, 0
+    if len(xy) > 2:
+        neigh = neighbour_lists(xy, NEIGHBOURS)
+        route = nearest_neighbour(xy, neigh, 0)
+        route, moves = improve(xy, route, neigh, fixed_start, deadline)
+
+    length = path_length(xy, route)
+    original_length = path_length(xy, original)
+    if length > original_length:
+        # Kolejność wejściowa bywa już lepsza niż heurystyka przy ucięciu czasu
+        route, length = original, original_length
+
+    order = [k - 1 for k in route[1:]] if fixed_start else route
+    return {
+        "order": order,
+        "length_m": length,
+        "original_length_m": original_length,
+        "moves": moves
+    }
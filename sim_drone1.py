@@ -5,6 +5,7 @@ import numpy as np
 
 # --- KONFIGURACJA ---
 BACKEND_URL = "https://drone-backend-2-1mwz.onrender.com/api/telemetry"
+MISSION_URL = BACKEND_URL.rsplit("/telemetry", 1)[0] + "/mission"
 API_KEY = "ZTBdrony"
 DRONE_ID = "skimmer1"
 START_LAT = 52.2297
@@ -26,6 +27,23 @@ class LocalFrame:
         lon = self.lon0 + (x / (self.R * np.cos(self.lat0 * np.pi/180))) * (180/np.pi)
         return lat, lon
 
+def fetch_waypoints(mission, have_version, have_wps, headers, http=requests):
+    # Serwer w odpowiedzi na telemetrię podaje tylko {id, version}; punkty
+    # pobieramy osobno, a dla nowej wersji tej samej misji — tylko różnicę
+    params = {"version": mission.get("version")}
+    if have_version is not None:
+        params["since_version"] = have_version
+    resp = http.get(f"{MISSION_URL}/{mission.get('id')}", params=params, headers=headers, timeout=2)
+    resp.raise_for_status()
+    data = resp.json()
+    if "diff" in data:
+        wps = list(have_wps)
+        # Operacje splice z indeksami starej listy — stosujemy od końca
+        for op in reversed(data["diff"]):
+            wps[op["start"]:op["start"] + op["delete"]] = op["insert"]
+        return wps
+    return data.get("waypoints", [])
+
 class AdaptiveFuzzyController:
     def __init__(self):
         self.K_PSI = 2.5
@@ -94,39 +112,51 @@ class PhysicsModel:
         self.r += acc_r * dt
         return self.u, self.r
 
-def main():
-    geo = LocalFrame(START_LAT, START_LON)
-    logic = AdaptiveFuzzyController()
-    physics = PhysicsModel()
-
-    local_x, local_y = 0.0, 0.0
-    yaw = 0.0
-    
-    # Stan drona
-    current_data = {
-        "lat": START_LAT, "lon": START_LON, "alt": 10.0, "battery": 100.0,
-        "roll": 0.0, "pitch": 0.0, "yaw": 0.0,
-        "role": "None", "mission_id": None, "mission_status": "nothing",
-        "current_wp_index": 0
-    }
-    
-    full_mission_path_xy = []
-    
-    dt = 0.1 
-    headers = {"X-Drone-Token": API_KEY, "Content-Type": "application/json"}
+def log_print(msg):
+    print(msg, flush=True)
 
-    print(f"--- Start LEADER: {DRONE_ID} ---", flush=True)
+class LeaderSim:
+    """
+    Jeden krok pętli lidera na wywołanie step(). `http` to moduł requests albo
+    obiekt o tym samym interfejsie (get/post) — np. klient testowy app.py
+    w sim_headless.py; `clock` to moduł time albo zegar symulacji (time/sleep).
+    """
 
-    while True:
+    def __init__(self, http=requests, clock=time, drone_id=DRONE_ID, log=log_print):
+        self.http = http
+        self.clock = clock
+        self.drone_id = drone_id
+        self.log = log
+        self.geo = LocalFrame(START_LAT, START_LON)
+        self.logic = AdaptiveFuzzyController()
+        self.physics = PhysicsModel()
+
+        self.local_x, self.local_y = 0.0, 0.0
+        self.yaw = 0.0
+
+        # Stan drona
+        self.current_data = {
+            "lat": START_LAT, "lon": START_LON, "alt": 10.0, "battery": 100.0,
+            "roll": 0.0, "pitch": 0.0, "yaw": 0.0,
+            "role": "None", "mission_id": None, "mission_version": None, "mission_wps": [],
+            "mission_status": "nothing",
+            "current_wp_index": 0
+        }
+        self.full_mission_path_xy = []
+        self.headers = {"X-Drone-Token": API_KEY, "Content-Type": "application/json"}
+
+    def step(self, dt, send=True):
+        current_data = self.current_data
+        physics = self.physics
         target_xy = None
         
         # --- 1. LOGIKA WYBORU CELU ---
         if current_data["mission_status"] == "active":
-            if full_mission_path_xy and current_data["current_wp_index"] < len(full_mission_path_xy):
-                target_xy = full_mission_path_xy[current_data["current_wp_index"]]
+            if self.full_mission_path_xy and current_data["current_wp_index"] < len(self.full_mission_path_xy):
+                target_xy = self.full_mission_path_xy[current_data["current_wp_index"]]
             else:
                 # KONIEC TRASY -> ZMIANA STANU NA DONE
-                print("🏁 Misja zakończona (osiągnięto ostatni punkt). Czekam.", flush=True)
+                self.log("🏁 Misja zakończona (osiągnięto ostatni punkt). Czekam.")
                 current_data["mission_status"] = "done"
 
         # --- 2. OBLICZENIA FIZYKI ---
@@ -134,13 +164,13 @@ def main():
         
         if target_xy:
             # Lecimy do punktu
-            state = {'x': local_x, 'y': local_y, 'yaw': yaw, 'r': physics.r, 'u': physics.u}
-            fx, tz = logic.compute(state, target_xy, dt)
+            state = {'x': self.local_x, 'y': self.local_y, 'yaw': self.yaw, 'r': physics.r, 'u': physics.u}
+            fx, tz = self.logic.compute(state, target_xy, dt)
             
             # Sprawdzenie zaliczenia punktu
-            dist_to_wp = math.hypot(target_xy[0] - local_x, target_xy[1] - local_y)
+            dist_to_wp = math.hypot(target_xy[0] - self.local_x, target_xy[1] - self.local_y)
             if dist_to_wp < WP_TOLERANCE: 
-                print(f"🎯 Zaliczo WP #{current_data['current_wp_index'] + 1}", flush=True)
+                self.log(f"🎯 Zaliczo WP #{current_data['current_wp_index'] + 1}")
                 current_data["current_wp_index"] += 1
         elif current_data["mission_status"] == "done":
             # Tryb HOVER (wiszenie) - aktywne hamowanie
@@ -149,14 +179,20 @@ def main():
         
         # Krok fizyki
         physics.step(fx, tz, dt)
-        local_x += physics.u * math.cos(yaw) * dt
-        local_y += physics.u * math.sin(yaw) * dt
-        yaw += physics.r * dt
-        yaw = math.atan2(math.sin(yaw), math.cos(yaw))
+        self.local_x += physics.u * math.cos(self.yaw) * dt
+        self.local_y += physics.u * math.sin(self.yaw) * dt
+        self.yaw += physics.r * dt
+        self.yaw = math.atan2(math.sin(self.yaw), math.cos(self.yaw))
 
         # Konwersja na GPS
-        new_lat, new_lon = geo.xy_to_gps(local_x, local_y)
+        new_lat, new_lon = self.geo.xy_to_gps(self.local_x, self.local_y)
+        current_data["lat"], current_data["lon"] = new_lat, new_lon
         current_data["battery"] = max(0, current_data["battery"] - 0.01)
+        if send:
+            self.send_telemetry()
+
+    def send_telemetry(self):
+        current_data = self.current_data
 
         # --- 3. WYSYŁANIE TELEMETRII ---
         # Jeśli misja aktywna, pokazujemy nr WP, jeśli zakończona, pokazujemy "Koniec" (jako np. max+1)
@@ -167,66 +203,83 @@ def main():
             wp_display = 999 # Kod dla frontend, że koniec (lub po prostu ostatni znany)
 
         payload = {
-            "drone_id": DRONE_ID,
-            "lat": new_lat, "lon": new_lon, "alt": 10,
+            "drone_id": self.drone_id,
+            "lat": current_data["lat"], "lon": current_data["lon"], "alt": 10,
             "battery": round(current_data["battery"], 1),
-            "roll": 0, "pitch": 0, "yaw": round(math.degrees(yaw), 2),
+            "roll": 0, "pitch": 0, "yaw": round(math.degrees(self.yaw), 2),
             "target_wp": wp_display
         }
 
         try:
-            resp = requests.post(BACKEND_URL, json=payload, headers=headers, timeout=1)
+            resp = self.http.post(BACKEND_URL, json=payload, headers=self.headers, timeout=1)
             
             if resp.status_code == 200:
-                data = resp.json()
-                
-                # --- 4. ODBIÓR NOWEJ MISJI I AKTUALIZACJA W LOCIE ---
-                server_mission = data.get("mission")
-                
-                # Jeśli serwer ma misję, a my mamy inną ID (lub wcale)
-                if server_mission:
-                    msn_id = server_mission.get("id")
-                    if msn_id != current_data["mission_id"]:
-                        print(f"📜 Aktualizacja misji! ID: {msn_id}", flush=True)
-                        current_data["mission_id"] = msn_id
-                        
-                        # Przeliczamy nowe punkty
-                        raw_wps = server_mission.get("waypoints", [])
-                        new_path_xy = []
-                        for wp in raw_wps:
-                            wx, wy = geo.gps_to_xy(wp[0], wp[1])
-                            new_path_xy.append((wx, wy))
-                        
-                        full_mission_path_xy = new_path_xy
-                        current_data["mission_status"] = "active"
-                        
-                        # === SMART RESUME (Znajdź najbliższy punkt) ===
-                        # Zamiast resetować do 0, znajdźmy najbliższy punkt w nowej trasie
-                        best_idx = 0
-                        min_dist = float('inf')
-                        
-                        # Sprawdzamy, który punkt z NOWEJ trasy jest najbliżej obecnej pozycji drona
-                        for i, (wx, wy) in enumerate(full_mission_path_xy):
-                            d = math.hypot(wx - local_x, wy - local_y)
-                            if d < min_dist:
-                                min_dist = d
-                                best_idx = i
-                        
-                        # Ustawiamy cel na ten punkt (lub następny, jeśli jesteśmy bardzo blisko)
-                        current_data["current_wp_index"] = best_idx
-                        print(f"🔄 Wznawiam od punktu #{best_idx + 1} (Najbliższy)", flush=True)
-
-                elif not server_mission and current_data["mission_status"] in ["active", "done"]:
-                     # Użytkownik kliknął STOP
-                     print("🛑 Komenda STOP.", flush=True)
-                     current_data["mission_status"] = "nothing"
-                     current_data["mission_id"] = None
-                     full_mission_path_xy = []
-                     
+                self.handle_response(resp.json())
         except Exception:
             pass
-            
-        time.sleep(dt)
+
+    def handle_response(self, data):
+        current_data = self.current_data
+
+        # --- 4. ODBIÓR NOWEJ MISJI I AKTUALIZACJA W LOCIE ---
+        server_mission = data.get("mission")
+        
+        # Jeśli serwer ma misję, a my mamy inną ID/wersję (lub wcale)
+        if server_mission:
+            msn_id = server_mission.get("id")
+            msn_version = server_mission.get("version")
+            if (msn_id, msn_version) != (current_data["mission_id"], current_data["mission_version"]):
+                same = msn_id == current_data["mission_id"]
+                raw_wps = fetch_waypoints(server_mission, current_data["mission_version"] if same else None,
+                                          current_data["mission_wps"], self.headers, self.http)
+                self.log(f"📜 Aktualizacja misji! ID: {msn_id} (wersja {msn_version})")
+                current_data["mission_id"] = msn_id
+                current_data["mission_version"] = msn_version
+                current_data["mission_wps"] = raw_wps
+                
+                # Przeliczamy nowe punkty
+                new_path_xy = []
+                for wp in raw_wps:
+                    wx, wy = self.geo.gps_to_xy(wp[0], wp[1])
+                    new_path_xy.append((wx, wy))
+                
+                self.full_mission_path_xy = new_path_xy
+                current_data["mission_status"] = "active"
+                
+                # === SMART RESUME (Znajdź najbliższy punkt) ===
+                # Zamiast resetować do 0, znajdźmy najbliższy punkt w nowej trasie
+                best_idx = 0
+                min_dist = float('inf')
+                
+                # Sprawdzamy, który punkt z NOWEJ trasy jest najbliżej obecnej pozycji drona
+                for i, (wx, wy) in enumerate(self.full_mission_path_xy):
+                    d = math.hypot(wx - self.local_x, wy - self.local_y)
+                    if d < min_dist:
+                        min_dist = d
+                        best_idx = i
+                
+                # Ustawiamy cel na ten punkt (lub następny, jeśli jesteśmy bardzo blisko)
+                current_data["current_wp_index"] = best_idx
+                self.log(f"🔄 Wznawiam od punktu #{best_idx + 1} (Najbliższy)")
+
+        elif not server_mission and current_data["mission_status"] in ["active", "done"]:
+             # Użytkownik kliknął STOP
+             self.log("🛑 Komenda STOP.")
+             current_data["mission_status"] = "nothing"
+             current_data["mission_id"] = None
+             current_data["mission_version"] = None
+             current_data["mission_wps"] = []
+             self.full_mission_path_xy = []
+
+def main():
+    sim = LeaderSim()
+    dt = 0.1 
+
+    print(f"--- Start LEADER: {DRONE_ID} ---", flush=True)
+
+    while True:
+        sim.step(dt)
+        sim.clock.sleep(dt)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,16 +4,16 @@ import math
 import numpy as np
 
 # --- KONFIGURACJA ---
-BACKEND_URL_DRONES = "https://drone-backend-2-1mwz.onrender.com/api/drones"
 BACKEND_URL_TELEM = "https://drone-backend-2-1mwz.onrender.com/api/telemetry"
 
 API_KEY = "ZTBdrony"
 DRONE_ID = "follower1"
-LEADER_ID = "skimmer1" 
+# Formację ustawia panel/operator na serwerze, np.:
+#   POST /api/formation {"leader": "skimmer1", "followers": {"follower1": [-8, 0]}}
+# (8 m za liderem). Punkt docelowy przychodzi w odpowiedzi na telemetrię.
 START_LAT = 52.2297
 START_LON = 21.0120 
 
-TARGET_DISTANCE = 8.0   
 ZONE_RED = 3.0          
 
 class LocalFrame:
@@ -107,75 +107,81 @@ class PhysicsModel:
         self.r += acc_r * dt
         return self.u, self.r
 
-def main():
-    geo = LocalFrame(START_LAT, START_LON)
-    logic = AdaptiveFuzzyController()
-    physics = PhysicsModel()
-
-    local_x, local_y = -10.0, -10.0 
-    yaw = 0.0
-    
-    current_data = {"role": "follower", "battery": 95.0}
-    dt = 0.1
-    headers = {"X-Drone-Token": API_KEY, "Content-Type": "application/json"}
-    
-    print(f"--- Start FOLLOWER: {DRONE_ID} ---", flush=True)
-
-    while True:
-        leader_state = None
-        
-        try:
-            resp = requests.get(BACKEND_URL_DRONES, timeout=2)
-            if resp.status_code == 200:
-                drones = resp.json()
-                for d in drones:
-                    if d.get('drone_id') == LEADER_ID:
-                        leader_state = d
-                        break
-        except Exception: 
-            pass
-
+class FollowerSim:
+    """
+    Jeden krok pętli followera na wywołanie step(). `http` to moduł requests
+    albo obiekt o tym samym interfejsie (post), `clock` — moduł time albo
+    zegar symulacji (jak LeaderSim w sim_drone1.py).
+    """
+
+    def __init__(self, http=requests, clock=time, drone_id=DRONE_ID, start_xy=(-10.0, -10.0)):
+        self.http = http
+        self.clock = clock
+        self.drone_id = drone_id
+        self.geo = LocalFrame(START_LAT, START_LON)
+        self.logic = AdaptiveFuzzyController()
+        self.physics = PhysicsModel()
+
+        self.local_x, self.local_y = start_xy
+        self.yaw = 0.0
+
+        self.current_data = {"role": "follower", "battery": 95.0}
+        self.headers = {"X-Drone-Token": API_KEY, "Content-Type": "application/json"}
+        # Punkt docelowy z ostatniej odpowiedzi serwera (liczony z pozycji i kursu lidera)
+        self.target = None
+
+    def step(self, dt, send=True):
+        physics = self.physics
+        target = self.target
         fx, tz = 0.0, 0.0
 
-        if leader_state:
-            l_lat, l_lon = leader_state['lat'], leader_state['lon']
-            l_yaw_rad = math.radians(leader_state.get('yaw', 0))
-            
-            lx, ly = geo.gps_to_xy(l_lat, l_lon)
+        if target:
+            lx, ly = self.geo.gps_to_xy(target['leader_lat'], target['leader_lon'])
+            target_x, target_y = self.geo.gps_to_xy(target['lat'], target['lon'])
             
-            target_x = lx - TARGET_DISTANCE * math.cos(l_yaw_rad)
-            target_y = ly - TARGET_DISTANCE * math.sin(l_yaw_rad)
-            
-            state = {'x': local_x, 'y': local_y, 'yaw': yaw, 'r': physics.r, 'u': physics.u}
-            fx, tz = logic.compute(state, (target_x, target_y), (lx, ly), dt)
+            state = {'x': self.local_x, 'y': self.local_y, 'yaw': self.yaw, 'r': physics.r, 'u': physics.u}
+            fx, tz = self.logic.compute(state, (target_x, target_y), (lx, ly), dt)
         else:
             # Brak lidera - HOVER
             fx = -20.0 * physics.u
             tz = -10.0 * physics.r
 
         physics.step(fx, tz, dt)
-        local_x += physics.u * math.cos(yaw) * dt
-        local_y += physics.u * math.sin(yaw) * dt
-        yaw += physics.r * dt
-        yaw = math.atan2(math.sin(yaw), math.cos(yaw))
+        self.local_x += physics.u * math.cos(self.yaw) * dt
+        self.local_y += physics.u * math.sin(self.yaw) * dt
+        self.yaw += physics.r * dt
+        self.yaw = math.atan2(math.sin(self.yaw), math.cos(self.yaw))
 
-        new_lat, new_lon = geo.xy_to_gps(local_x, local_y)
-        current_data["battery"] = max(0, current_data["battery"] - 0.01)
-        
+        self.current_data["battery"] = max(0, self.current_data["battery"] - 0.01)
+        if send:
+            self.send_telemetry()
+
+    def send_telemetry(self):
+        new_lat, new_lon = self.geo.xy_to_gps(self.local_x, self.local_y)
         payload = {
-            "drone_id": DRONE_ID,
+            "drone_id": self.drone_id,
             "lat": new_lat, "lon": new_lon, "alt": 10,
-            "battery": round(current_data["battery"], 1),
-            "yaw": round(math.degrees(yaw), 2),
+            "battery": round(self.current_data["battery"], 1),
+            "yaw": round(math.degrees(self.yaw), 2),
             "roll": 0, "pitch": 0,
             "target_wp": 0 
         }
         
         try:
-            requests.post(BACKEND_URL_TELEM, json=payload, headers=headers, timeout=1)
+            resp = self.http.post(BACKEND_URL_TELEM, json=payload, headers=self.headers, timeout=1)
+            if resp.status_code == 200:
+                self.target = resp.json().get("formation")
         except Exception: pass
-        
-        time.sleep(dt)
+
+def main():
+    sim = FollowerSim()
+    dt = 0.1
+    
+    print(f"--- Start FOLLOWER: {DRONE_ID} ---", flush=True)
+
+    while True:
+        sim.step(dt)
+        sim.clock.sleep(dt)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+sim_headless.py — symulatory bez sieci i bez czekania na zegar ścienny.
+
+Lider (LeaderSim z sim_drone1.py), followerzy formacji (FollowerSim
+z sim_drone2.py) i drony na łączu Socket.IO (DroneSimulator z sim_socket.py)
+krokowane są na wspólnym zegarze symulacji (SimClock: sleep() przesuwa czas
+zamiast czekać), tak szybko, jak pozwala procesor. Zamiast serwera na Renderze
+rozmawiają z app.py w tym samym procesie: HTTP przez klienta testowego Flask,
+Socket.IO przez klienta testowego Flask-SocketIO. Stan serwera (dziennik,
+historia, misje) trafia do katalogu tymczasowego.
+
+Scenariusz (JSON) opisuje misję i drony; bez pliku uruchamiany jest
+scenariusz domyślny (kwadrat 120 m, jeden follower, jeden dron Socket.IO).
+Współrzędne punktów to [lat, lon] albo — z "xy": true — metry względem
+START_LAT/START_LON symulatorów:
+
+  {
+    "name": "kwadrat",
+    "duration_s": 600, "dt": 0.1, "seed": 0, "telemetry_every": 1,
+    "xy": true,
+    "leader": {"id": "skimmer1", "waypoints": [[0, 0], [120, 0], [120, 120]]},
+    "followers": {"follower1": [-8, 0]},
+    "socket_drones": {"skimmer2": [[0, 0], [50, 50]]},
+    "start_jitter_m": 2.0,
+    "expect": {"done_within_s": 300, "max_follow_error_m": 25}
+  }
+
+Wynik (trasy co --record-every s, czas ukończenia misji, błąd nadążania
+followerów, spełnienie "expect") trafia do pliku JSON; kod wyjścia 1, gdy
+któryś scenariusz nie spełnił oczekiwań.
+
+  python sim_headless.py scenariusz1.json scenariusz2.json --out wyniki.json
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+import sim_drone1
+import sim_drone2
+import sim_socket
+
+# Początek zegara symulacji (sekundy epoki) — stały, żeby wyniki były powtarzalne
+SIM_EPOCH = 1700000000.0
+# Błąd nadążania followerów liczony po dojeździe do szyku i tylko w trakcie misji lidera
+FOLLOW_SETTLE_S = 15.0
+
+DEFAULT_SCENARIO = {
+    "name": "default",
+    "duration_s": 300.0,
+    "dt": 0.1,
+    "seed": 0,
+    "xy": True,
+    "leader": {"id": sim_drone1.DRONE_ID, "waypoints": [[0, 0], [120, 0], [120, 120], [0, 120], [0, 0]]},
+    "followers": {sim_drone2.DRONE_ID: [-8, 0]},
+    "socket_drones": {"skimmer2": [[-30, -30], [-30, 60], [40, 60]]},
+    "expect": {"done_within_s": 240}
+}
+
+
+class SimClock:
+    """Zegar symulacji z interfejsem modułu time (time, sleep)."""
+
+    def __init__(self, start=SIM_EPOCH):
+        self.t = start
+
+    def time(self):
+        return self.t
+
+    def sleep(self, dt):
+        self.t += dt
+
+
+class AppResponse:
+    def __init__(self, resp):
+        self.resp = resp
+        self.status_code = resp.status_code
+
+    def json(self):
+        return self.resp.get_json()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class AppHTTP:
+    """get/post jak w requests, kierowane do klienta testowego app.py (liczy się tylko ścieżka URL)."""
+
+    def __init__(self, client, clock):
+        self.client = client
+        self.clock = clock
+        self.requests = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests += 1
+        return AppResponse(self.client.get(urlsplit(url).path, query_string=params, headers=headers))
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.requests += 1
+        path = urlsplit(url).path
+        if path == "/api/telemetry" and isinstance(json, dict) and "ts" not in json:
+            # Czas próbki z zegara symulacji (historia telemetrii)
+            json = dict(json, ts=self.clock.time())
+        return AppResponse(self.client.post(path, json=json, headers=headers))
+
+
+def load_app(workdir):
+    # Konfiguracja serwera przed importem: pliki stanu w katalogu roboczym,
+    # klucz dronów taki jak w symulatorach
+    os.environ.setdefault("DB_FILE", os.path.join(workdir, "drones_state.json"))
+    os.environ.setdefault("WAL_FILE", os.path.join(workdir, "drones_state.wal"))
+    os.environ.setdefault("HISTORY_DB", os.path.join(workdir, "telemetry_history.db"))
+    os.environ.setdefault("MISSION_DB", os.path.join(workdir, "missions.db"))
+    os.environ["DRONE_API_KEY"] = sim_drone1.API_KEY
+    import app
+    return app
+
+
+def to_latlon(points, xy):
+    if not xy:
+        return [[float(p[0]), float(p[1])] for p in points]
+    geo = sim_drone1.LocalFrame(sim_drone1.START_LAT, sim_drone1.START_LON)
+    return [list(map(float, geo.xy_to_gps(p[0], p[1]))) for p in points]
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    dy = math.radians(lat2 - lat1) * 6371000
+    dx = math.radians(lon2 - lon1) * 6371000 * math.cos(math.radians(lat1))
+    return math.hypot(dx, dy)
+
+
+class Recorder:
+    def __init__(self, every_s):
+        self.every_s = every_s
+        self.next_t = 0.0
+        self.tracks = {}
+
+    def due(self, t):
+        if t + 1e-9 < self.next_t:
+            return False
+        self.next_t += self.every_s
+        return True
+
+    def add(self, drone_id, t, lat, lon, yaw, battery, target_wp):
+        self.tracks.setdefault(drone_id, []).append(
+            [round(t, 3), round(lat, 7), round(lon, 7), round(yaw, 2), round(battery, 2), target_wp]
+        )
+
+
+def run_scenario(app, sc, record_every=1.0):
+    seed = int(sc.get("seed", 0))
+    random.seed(seed)
+    np.random.seed(seed)
+    rng = random.Random(seed)
+    dt = float(sc.get("dt", 0.1))
+    steps = int(round(float(sc.get("duration_s", 600.0)) / dt))
+    every = max(1, int(sc.get("telemetry_every", 1)))
+    xy = bool(sc.get("xy", False))
+    jitter = float(sc.get("start_jitter_m", 0.0))
+    quiet = lambda msg: None
+
+    clock = SimClock()
+    client = app.app.test_client()
+    http = AppHTTP(client, clock)
+    token = base64.b64encode(f"{app.ADMIN_USER}:{app.ADMIN_PASS}".encode()).decode()
+    admin = {"Authorization": f"Basic {token}"}
+
+    # Czysty stan po poprzednim scenariuszu w tym samym procesie
+    client.post("/api/formation/stop", json={}, headers=admin)
+    client.post("/api/mission/stop", json={}, headers=admin)
+
+    leader_cfg = sc.get("leader") or {}
+    leader_id = leader_cfg.get("id", sim_drone1.DRONE_ID)
+    leader = sim_drone1.LeaderSim(http, clock, drone_id=leader_id, log=quiet)
+    leader.local_x += rng.uniform(-jitter, jitter)
+    leader.local_y += rng.uniform(-jitter, jitter)
+
+    followers = {}
+    for f_id in (sc.get("followers") or {}):
+        start = (-10.0 + rng.uniform(-jitter, jitter), -10.0 + rng.uniform(-jitter, jitter))
+        followers[f_id] = sim_drone2.FollowerSim(http, clock, drone_id=f_id, start_xy=start)
+
+    sockets = {}
+    for s_id, waypoints in (sc.get("socket_drones") or {}).items():
+        start = to_latlon([waypoints[0]], xy)[0] if waypoints else [sim_socket.START_LAT, sim_socket.START_LON]
+        drone = sim_socket.DroneSimulator(s_id, start[0], start[1], http=http, clock=clock, verbose=False)
+        link = app.socketio.test_client(app.app, namespace=sim_socket.NAMESPACE,
+                                        auth={"token": sim_socket.API_KEY, "drone_id": s_id})
+        sockets[s_id] = (drone, link)
+
+    # Pierwsza telemetria rejestruje drony, potem misje i formacja
+    leader.send_telemetry()
+    for f in followers.values():
+        f.send_telemetry()
+    missions = {}
+    if leader_cfg.get("waypoints"):
+        missions[leader_id] = {"mission_id": f"{sc.get('name', 'headless')}_{leader_id}",
+                               "waypoints": to_latlon(leader_cfg["waypoints"], xy)}
+    for s_id, waypoints in (sc.get("socket_drones") or {}).items():
+        missions[s_id] = {"mission_id": f"{sc.get('name', 'headless')}_{s_id}",
+                          "waypoints": to_latlon(waypoints, xy)}
+    if missions:
+        client.post("/api/mission/upload", json={"drones": missions}, headers=admin)
+    if followers:
+        client.post("/api/formation", json={"leader": leader_id, "followers": sc["followers"]}, headers=admin)
+
+    rec = Recorder(record_every)
+    done_at = {}
+    follow_err = {f_id: [] for f_id in followers}
+    fly_ticks = max(1, int(round(dt / sim_socket.SIMULATION_TICK)))
+    next_socket_telemetry = 0.0
+
+    t_wall = time.perf_counter()
+    for i in range(steps):
+        t = i * dt
+        send = i % every == 0
+        leader.step(dt, send=send)
+        for f_id, f in followers.items():
+            f.step(dt, send=send)
+            if f.target and t >= FOLLOW_SETTLE_S and leader.current_data["mission_status"] == "active":
+                lat, lon = f.geo.xy_to_gps(f.local_x, f.local_y)
+                follow_err[f_id].append(distance_m(lat, lon, f.target["lat"], f.target["lon"]))
+
+        for s_id, (drone, link) in sockets.items():
+            for event in link.get_received(sim_socket.NAMESPACE):
+                if event["name"] == "command":
+                    drone._handle_server_commands(event["args"][0])
+            if drone.mission_waypoints:
+                for _ in range(fly_ticks):
+                    drone._fly_logic()
+            if s_id not in done_at and drone.mission_waypoints and drone.wp_index >= len(drone.mission_waypoints):
+                done_at[s_id] = round(t, 3)
+        if sockets and t + 1e-9 >= next_socket_telemetry:
+            next_socket_telemetry += sim_socket.TELEMETRY_RATE
+            for drone, link in sockets.values():
+                link.emit("telemetry", dict(drone.telemetry_payload(), ts=clock.time()),
+                          namespace=sim_socket.NAMESPACE)
+
+        if leader_id not in done_at and leader.current_data["mission_status"] == "done":
+            done_at[leader_id] = round(t, 3)
+
+        if rec.due(t):
+            c = leader.current_data
+            rec.add(leader_id, t, c["lat"], c["lon"], math.degrees(leader.yaw), c["battery"],
+                    c["current_wp_index"] + 1 if c["mission_status"] == "active" else 0)
+            for f_id, f in followers.items():
+                lat, lon = f.geo.xy_to_gps(f.local_x, f.local_y)
+                rec.add(f_id, t, lat, lon, math.degrees(f.yaw), f.current_data["battery"], 0)
+            for s_id, (drone, _) in sockets.items():
+                rec.add(s_id, t, drone.lat, drone.lon, drone.heading, drone.battery, drone.wp_index + 1)
+        clock.sleep(dt)
+    wall = time.perf_counter() - t_wall
+
+    for _, link in sockets.values():
+        link.disconnect(namespace=sim_socket.NAMESPACE)
+
+    drones = {leader_id: {
+        "kind": "leader",
+        "done_at_s": done_at.get(leader_id),
+        "wp_reached": leader.current_data["current_wp_index"],
+        "battery": round(leader.current_data["battery"], 2)
+    }}
+    for f_id, f in followers.items():
+        errs = follow_err[f_id]
+        drones[f_id] = {
+            "kind": "follower",
+            "mean_follow_error_m": round(sum(errs) / len(errs), 2) if errs else None,
+            "max_follow_error_m": round(max(errs), 2) if errs else None,
+            "battery": round(f.current_data["battery"], 2)
+        }
+    for s_id, (drone, _) in sockets.items():
+        drones[s_id] = {
+            "kind": "socket",
+            "done_at_s": done_at.get(s_id),
+            "wp_reached": drone.wp_index,
+            "battery": round(drone.battery, 2)
+        }
+    for d_id, track in rec.tracks.items():
+        drones[d_id]["track"] = track
+
+    failures = []
+    expect = sc.get("expect") or {}
+    if "done_within_s" in expect:
+        for d_id, d in drones.items():
+            if d["kind"] != "follower" and (d["done_at_s"] is None or d["done_at_s"] > expect["done_within_s"]):
+                failures.append(f"{d_id}: misja nieukończona w {expect['done_within_s']} s")
+    if "max_follow_error_m" in expect:
+        for d_id, d in drones.items():
+            err = d.get("max_follow_error_m")
+            if d["kind"] == "follower" and (err is None or err > expect["max_follow_error_m"]):
+                failures.append(f"{d_id}: błąd nadążania {err} m > {expect['max_follow_error_m']} m")
+
+    return {
+        "name": sc.get("name", "headless"),
+        "seed": seed,
+        "sim_time_s": round(steps * dt, 3),
+        "wall_s": round(wall, 3),
+        "speedup": round(steps * dt / wall, 1) if wall > 0 else None,
+        "requests": http.requests,
+        "passed": not failures,
+        "failures": failures,
+        "drones": drones
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Symulacja bez sieci, szybciej niż w czasie rzeczywistym")
+    p.add_argument("scenarios", nargs="*", help="Pliki JSON scenariuszy (bez nich: scenariusz domyślny)")
+    p.add_argument("--out", help="Plik JSON z wynikami")
+    p.add_argument("--seed", type=int, help="Nadpisuje seed scenariuszy")
+    p.add_argument("--duration", type=float, help="Nadpisuje duration_s scenariuszy")
+    p.add_argument("--record-every", type=float, default=1.0, help="Co ile sekund symulacji zapisywać trasę")
+    p.add_argument("--workdir", help="Katalog na pliki stanu serwera (domyślnie tymczasowy)")
+    args = p.parse_args()
+
+    scenarios = []
+    for path in args.scenarios:
+        with open(path, encoding="utf-8") as f:
+            scenarios.append(json.load(f))
+    if not scenarios:
+        scenarios.append(dict(DEFAULT_SCENARIO))
+    for sc in scenarios:
+        if args.seed is not None:
+            sc["seed"] = args.seed
+        if args.duration is not None:
+            sc["duration_s"] = args.duration
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sim_headless_")
+    app = load_app(workdir)
+
+    results = []
+    for sc in scenarios:
+        res = run_scenario(app, sc, args.record_every)
+        results.append(res)
+        status = "OK" if res["passed"] else "BŁĄD"
+        print(f"[{status}] {res['name']}: {res['sim_time_s']:.0f} s symulacji w {res['wall_s']:.2f} s "
+              f"({res['speedup']}×), zapytań: {res['requests']}")
+        for d_id, d in res["drones"].items():
+            info = {k: v for k, v in d.items() if k != "track"}
+            print(f"    {d_id}: {info}")
+        for msg in res["failures"]:
+            print(f"    ! {msg}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+    return 0 if all(r["passed"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
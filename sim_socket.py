@@ -1,6 +1,7 @@
 import time
 import threading
 import math
+import socketio
 import requests
 import sys
 
@@ -8,6 +9,7 @@ import sys
 SERVER_URL = 'https://drone-backend-2-1mwz.onrender.com'
 API_KEY = 'ZTBdrony'
 DRONE_ID = 'skimmer1'
+NAMESPACE = '/drone'
 
 # Ustawienia symulacji
 START_LAT = 52.2297   # Warszawa
@@ -17,8 +19,13 @@ TELEMETRY_RATE = 1.0  # Częstotliwość (s)
 SIMULATION_TICK = 0.05
 
 class DroneSimulator:
-    def __init__(self, drone_id, start_lat, start_lon):
+    # `http` — moduł requests albo obiekt z tym samym get(), `clock` — moduł
+    # time albo zegar symulacji (sim_headless.py steruje wtedy krokami sam)
+    def __init__(self, drone_id, start_lat, start_lon, http=requests, clock=time, verbose=True):
         self.drone_id = drone_id
+        self.http = http
+        self.clock = clock
+        self.verbose = verbose
         self.lat = start_lat
         self.lon = start_lon
         self.alt = 0
@@ -31,79 +38,101 @@ class DroneSimulator:
         self.status = 'Idle' 
         self.running = True
 
-        print(f"--- SYMULATOR DRONA: {self.drone_id} ---")
-        print(f"Serwer: {SERVER_URL}")
-        print("Uruchamianie...")
+        if verbose:
+            print(f"--- SYMULATOR DRONA: {self.drone_id} ---")
+            print(f"Serwer: {SERVER_URL}")
+            print("Uruchamianie...")
 
     def start(self):
+        # Stałe łącze Socket.IO: token raz przy połączeniu, misje przychodzą
+        # od razu zdarzeniem 'command' (bez czekania na kolejny POST)
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on('command', self._handle_server_commands, namespace=NAMESPACE)
+        self.sio.on('connect', lambda: print(f"[{self.drone_id}] Połączono z {SERVER_URL}{NAMESPACE}"), namespace=NAMESPACE)
+        self.sio.on('disconnect', lambda *a: print(f"[{self.drone_id}] Rozłączono"), namespace=NAMESPACE)
+        self.sio.connect(SERVER_URL,
+                         headers={"X-Drone-Token": API_KEY},
+                         auth={"drone_id": self.drone_id},
+                         namespaces=[NAMESPACE])
+
         movement_thread = threading.Thread(target=self._movement_loop, daemon=True)
         movement_thread.start()
         self._telemetry_loop()
 
-    def _telemetry_loop(self):
-        uri = f"{SERVER_URL}/api/telemetry"
-        headers = {"X-Drone-Token": API_KEY}
+    def telemetry_payload(self):
+        self.battery = max(0, self.battery - 0.02)
+        
+        # Jeśli mamy misję, wysyłamy numer punktu do którego lecimy (1, 2, 3...)
+        # Jeśli nie ma misji, wysyłamy 0
+        current_target_number = self.wp_index + 1 if self.mission_waypoints else 0
+
+        return {
+            "drone_id": self.drone_id,
+            "lat": self.lat,
+            "lon": self.lon,
+            "alt": self.alt,
+            "battery": round(self.battery, 1),
+            "roll": 0, "pitch": 0, "yaw": self.heading,
+            "target_wp": current_target_number # <--- WYSYŁAMY TO DO SERWERA
+        }
 
+    def _telemetry_loop(self):
         while self.running:
-            self.battery = max(0, self.battery - 0.02)
-            
-            # Jeśli mamy misję, wysyłamy numer punktu do którego lecimy (1, 2, 3...)
-            # Jeśli nie ma misji, wysyłamy 0
-            current_target_number = self.wp_index + 1 if self.mission_waypoints else 0
-
-            payload = {
-                "drone_id": self.drone_id,
-                "lat": self.lat,
-                "lon": self.lon,
-                "alt": self.alt,
-                "battery": round(self.battery, 1),
-                "roll": 0, "pitch": 0, "yaw": self.heading,
-                "target_wp": current_target_number # <--- WYSYŁAMY TO DO SERWERA
-            }
-
-            try:
-                # Timeout 10s żeby nie wisiał w nieskończoność
-                response = requests.post(uri, json=payload, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    self._handle_server_commands(data)
-                    
+            payload = self.telemetry_payload()
+            current_target_number = payload["target_wp"]
+
+            if self.sio.connected:
+                try:
+                    self.sio.emit('telemetry', payload, namespace=NAMESPACE)
                     status_info = f"Cel: WP #{current_target_number}" if self.mission_waypoints else self.status
                     print(f"[{self.drone_id}] Telemetria OK | Bat: {payload['battery']}% | {status_info}")
-                
-                elif response.status_code == 401:
-                    print(f"!! BŁĄD AUTORYZACJI !! Klucz odrzucony.")
-
-            except Exception as e:
-                print(f"Błąd połączenia: {e}")
+                except Exception as e:
+                    print(f"Błąd wysyłki: {e}")
+            else:
+                print(f"[{self.drone_id}] Brak połączenia, czekam...")
 
-            time.sleep(TELEMETRY_RATE)
+            self.clock.sleep(TELEMETRY_RATE)
 
     def _handle_server_commands(self, data):
         server_mission = data.get('mission')
         
         # START MISJI
         if server_mission and not self.mission_waypoints:
-            waypoints = server_mission.get('waypoints', [])
+            waypoints = self._fetch_waypoints(server_mission)
             if waypoints:
-                print(f"\n>>> START MISJI! Punktów: {len(waypoints)} <<<\n")
+                self._log(f"\n>>> START MISJI! Punktów: {len(waypoints)} <<<\n")
                 self.mission_waypoints = waypoints
                 self.wp_index = 0 # Resetujemy licznik
                 self.status = 'Mission'
 
         # STOP MISJI
         if not server_mission and self.mission_waypoints:
-             print("\n>>> STOP MISJI <<<\n")
+             self._log("\n>>> STOP MISJI <<<\n")
              self.mission_waypoints = []
              self.wp_index = 0
              self.status = 'Idle'
 
+    def _fetch_waypoints(self, mission):
+        # 'command' niesie tylko {id, version} misji — punkty pobieramy osobno
+        try:
+            resp = self.http.get(f"{SERVER_URL}/api/mission/{mission.get('id')}",
+                                params={"version": mission.get('version')},
+                                headers={"X-Drone-Token": API_KEY}, timeout=5)
+            resp.raise_for_status()
+            return resp.json().get('waypoints', [])
+        except Exception as e:
+            print(f"Błąd pobierania misji: {e}")
+            return []
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
     def _movement_loop(self):
         while self.running:
             if self.mission_waypoints:
                 self._fly_logic()
-            time.sleep(SIMULATION_TICK)
+            self.clock.sleep(SIMULATION_TICK)
 
     def _fly_logic(self):
         # Sprawdzamy czy nie skończyły się punkty
@@ -124,7 +153,7 @@ class DroneSimulator:
 
         if dist < SPEED_FACTOR:
             # Dolecieliśmy do punktu -> Zwiększamy licznik
-            print(f">>> Osiągnięto WP #{self.wp_index + 1}")
+            self._log(f">>> Osiągnięto WP #{self.wp_index + 1}")
             self.wp_index += 1
         else:
             # Lecimy dalej
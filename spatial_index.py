@@ -0,0 +1,151 @@
+"""
+spatial_index.py — indeks przestrzenny pozycji dronów (jednorodna siatka).
+
+Kubełki to komórki siatki o boku `cell_deg` stopni (domyślnie 0.01°, ok.
+1.1 km szerokości geograficznej). Zapytanie o prostokąt (viewport mapy)
+przegląda tylko komórki, które go przecinają, więc koszt zależy od liczby
+dronów w widoku, a nie od wielkości floty.
+
+Zapytania o promień i k najbliższych liczą odległości w metrach w lokalnym
+układzie równoodległościowym wokół punktu zapytania (jak LocalFrame
+w symulatorach) i przeglądają komórki pierścieniami od środka.
+"""
+
+import heapq
+import math
+
+R_EARTH = 6371000.0
+M_PER_DEG = math.pi * R_EARTH / 180.0
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Odległość [m] w przybliżeniu równoodległościowym (dokładne dla krótkich dystansów)."""
+    dy = (lat2 - lat1) * M_PER_DEG
+    dlon = (lon2 - lon1 + 540.0) % 360.0 - 180.0
+    dx = dlon * M_PER_DEG * math.cos(math.radians((lat1 + lat2) / 2.0))
+    return math.hypot(dx, dy)
+
+
+class GridIndex:
+    def __init__(self, cell_deg: float = 0.01):
+        self.cell_deg = cell_deg
+        self.cells = {}       # (i, j) -> set(drone_id)
+        self.positions = {}   # drone_id -> (lat, lon, (i, j))
+
+    def _cell(self, lat: float, lon: float):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update(self, drone_id, lat: float, lon: float) -> None:
+        cell = self._cell(lat, lon)
+        old = self.positions.get(drone_id)
+        if old is not None and old[2] != cell:
+            self._discard(drone_id, old[2])
+        if old is None or old[2] != cell:
+            self.cells.setdefault(cell, set()).add(drone_id)
+        self.positions[drone_id] = (lat, lon, cell)
+
+    def remove(self, drone_id) -> None:
+        old = self.positions.pop(drone_id, None)
+        if old is not None:
+            self._discard(drone_id, old[2])
+
+    def _discard(self, drone_id, cell) -> None:
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.discard(drone_id)
+            if not bucket:
+                del self.cells[cell]
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> set:
+        """Drony w prostokącie [south, north] x [west, east]; west > east = przez południk 180."""
+        if west > east:
+            return self.query_bbox(south, west, north, 180.0) | self.query_bbox(south, -180.0, north, east)
+
+        i0, j0 = self._cell(south, west)
+        i1, j1 = self._cell(north, east)
+        n_cells = (i1 - i0 + 1) * (j1 - j0 + 1)
+
+        if n_cells > len(self.cells):
+            # Widok większy niż zajęta część siatki — taniej przejrzeć zajęte komórki
+            candidates = [
+                d_id for (i, j), bucket in self.cells.items()
+                if i0 <= i <= i1 and j0 <= j <= j1 for d_id in bucket
+            ]
+        else:
+            candidates = []
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = self.cells.get((i, j))
+                    if bucket:
+                        candidates.extend(bucket)
+
+        out = set()
+        for d_id in candidates:
+            lat, lon, _ = self.positions[d_id]
+            if south <= lat <= north and west <= lon <= east:
+                out.add(d_id)
+        return out
+
+    def query_radius(self, lat: float, lon: float, radius_m: float) -> list:
+        """[(drone_id, odległość_m)] w promieniu radius_m, rosnąco po odległości."""
+        dlat = radius_m / M_PER_DEG
+        coslat = max(math.cos(math.radians(lat)), 1e-6)
+        dlon = min(radius_m / (M_PER_DEG * coslat), 180.0)
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        west = (lon - dlon + 540.0) % 360.0 - 180.0
+        east = (lon + dlon + 540.0) % 360.0 - 180.0
+        if dlon >= 180.0:
+            west, east = -180.0, 180.0
+
+        out = []
+        for d_id in self.query_bbox(south, west, north, east):
+            p_lat, p_lon, _ = self.positions[d_id]
+            d = distance_m(lat, lon, p_lat, p_lon)
+            if d <= radius_m:
+                out.append((d_id, d))
+        out.sort(key=lambda item: item[1])
+        return out
+
+    def nearest(self, lat: float, lon: float, k: int, max_radius_m: float = None) -> list:
+        """k najbliższych [(drone_id, odległość_m)], opcjonalnie nie dalej niż max_radius_m."""
+        if k <= 0 or not self.positions:
+            return []
+        if max_radius_m is not None:
+            return self.query_radius(lat, lon, max_radius_m)[:k]
+
+        ci, cj = self._cell(lat, lon)
+        # Najkrótszy bok komórki w metrach — dolne ograniczenie odległości
+        # do punktów w jeszcze nieprzejrzanych pierścieniach
+        cell_m = self.cell_deg * M_PER_DEG * max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 90.0))), 1e-6)
+
+        best = []   # max-heap (-odległość, drone_id) z k najlepszych
+        seen_cells = 0
+        ring = 0
+        while seen_cells < len(self.cells):
+            if (2 * ring + 1) ** 2 > 4 * len(self.cells):
+                # Flota rozrzucona daleko od punktu — prościej przejrzeć całość
+                best = [(-distance_m(lat, lon, p[0], p[1]), d_id) for d_id, p in self.positions.items()]
+                break
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    bucket = self.cells.get((i, j))
+                    if not bucket:
+                        continue
+                    seen_cells += 1
+                    for d_id in bucket:
+                        p_lat, p_lon, _ = self.positions[d_id]
+                        d = distance_m(lat, lon, p_lat, p_lon)
+                        if len(best) < k:
+                            heapq.heappush(best, (-d, d_id))
+                        elif d < -best[0][0]:
+                            heapq.heapreplace(best, (-d, d_id))
+            if len(best) >= k and -best[0][0] <= ring * cell_m:
+                break
+            ring += 1
+
+        return [(d_id, -neg) for neg, d_id in heapq.nsmallest(k, best, key=lambda item: -item[0])]
@@ -0,0 +1,306 @@
+"""
+state_backend.py — wymienny magazyn stanu dronów.
+
+  * InProcessBackend — słownik w pamięci procesu (domyślny, jeden worker;
+    trwałość zapewnia dziennik z persistence.py),
+  * RedisBackend     — stan współdzielony przez wiele workerów gunicorna.
+
+Oprócz wpisów dronów backend trzyma to, co musi być wspólne dla workerów
+przy rozsyłaniu delt: zbiór "brudnych" dronów, numery sekwencyjne i subskrypcje
+(viewport) klientów panelu oraz dzierżawę roli broadcastera (delty wysyła jeden worker naraz,
+do klientów podłączonych do dowolnego workera — przez kolejkę Socket.IO).
+
+RedisBackend przyjmuje dowolnego klienta zgodnego z redis-py, więc da się go
+uruchomić na lokalnym zastępniku (np. fakeredis) bez prawdziwego Redisa.
+
+Ostatnie pozycje dronów są indeksowane przy każdej aktualizacji telemetrii
+(siatka z spatial_index.py albo Redis GEO), co obsługuje zapytania near().
+"""
+
+import json
+
+from spatial_index import GridIndex
+
+# Zakres wyszukiwania "k najbliższych" bez promienia w Redis GEO [m]
+GEO_MAX_RADIUS_M = 20000000
+
+DEFAULT_ENTRY = {
+    "telemetry": {},
+    "assigned_role": "None",
+    "current_mission": None,
+    "last_seen": 0,
+    "is_tracked": False,
+    "formation": None
+}
+
+
+def new_entry():
+    entry = dict(DEFAULT_ENTRY)
+    entry["telemetry"] = {}
+    return entry
+
+
+def telemetry_position(fields: dict):
+    """(lat, lon) z aktualizowanej telemetrii albo None."""
+    telemetry = fields.get("telemetry")
+    if not telemetry:
+        return None
+    lat, lon = telemetry.get("lat"), telemetry.get("lon")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+class InProcessBackend:
+    shared = False
+
+    def __init__(self):
+        self.drones = {}
+        self.dirty = set()
+        self.client_seqs = {}
+        self.subscriptions = {}
+        self.index = GridIndex()
+        self.alerts = {}
+
+    def load(self, drones: dict) -> None:
+        self.drones = drones
+        self.index = GridIndex()
+        for d_id, entry in drones.items():
+            pos = telemetry_position(entry)
+            if pos is not None:
+                self.index.update(d_id, *pos)
+
+    # --- wpisy dronów ---
+    def get(self, drone_id):
+        return self.drones.get(drone_id)
+
+    def ids(self) -> list:
+        return list(self.drones.keys())
+
+    def entries(self, drone_ids=None) -> dict:
+        if drone_ids is None:
+            return dict(self.drones)
+        return {d_id: self.drones[d_id] for d_id in drone_ids if d_id in self.drones}
+
+    def update(self, drone_id, fields: dict):
+        """Zapisz pola i oznacz drona jako brudnego. Zwraca (wpis, nowy_dron, był_już_brudny)."""
+        created = drone_id not in self.drones
+        if created:
+            self.drones[drone_id] = new_entry()
+        entry = self.drones[drone_id]
+        entry.update(fields)
+        pos = telemetry_position(fields)
+        if pos is not None:
+            self.index.update(drone_id, *pos)
+        was_dirty = drone_id in self.dirty
+        self.dirty.add(drone_id)
+        return entry, created, was_dirty
+
+    def near(self, lat: float, lon: float, radius_m=None, k=None) -> list:
+        """[(drone_id, odległość_m)] rosnąco: w promieniu radius_m i/lub k najbliższych."""
+        if k is None:
+            return self.index.query_radius(lat, lon, radius_m)
+        return self.index.nearest(lat, lon, k, radius_m)
+
+    # --- alerty zbliżeń (liczone przez broadcaster, czytane przy ingeście) ---
+    def set_alerts(self, by_drone: dict) -> None:
+        self.alerts = by_drone
+
+    def alerts_for(self, drone_id) -> list:
+        return self.alerts.get(drone_id, [])
+
+    # --- broadcast ---
+    def mark_dirty(self, drone_ids) -> None:
+        self.dirty.update(drone_ids)
+
+    def pop_dirty(self) -> list:
+        drone_ids = list(self.dirty)
+        self.dirty.clear()
+        return drone_ids
+
+    def dirty_count(self) -> int:
+        return len(self.dirty)
+
+    def add_client(self, sid) -> None:
+        self.client_seqs[sid] = 0
+
+    def remove_client(self, sid) -> None:
+        self.client_seqs.pop(sid, None)
+        self.subscriptions.pop(sid, None)
+
+    def client_seq(self, sid) -> int:
+        return self.client_seqs.get(sid, 0)
+
+    def next_client_seqs(self, sids=None) -> dict:
+        """Zwiększ numer sekwencyjny klientów (domyślnie wszystkich); zwraca {sid: nowy_seq}."""
+        if sids is None:
+            sids = list(self.client_seqs)
+        out = {}
+        for sid in sids:
+            if sid in self.client_seqs:
+                self.client_seqs[sid] += 1
+                out[sid] = self.client_seqs[sid]
+        return out
+
+    def set_subscription(self, sid, subscription) -> None:
+        """subscription: {"bbox": [...], "ids": [...]} albo None (cała flota)."""
+        if sid in self.client_seqs:
+            self.subscriptions[sid] = subscription
+
+    def client_subscriptions(self) -> dict:
+        """{sid: subskrypcja albo None} dla wszystkich podłączonych klientów."""
+        return {sid: self.subscriptions.get(sid) for sid in self.client_seqs}
+
+    def acquire_broadcaster(self, worker_id, ttl_ms) -> bool:
+        return True
+
+
+class RedisBackend:
+    shared = True
+
+    def __init__(self, client, prefix="drones"):
+        self.r = client
+        self.k_ids = f"{prefix}:ids"
+        self.k_dirty = f"{prefix}:dirty"
+        self.k_clients = f"{prefix}:clients"
+        self.k_subs = f"{prefix}:subs"
+        self.k_geo = f"{prefix}:geo"
+        self.k_alerts = f"{prefix}:alerts"
+        self.k_leader = f"{prefix}:broadcaster"
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix="drones"):
+        import redis
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def _key(self, drone_id):
+        return f"{self.prefix}:d:{drone_id}"
+
+    @staticmethod
+    def _decode(raw: dict):
+        if not raw:
+            return None
+        entry = new_entry()
+        for k, v in raw.items():
+            entry[k.decode() if isinstance(k, bytes) else k] = json.loads(v)
+        return entry
+
+    def load(self, drones: dict) -> None:
+        # Stan żyje w Redisie — nic do wczytania
+        pass
+
+    # --- wpisy dronów (każde pole jako osobny JSON w haszu drona) ---
+    def get(self, drone_id):
+        return self._decode(self.r.hgetall(self._key(drone_id)))
+
+    def ids(self) -> list:
+        return [i.decode() if isinstance(i, bytes) else i for i in self.r.smembers(self.k_ids)]
+
+    def entries(self, drone_ids=None) -> dict:
+        if drone_ids is None:
+            drone_ids = self.ids()
+        pipe = self.r.pipeline(transaction=False)
+        for d_id in drone_ids:
+            pipe.hgetall(self._key(d_id))
+        out = {}
+        for d_id, raw in zip(drone_ids, pipe.execute()):
+            entry = self._decode(raw)
+            if entry is not None:
+                out[d_id] = entry
+        return out
+
+    def update(self, drone_id, fields: dict):
+        # Jedna podróż do Redisa: zapis pól + rejestracja + brudny + odczyt wpisu
+        pipe = self.r.pipeline(transaction=False)
+        pipe.sadd(self.k_ids, drone_id)
+        pipe.hset(self._key(drone_id), mapping={k: json.dumps(v) for k, v in fields.items()})
+        pipe.sadd(self.k_dirty, drone_id)
+        pipe.hgetall(self._key(drone_id))
+        pos = telemetry_position(fields)
+        if pos is not None:
+            pipe.geoadd(self.k_geo, (pos[1], pos[0], drone_id))
+        created, _, newly_dirty, raw = pipe.execute()[:4]
+        return self._decode(raw), bool(created), not newly_dirty
+
+    def near(self, lat: float, lon: float, radius_m=None, k=None) -> list:
+        hits = self.r.geosearch(
+            self.k_geo, longitude=lon, latitude=lat,
+            radius=radius_m if radius_m is not None else GEO_MAX_RADIUS_M, unit="m",
+            sort="ASC", count=k, withdist=True
+        )
+        return [(m.decode() if isinstance(m, bytes) else m, float(d)) for m, d in hits]
+
+    def set_alerts(self, by_drone: dict) -> None:
+        pipe = self.r.pipeline(transaction=True)
+        pipe.delete(self.k_alerts)
+        if by_drone:
+            pipe.hset(self.k_alerts, mapping={d_id: json.dumps(a) for d_id, a in by_drone.items()})
+        pipe.execute()
+
+    def alerts_for(self, drone_id) -> list:
+        raw = self.r.hget(self.k_alerts, drone_id)
+        return json.loads(raw) if raw else []
+
+    # --- broadcast ---
+    def mark_dirty(self, drone_ids) -> None:
+        drone_ids = list(drone_ids)
+        if drone_ids:
+            self.r.sadd(self.k_dirty, *drone_ids)
+
+    def pop_dirty(self) -> list:
+        pipe = self.r.pipeline(transaction=True)
+        pipe.smembers(self.k_dirty)
+        pipe.delete(self.k_dirty)
+        members, _ = pipe.execute()
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def dirty_count(self) -> int:
+        return self.r.scard(self.k_dirty)
+
+    def add_client(self, sid) -> None:
+        self.r.hset(self.k_clients, sid, 0)
+
+    def remove_client(self, sid) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hdel(self.k_clients, sid)
+        pipe.hdel(self.k_subs, sid)
+        pipe.execute()
+
+    def client_seq(self, sid) -> int:
+        seq = self.r.hget(self.k_clients, sid)
+        return int(seq) if seq is not None else 0
+
+    def next_client_seqs(self, sids=None) -> dict:
+        if sids is None:
+            sids = [s.decode() if isinstance(s, bytes) else s for s in self.r.hkeys(self.k_clients)]
+        if not sids:
+            return {}
+        pipe = self.r.pipeline(transaction=False)
+        for sid in sids:
+            pipe.hincrby(self.k_clients, sid, 1)
+        return dict(zip(sids, pipe.execute()))
+
+    def set_subscription(self, sid, subscription) -> None:
+        if subscription is None:
+            self.r.hdel(self.k_subs, sid)
+        else:
+            self.r.hset(self.k_subs, sid, json.dumps(subscription))
+
+    def client_subscriptions(self) -> dict:
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hkeys(self.k_clients)
+        pipe.hgetall(self.k_subs)
+        sids, subs = pipe.execute()
+        subs = {(k.decode() if isinstance(k, bytes) else k): json.loads(v) for k, v in subs.items()}
+        return {sid: subs.get(sid) for sid in (s.decode() if isinstance(s, bytes) else s for s in sids)}
+
+    def acquire_broadcaster(self, worker_id, ttl_ms) -> bool:
+        # Dzierżawa z TTL: gdy broadcaster padnie, rolę przejmie inny worker
+        if self.r.set(self.k_leader, worker_id, nx=True, px=ttl_ms):
+            return True
+        current = self.r.get(self.k_leader)
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == worker_id:
+            self.r.pexpire(self.k_leader, ttl_ms)
+            return True
+        return False
@@ -14,6 +14,15 @@ let finalWaypoints = [];
 let missionPolyline = null; 
 let selectedDroneId = null;
 
+// Stan floty po stronie klienta (pełny snapshot + delty z serwera)
+let dronesState = {};
+let lastSeq = null;
+let resyncing = false;
+let pendingDeltas = [];
+let subscribeTimer = null;
+// Aktywne alerty zbliżeń: drone_id -> [{ other, dcpa_m, tcpa_s }]
+let proximityAlerts = {};
+
 // Ikony
 const getDroneIconHtml = (color) => `
     <div class="drone-body" style="width: 30px; height: 30px; display: flex; align-items: center; justify-content: center; transition: transform 0.1s linear;">
@@ -48,20 +57,97 @@ document.addEventListener("DOMContentLoaded", () => {
         updateDrawingVisuals(); toggleDensityControl(e.target.value);
     });
     map.on('click', onMapClick);
+    map.on('moveend', scheduleSubscribe);
 
-    socket.on('telemetry_update', (drones) => {
-        updateMap(drones);
-        updateSidebar(drones);
-        if (selectedDroneId) {
-            const d = drones.find(x => x.drone_id === selectedDroneId);
-            if(d) updateHUD(d.roll, d.pitch, d.yaw);
-        }
-    });
+    socket.on('connect', subscribeViewport);
+    socket.on('telemetry_delta', onTelemetryDelta);
+    socket.on('proximity_alert', onProximityAlert);
 });
 
+// === SUBSKRYPCJA WIDOKU ===
+// Serwer wysyła tylko drony z widocznego obszaru (z zapasem) i wybranego drona.
+function subscribeViewport() {
+    const b = map.getBounds().pad(0.25);
+    const sub = {
+        bbox: [b.getSouth(), b.getWest(), b.getNorth(), b.getEast()],
+        ids: selectedDroneId ? [selectedDroneId] : []
+    };
+    socket.emit('subscribe', sub, () => requestSnapshot());
+}
+
+function scheduleSubscribe() {
+    clearTimeout(subscribeTimer);
+    subscribeTimer = setTimeout(subscribeViewport, 200);
+}
+
+// === SYNCHRONIZACJA STANU (snapshot + delty) ===
+async function requestSnapshot() {
+    if (resyncing) return;
+    resyncing = true;
+    try {
+        const res = await fetch(`/api/init_state?sid=${encodeURIComponent(socket.id)}`);
+        if (res.status === 401) { location.reload(); return; }
+        const snap = await res.json();
+        dronesState = {};
+        snap.drones.forEach(d => { dronesState[d.drone_id] = d; });
+        lastSeq = snap.seq;
+    } catch (e) {
+        console.error(e);
+        lastSeq = null;
+    } finally {
+        resyncing = false;
+    }
+
+    // Delty, które przyszły w trakcie pobierania snapshotu
+    const buffered = pendingDeltas;
+    pendingDeltas = [];
+    for (const msg of buffered) {
+        if (lastSeq !== null && msg.seq > lastSeq) onTelemetryDelta(msg);
+    }
+    renderDrones();
+}
+
+function onTelemetryDelta(msg) {
+    if (resyncing) { pendingDeltas.push(msg); return; }
+    if (lastSeq === null || msg.seq !== lastSeq + 1) {
+        // Luka w numeracji -> pełny resync
+        pendingDeltas.push(msg);
+        requestSnapshot();
+        return;
+    }
+    lastSeq = msg.seq;
+    for (const [id, fields] of Object.entries(msg.drones)) {
+        dronesState[id] = Object.assign(dronesState[id] || { drone_id: id }, fields);
+    }
+    // Drony, które wyszły poza subskrybowany widok
+    (msg.removed || []).forEach(id => { delete dronesState[id]; });
+    renderDrones();
+}
+
+function onProximityAlert(msg) {
+    proximityAlerts = {};
+    msg.alerts.forEach(a => {
+        a.drones.forEach((id, k) => {
+            (proximityAlerts[id] = proximityAlerts[id] || []).push({ other: a.drones[1 - k], dcpa_m: a.dcpa_m, tcpa_s: a.tcpa_s });
+        });
+    });
+    renderDrones();
+}
+
+function renderDrones() {
+    const drones = Object.values(dronesState);
+    updateMap(drones);
+    updateSidebar(drones);
+    if (selectedDroneId) {
+        const d = dronesState[selectedDroneId];
+        if(d) updateHUD(d.roll, d.pitch, d.yaw);
+    }
+}
+
 // UI
 function toggleDensityControl(type) {
     document.getElementById('density-control').style.display = (type === 'lawnmower') ? 'block' : 'none';
+    document.getElementById('route-control').style.display = (type === 'waypoints') ? 'block' : 'none';
 }
 
 function handleMainButton() {
@@ -101,44 +187,56 @@ function updateDrawingVisuals() {
     else drawingPolyline = L.polyline(latlngs, { color: 'orange', dashArray: '5, 10' }).addTo(drawingLayer);
 }
 
-function generatePath() {
+async function generatePath() {
     if (drawingMarkers.length < 2) { alert("Min. 2 punkty!"); return; }
     const points = drawingMarkers.map(m => [m.getLatLng().lat, m.getLatLng().lng]);
     const type = document.getElementById('mission-type-select').value;
     finalWaypoints = [];
-
-    if (type === 'waypoints') finalWaypoints = points;
+    let routeNote = '';
+
+    if (type === 'waypoints') {
+        finalWaypoints = points;
+        if (points.length > 2 && document.getElementById('optimize-order').checked) {
+            // Kolejność liczona na serwerze (start od pozycji wybranego drona, jeśli ją zna)
+            const body = { waypoints: points };
+            const drone = selectedDroneId && dronesState[selectedDroneId];
+            if (drone && drone.lat != null) body.drone_id = selectedDroneId;
+            try {
+                const res = await fetch('/api/plan/optimize', {
+                    method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body)
+                });
+                if (res.status === 401) { location.reload(); return; }
+                const plan = await res.json();
+                if (!res.ok) { alert("Błąd optymalizacji: " + plan.error); return; }
+                finalWaypoints = plan.waypoints;
+                routeNote = ` — krócej o ${plan.saved_m} m`;
+            } catch (e) { alert("Błąd: " + e); return; }
+        }
+    }
     else if (type === 'lawnmower') {
         if (points.length < 3) { alert("Min. 3 punkty!"); return; }
-        const turfPoints = [...points, points[0]].map(p => [p[1], p[0]]); 
-        const searchArea = turf.polygon([turfPoints]);
-        const bbox = turf.bbox(searchArea);
         let dist = parseFloat(document.getElementById('scan-distance').value);
         if (isNaN(dist) || dist < 5) { dist = 5; document.getElementById('scan-distance').value = 5; }
-        const step = dist / 111132; 
-        let latIter = bbox[1]; let toggle = false;
-        if (step <= 0.00001) return;
-
-        while (latIter <= bbox[3]) {
-            let rowPoints = [];
-            for(let ln = bbox[0]; ln <= bbox[2]; ln += step/5) {
-                if (turf.booleanPointInPolygon(turf.point([ln, latIter]), searchArea)) rowPoints.push([latIter, ln]);
-            }
-            if (rowPoints.length > 1) {
-                let segment = [rowPoints[0], rowPoints[rowPoints.length - 1]];
-                if (toggle) segment.reverse();
-                finalWaypoints.push(...segment);
-                toggle = !toggle;
-            } else if (rowPoints.length === 1) finalWaypoints.push(rowPoints[0]);
-            latIter += step;
-        }
+        const angle = parseFloat(document.getElementById('scan-angle').value) || 0;
+
+        // Trasa liczona na serwerze (przecięcia linii z krawędziami wielokąta)
+        try {
+            const res = await fetch('/api/plan/lawnmower', {
+                method: 'POST', headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ polygon: points, spacing_m: dist, angle_deg: angle, drones: 1 })
+            });
+            if (res.status === 401) { location.reload(); return; }
+            const plan = await res.json();
+            if (!res.ok) { alert("Błąd planowania: " + plan.error); return; }
+            finalWaypoints = Object.values(plan.drones)[0].waypoints;
+        } catch (e) { alert("Błąd: " + e); return; }
         if (finalWaypoints.length === 0) finalWaypoints = points;
     }
     renderEditableMission();
     isDrawingMode = false; drawingLayer.clearLayers(); 
     const btn = document.getElementById('mission-btn');
     btn.innerText = "Wgraj misję"; btn.style.background = "#007bff"; 
-    document.getElementById('mission-info').innerText = `Trasa gotowa (${finalWaypoints.length} pkt).`;
+    document.getElementById('mission-info').innerText = `Trasa gotowa (${finalWaypoints.length} pkt)${routeNote}.`;
 }
 
 function renderEditableMission() {
@@ -225,6 +323,8 @@ function updateSidebar(drones) {
                             <div>Status misji: <span class="d-mission" style="color:#fff"></span></div>
                             <div>Rola: <span class="d-role" style="color:#fff"></span></div>
                             <div>Bateria: <span class="d-bat" style="color:#fff"></span></div>
+                            <div class="d-progress"></div>
+                            <div class="d-alert" style="color:#e74c3c; font-weight:bold;"></div>
                         </div>
                     </div>
                     <button class="list-btn action-btn" style="margin-left:10px;"></button>
@@ -255,6 +355,12 @@ function updateSidebar(drones) {
         batSpan.innerText = `${d.battery}%`;
         batSpan.style.color = d.battery < 20 ? '#e74c3c' : '#fff';
 
+        el.querySelector('.d-progress').innerHTML = progressText(d);
+
+        const alerts = proximityAlerts[d.drone_id] || [];
+        el.querySelector('.d-alert').innerText = alerts
+            .map(a => `⚠ ${a.other}: ${a.dcpa_m} m za ${a.tcpa_s} s`).join('\n');
+
         const btn = el.querySelector('.action-btn');
         if (d.is_tracked) {
             btn.innerText = "🗑️";
@@ -272,6 +378,24 @@ function updateSidebar(drones) {
     handleEmptyMessage(containers.detected);
 }
 
+function formatEta(s) {
+    if (s == null) return "—";
+    const m = Math.floor(s / 60);
+    return m >= 60 ? `${Math.floor(m / 60)} h ${m % 60} min` : `${m}:${String(s % 60).padStart(2, '0')}`;
+}
+
+function progressText(d) {
+    // Pola liczone na serwerze (progress.py); brak misji = null
+    if (d.remaining_m == null) return "";
+    const dist = d.remaining_m >= 1000 ? `${(d.remaining_m / 1000).toFixed(1)} km` : `${d.remaining_m} m`;
+    let txt = `Postęp: <span style="color:#fff">${d.progress_pct}% · ${dist} · ETA ${formatEta(d.eta_s)}</span>`;
+    if (d.battery_at_end != null) {
+        const color = d.battery_at_end < 10 ? '#e74c3c' : '#fff';
+        txt += `<br>Bateria na końcu: <span style="color:${color}">${d.battery_at_end}%</span>`;
+    }
+    return txt;
+}
+
 function handleEmptyMessage(container) {
     const itemsCount = container.querySelectorAll('.item').length;
     let msg = container.querySelector('.empty-msg');
@@ -335,6 +459,11 @@ function updateMap(drones) {
                 if (body) body.style.transform = `rotate(${d.yaw}deg)`;
             }
             marker.setOpacity(d.is_tracked ? 1.0 : 0.6);
+            const inAlert = !!proximityAlerts[d.drone_id];
+            if (marker.inAlert !== inAlert) {
+                marker.setIcon(createDroneIcon(inAlert ? '#e74c3c' : '#007bff'));
+                marker.inAlert = inAlert;
+            }
             if (marker.isPopupOpen()) {
                  marker.setPopupContent(`
                     <b>${d.drone_id}</b><br>
@@ -356,6 +485,7 @@ function updateMap(drones) {
 function selectDrone(id) {
     selectedDroneId = id; 
     document.getElementById('gauges-container').classList.remove('hidden');
+    scheduleSubscribe();
 
     if (droneMarkers[id]) {
         map.flyTo(droneMarkers[id].getLatLng(), 18, {
@@ -0,0 +1,107 @@
+"""
+telemetry_codec.py — kompaktowe kodowania telemetrii dla łączy radiowych.
+
+Wybór po nagłówku Content-Type żądania:
+  * application/json                 — jak dotąd,
+  * application/x-drone-telemetry    — stały układ binarny (struct), poniżej,
+  * application/msgpack              — MessagePack (wymaga pakietu 'msgpack').
+
+Układ binarny jednej próbki (little-endian), rekordy można sklejać jeden za
+drugim (batch):
+
+  B   wersja formatu (1)
+  B   długość drone_id w bajtach (UTF-8), potem same bajty drone_id
+  i   lat * 1e7            (jak w MAVLink GLOBAL_POSITION_INT, ~1 cm)
+  i   lon * 1e7
+  f   alt [m]              (NaN = brak)
+  H   battery * 10 [%]
+  h   roll * 100 [deg]
+  h   pitch * 100 [deg]
+  H   (yaw mod 360) * 100 [deg]
+  H   target_wp
+
+Dla drone_id "skimmer1" to 32 bajty zamiast ~150 w JSON. Kodowanie po
+stronie drona: drone_probe/probe.py (--encoding binary).
+"""
+
+import math
+import struct
+
+BINARY_MIMETYPE = "application/x-drone-telemetry"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BB")
+_BODY = struct.Struct("<iifHhhHH")
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def encode_binary(sample: dict) -> bytes:
+    drone_id = str(sample["drone_id"]).encode("utf-8")
+    if len(drone_id) > 255:
+        raise ValueError("drone_id too long")
+    alt = sample.get("alt")
+    return _HEADER.pack(FORMAT_VERSION, len(drone_id)) + drone_id + _BODY.pack(
+        int(round(float(sample["lat"]) * 1e7)),
+        int(round(float(sample["lon"]) * 1e7)),
+        float("nan") if alt is None else float(alt),
+        max(0, min(65535, int(round(float(sample.get("battery", 0)) * 10)))),
+        int(round(float(sample.get("roll", 0)) * 100)),
+        int(round(float(sample.get("pitch", 0)) * 100)),
+        int(round((float(sample.get("yaw", 0)) % 360.0) * 100)) % 36000,
+        int(sample.get("target_wp", 0)) & 0xFFFF
+    )
+
+
+def decode_binary_many(buf: bytes) -> list:
+    samples = []
+    offset = 0
+    n = len(buf)
+    while offset < n:
+        if n - offset < _HEADER.size:
+            raise ValueError("Truncated record header")
+        version, id_len = _HEADER.unpack_from(buf, offset)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {version}")
+        offset += _HEADER.size
+        if n - offset < id_len + _BODY.size:
+            raise ValueError("Truncated record")
+        drone_id = buf[offset:offset + id_len].decode("utf-8")
+        offset += id_len
+        lat_e7, lon_e7, alt, bat, roll, pitch, yaw, wp = _BODY.unpack_from(buf, offset)
+        offset += _BODY.size
+
+        sample = {
+            "drone_id": drone_id,
+            "lat": lat_e7 / 1e7,
+            "lon": lon_e7 / 1e7,
+            "battery": bat / 10.0,
+            "roll": roll / 100.0,
+            "pitch": pitch / 100.0,
+            "yaw": yaw / 100.0,
+            "target_wp": wp
+        }
+        if not math.isnan(alt):
+            sample["alt"] = alt
+        samples.append(sample)
+    return samples
+
+
+def decode_binary(buf: bytes) -> dict:
+    samples = decode_binary_many(buf)
+    if len(samples) != 1:
+        raise ValueError("Expected exactly one record")
+    return samples[0]
+
+
+def decode_msgpack(buf: bytes):
+    if msgpack is None:
+        raise RuntimeError("msgpack not installed")
+    try:
+        return msgpack.unpackb(buf, raw=False)
+    except Exception as e:
+        raise ValueError(f"Bad msgpack: {e}")
@@ -0,0 +1,151 @@
+"""
+track_lod.py — przerzedzanie tras (level-of-detail) do podglądu na mapie.
+
+Punkty trasy rzutowane są do lokalnego układu metrycznego (jak LocalFrame
+w symulatorach), a następnie wybierany jest podzbiór próbek:
+  * lttb — Largest-Triangle-Three-Buckets (zachowuje kształt, równy rozkład),
+  * rdp  — Ramer–Douglas–Peucker w wersji "do zadanej liczby punktów"
+           (kolejno dzieli odcinek o największym odchyleniu).
+
+Dla zakończonych misji budowana jest piramida poziomów (64, 128, 256, ...
+punktów), trzymana w PyramidCache — kolejne zapytania przy zmianie zoomu
+to tylko wybór gotowego poziomu.
+"""
+
+import heapq
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+R_EARTH = 6371000.0
+METHODS = ("lttb", "rdp")
+MIN_LEVEL = 64
+
+
+def project(rows, lat_idx=1, lon_idx=2):
+    """Rzut (lat, lon) z wierszy historii na lokalne x/y [m] względem pierwszego punktu."""
+    lat = np.array([r[lat_idx] for r in rows], dtype=float)
+    lon = np.array([r[lon_idx] for r in rows], dtype=float)
+    lat0, lon0 = lat[0], lon[0]
+    x = np.radians(lon - lon0) * R_EARTH * math.cos(math.radians(lat0))
+    y = np.radians(lat - lat0) * R_EARTH
+    return x, y
+
+
+def lttb_indices(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 kubełków między pierwszym a ostatnim punktem
+    bounds = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0] = 0
+    out[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        b0, b1 = bounds[i], bounds[i + 1]
+        if i + 2 < len(bounds):
+            c0, c1 = bounds[i + 1], bounds[i + 2]
+        else:
+            c0, c1 = n - 1, n
+        cx = x[c0:c1].mean()
+        cy = y[c0:c1].mean()
+
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[b0:b1] - ay) - (ax - x[b0:b1]) * (cy - ay))
+        a = b0 + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _segment_deviation(x, y, i, j):
+    """Indeks i odległość punktu z (i, j) najdalej od odcinka i-j."""
+    px = x[i + 1:j]
+    py = y[i + 1:j]
+    dx, dy = x[j] - x[i], y[j] - y[i]
+    seg2 = dx * dx + dy * dy
+    if seg2 > 0.0:
+        t = np.clip(((px - x[i]) * dx + (py - y[i]) * dy) / seg2, 0.0, 1.0)
+    else:
+        # Trasa wróciła do punktu startu — odległość od punktu
+        t = np.zeros_like(px)
+    d2 = (px - (x[i] + t * dx)) ** 2 + (py - (y[i] + t * dy)) ** 2
+    k = int(np.argmax(d2))
+    return i + 1 + k, float(d2[k])
+
+
+def rdp_indices(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    keep = [0, n - 1]
+    heap = []
+
+    def push(i, j):
+        if j - i >= 2:
+            k, d2 = _segment_deviation(x, y, i, j)
+            heapq.heappush(heap, (-d2, i, j, k))
+
+    push(0, n - 1)
+    while len(keep) < n_out and heap:
+        _, i, j, k = heapq.heappop(heap)
+        keep.append(k)
+        push(i, k)
+        push(k, j)
+    return np.array(sorted(keep), dtype=int)
+
+
+def downsample(rows, max_points, method="lttb"):
+    """Podzbiór wierszy historii (kolejność zachowana) o długości <= max_points."""
+    rows = [r for r in rows if r[1] is not None and r[2] is not None]
+    if len(rows) <= max_points:
+        return rows
+    x, y = project(rows)
+    pick = lttb_indices if method == "lttb" else rdp_indices
+    return [rows[i] for i in pick(x, y, max_points)]
+
+
+class TrackPyramid:
+    def __init__(self, rows, method="lttb"):
+        self.method = method
+        self.full = [r for r in rows if r[1] is not None and r[2] is not None]
+        self.total = len(self.full)
+        self.levels = {}
+        if self.total <= MIN_LEVEL:
+            return
+        x, y = project(self.full)
+        pick = lttb_indices if method == "lttb" else rdp_indices
+        size = MIN_LEVEL
+        while size < self.total:
+            self.levels[size] = [self.full[i] for i in pick(x, y, size)]
+            size *= 2
+
+    def level(self, max_points):
+        """Największy poziom nie przekraczający max_points (potęga dwójki)."""
+        if max_points >= self.total:
+            return self.full
+        if max_points < MIN_LEVEL:
+            return downsample(self.levels.get(MIN_LEVEL, self.full), max_points, self.method)
+        return self.levels[1 << int(math.log2(max_points))]
+
+
+class PyramidCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, pyramid):
+        self._items[key] = pyramid
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)